@@ -0,0 +1,218 @@
+"""Модуль со сборкой и раздачей статических файлов.
+
+В режиме production статические файлы копируются в ASSETS_PATH
+под именами с хэшем содержимого (например, css/base.3f2a9c1b4d5e.css),
+а версии текстовых файлов, сжатые gzip и brotli (если установлен
+пакет brotli), - в папки ASSETS_PATH/gzip и ASSETS_PATH/br.
+`url('static', filename=...)` в шаблонах возвращает адрес с хэшем,
+а такие файлы отдаются с Cache-Control immutable: при изменении файла
+меняется и его адрес, поэтому браузеру не нужно перепроверять файлы.
+Сжатая версия выбирается по заголовку Accept-Encoding запроса.
+
+Собранные файлы не удаляются, поэтому страницы, которые отрендерены
+до деплоя, продолжают получать старые версии файлов.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Tuple
+
+from aiohttp import hdrs
+from aiohttp.web import (
+    Application,
+    FileResponse,
+    HTTPNotFound,
+    Request,
+    StreamResponse,
+)
+from aiohttp.web_urldispatcher import StaticResource
+from yarl import URL
+
+from app import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Ключ приложения с хэшем имён собранных файлов для ETag страниц
+ASSETS_DIGEST_KEY = "assets_digest"
+
+HASH_LENGTH = 12
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".ico", ".json", ".txt"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _get_compressors() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    """Доступные кодировки сжатия в порядке предпочтения."""
+    compressors = []
+    if brotli is not None:
+        compressors.append(
+            ("br", lambda data: brotli.compress(data, quality=11))
+        )
+    compressors.append(("gzip", lambda data: gzip.compress(data, 9, mtime=0)))
+    return compressors
+
+
+def build_assets(source: Path, output: Path) -> Dict[str, str]:
+    """Сборка статических файлов из source в output.
+
+    Возвращает словарь исходное имя -> имя с хэшем. Уже собранные
+    файлы не перезаписываются, поэтому сборку можно запускать
+    в нескольких воркерах одновременно.
+    """
+    manifest = {}
+    for path in sorted(source.rglob("*")):
+        if not path.is_file():
+            continue
+
+        name = path.relative_to(source).as_posix()
+        content = path.read_bytes()
+        fingerprinted_name = _fingerprint_name(
+            name, hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        )
+        target = output / fingerprinted_name
+        if path.suffix in COMPRESSIBLE_SUFFIXES:
+            for encoding, compress in _get_compressors():
+                compressed_target = output / encoding / fingerprinted_name
+                if compressed_target.exists():
+                    continue
+
+                compressed = compress(content)
+                # сжатая версия без выигрыша только замедлит ответ
+                if len(compressed) < len(content):
+                    _write_file(compressed_target, compressed)
+        if not target.exists():
+            _write_file(target, content)
+
+        manifest[name] = fingerprinted_name
+
+    return manifest
+
+
+def _fingerprint_name(name: str, digest: str) -> str:
+    """Добавление хэша содержимого в имя файла перед расширением."""
+    path = PurePosixPath(name)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def _write_file(path: Path, content: bytes):
+    """Атомарная запись файла через временный файл."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class AssetsResource(StaticResource):
+    """Раздача собранных статических файлов.
+
+    Отдаются только файлы из манифеста: по имени с хэшем навсегда,
+    а по исходному имени (для ссылок не из шаблонов) - с перепроверкой.
+    """
+
+    def __init__(
+        self, prefix: str, directory: Path, manifest: Dict[str, str], name
+    ):
+        """Создание ресурса для файлов из манифеста."""
+        super().__init__(prefix, directory, name=name)
+        self._manifest = manifest
+        # путь в адресе -> (имя собранного файла, неизменяемый ли адрес)
+        self._files = {
+            name: (fingerprinted_name, False)
+            for name, fingerprinted_name in manifest.items()
+        }
+        self._files.update(
+            (fingerprinted_name, (fingerprinted_name, True))
+            for fingerprinted_name in manifest.values()
+        )
+
+    def url_for(self, *, filename: str, append_version=None) -> URL:
+        """Адрес файла с хэшем содержимого в имени."""
+        filename = str(filename).lstrip("/")
+        return super().url_for(
+            filename=self._manifest.get(filename, filename),
+            append_version=False,
+        )
+
+    async def _handle(self, request: Request) -> StreamResponse:
+        """Отдача файла в лучшем из принимаемых клиентом сжатий."""
+        file = self._files.get(request.match_info["filename"])
+        if file is None:
+            raise HTTPNotFound()
+
+        fingerprinted_name, is_immutable = file
+        path = self._directory / fingerprinted_name
+        headers = {
+            hdrs.CACHE_CONTROL: (
+                IMMUTABLE_CACHE_CONTROL if is_immutable else "no-cache"
+            ),
+        }
+        content_type, _ = mimetypes.guess_type(fingerprinted_name)
+        headers[hdrs.CONTENT_TYPE] = content_type or "application/octet-stream"
+        if path.suffix in COMPRESSIBLE_SUFFIXES:
+            headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+            accepted_encodings = _get_accepted_encodings(request)
+            for encoding, _ in _get_compressors():
+                # сжатые версии лежат не рядом с файлом, поэтому
+                # FileResponse не подменит файл своей версией .gz
+                # для клиентов, которые запретили gzip
+                compressed_path = self._directory.joinpath(
+                    encoding, fingerprinted_name
+                )
+                if encoding in accepted_encodings and compressed_path.exists():
+                    path = compressed_path
+                    headers[hdrs.CONTENT_ENCODING] = encoding
+                    break
+
+        return FileResponse(path, chunk_size=self._chunk_size, headers=headers)
+
+
+def _get_accepted_encodings(request: Request) -> set:
+    """Кодировки из Accept-Encoding запроса, кроме запрещённых (q=0)."""
+    encodings = set()
+    for value in request.headers.get(hdrs.ACCEPT_ENCODING, "").split(","):
+        encoding, *params = (part.strip() for part in value.split(";"))
+        if not encoding:
+            continue
+
+        try:
+            quality = next(
+                float(param[2:]) for param in params if param.startswith("q=")
+            )
+        except (StopIteration, ValueError):
+            quality = 1
+
+        if quality > 0:
+            encodings.add(encoding.lower())
+
+    return encodings
+
+
+def setup_static(app: Application):
+    """Регистрация пути статических файлов в режиме из TEMPLATES_MODE."""
+    if config.TEMPLATES_MODE != "production":
+        app.router.add_static(
+            "/static/", path=config.STATIC_PATH, name="static"
+        )
+        return
+
+    manifest = build_assets(config.STATIC_PATH, config.ASSETS_PATH)
+    app.router.register_resource(
+        AssetsResource(
+            "/static", config.ASSETS_PATH.resolve(), manifest, name="static"
+        )
+    )
+    app[ASSETS_DIGEST_KEY] = hashlib.sha256(
+        repr(sorted(manifest.values())).encode("u8")
+    ).hexdigest()
@@ -0,0 +1,68 @@
+"""Модуль с ограниченным по размеру кэшем в памяти процесса."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Кэш с вытеснением давно неиспользованных записей и временем жизни.
+
+    Каждый воркер хранит свою копию кэша, поэтому время жизни записей
+    ограничивает то, насколько устаревшими могут быть данные в воркере,
+    который не узнал об инвалидации.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """Создание кэша на maxsize записей со временем жизни ttl секунд."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получение значения по ключу, если оно есть и не устарело."""
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранение значения с вытеснением самой старой записи."""
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """Удаление записи по ключу, если она есть."""
+        self._data.pop(key, None)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Перебор копии всех записей кэша, включая устаревшие."""
+        for key, (value, _) in list(self._data.items()):
+            yield key, value
+
+    def clear(self):
+        """Удаление всех записей."""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Есть ли в кэше актуальная запись по ключу."""
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        """Количество записей в кэше, включая устаревшие."""
+        return len(self._data)
@@ -1,7 +1,9 @@
 """Модуль с конфигурационными переменными."""
 
 import base64
+import json
 import os
+import tempfile
 from pathlib import Path
 
 
@@ -18,12 +20,179 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite://db.sqlite3")
 
 TEMPLATES_PATH = Path(__file__).parent / "templates"
 STATIC_PATH = Path(__file__).parent / "static"
+# development - перезагрузка шаблонов при изменении,
+# production - без проверок файлов и с общим кэшем скомпилированных шаблонов
+TEMPLATES_MODE = os.getenv("TEMPLATES_MODE", "development")
+TEMPLATE_STREAM_CHUNK_SIZE = int(
+    os.getenv("TEMPLATE_STREAM_CHUNK_SIZE", 16 * 1024)
+)
+TEMPLATES_CACHE_PATH = Path(
+    os.getenv(
+        "TEMPLATES_CACHE_PATH",
+        Path(tempfile.gettempdir()) / "tasker-templates",
+    )
+)
+# Папка для статических файлов с хэшем в имени в режиме production
+ASSETS_PATH = Path(
+    os.getenv("ASSETS_PATH", Path(tempfile.gettempdir()) / "tasker-assets")
+)
 
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 TOKEN_EXPIRATION = os.getenv("TOKEN_EXPIRATION", 60 * 60 * 24 * 7)
+INVITE_TOKEN_BUCKET = int(os.getenv("INVITE_TOKEN_BUCKET", 60 * 60 * 24))
+INVITE_CACHE_SIZE = int(os.getenv("INVITE_CACHE_SIZE", 4096))
 
 CONFIRMATION_TOKEN_EXPIRATION = os.getenv(
     "CONFIRMATION_TOKEN_EXPIRATION", 60 * 60
 )
 CONFIRMATION_EMAIL_USERNAME = os.getenv("CONFIRMATION_EMAIL_USERNAME")
 CONFIRMATION_EMAIL_PASSWORD = os.getenv("CONFIRMATION_EMAIL_PASSWORD")
+
+SMTP_HOSTNAME = os.getenv("SMTP_HOSTNAME", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 465))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))
+SMTP_NOOP_INTERVAL = int(os.getenv("SMTP_NOOP_INTERVAL", 30))
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", 30))
+
+SESSION_STORAGE = os.getenv("SESSION_STORAGE", "encrypted")
+
+# Имя пути -> [запросов в секунду, запросов подряд] от одного клиента,
+# "default" - для всех остальных путей
+RATE_LIMITS = json.loads(
+    os.getenv(
+        "RATE_LIMITS",
+        json.dumps(
+            {
+                "default": [20, 100],
+                "handle_login": [0.2, 10],
+                "create_token_confirmation": [0.05, 3],
+                "handle_search_courses": [2, 20],
+            }
+        ),
+    )
+)
+RATE_LIMIT_SWEEP_INTERVAL = int(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", 60))
+# Заголовок с IP клиента от обратного прокси, например X-Forwarded-For
+RATE_LIMIT_FORWARDED_HEADER = os.getenv("RATE_LIMIT_FORWARDED_HEADER")
+
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", 2 ** 14))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", 8))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", 1))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+
+COURSE_STUDENTS_CACHE_SIZE = int(os.getenv("COURSE_STUDENTS_CACHE_SIZE", 8192))
+COURSE_STUDENTS_CACHE_TTL = int(os.getenv("COURSE_STUDENTS_CACHE_TTL", 60))
+
+ANCESTRY_CACHE_SIZE = int(os.getenv("ANCESTRY_CACHE_SIZE", 65536))
+
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", 2048))
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", 60))
+PAGE_VERSIONS_TTL = int(os.getenv("PAGE_VERSIONS_TTL", 5))
+PAGE_CACHE_MAX_PAGE_SIZE = int(
+    os.getenv("PAGE_CACHE_MAX_PAGE_SIZE", 256 * 1024)
+)
+
+ORDER_INDEX_ATTEMPTS = int(os.getenv("ORDER_INDEX_ATTEMPTS", 5))
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "memory")
+SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", 300))
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 20))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", 50))
+SEARCH_RESULTS_CACHE_SIZE = int(os.getenv("SEARCH_RESULTS_CACHE_SIZE", 256))
+SEARCH_SIMILARITY_THRESHOLD = float(
+    os.getenv("SEARCH_SIMILARITY_THRESHOLD", 0.3)
+)
+
+WAITING_SOLUTIONS_PAGE_SIZE = int(os.getenv("WAITING_SOLUTIONS_PAGE_SIZE", 50))
+WAITING_SOLUTIONS_MAX_PAGE_SIZE = int(
+    os.getenv("WAITING_SOLUTIONS_MAX_PAGE_SIZE", 200)
+)
+
+INBOX_CACHE_SIZE = int(os.getenv("INBOX_CACHE_SIZE", 1024))
+INBOX_CACHE_TTL = int(os.getenv("INBOX_CACHE_TTL", 30))
+INBOX_OLDEST_SOLUTIONS_COUNT = int(
+    os.getenv("INBOX_OLDEST_SOLUTIONS_COUNT", 10)
+)
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 64))
+EVENTS_PING_INTERVAL = int(os.getenv("EVENTS_PING_INTERVAL", 15))
+
+MARK_SOLUTIONS_MAX_COUNT = int(os.getenv("MARK_SOLUTIONS_MAX_COUNT", 500))
+
+SOLUTION_BLOB_CACHE_SIZE = int(os.getenv("SOLUTION_BLOB_CACHE_SIZE", 256))
+
+SOLUTION_SNAPSHOT_INTERVAL = int(os.getenv("SOLUTION_SNAPSHOT_INTERVAL", 10))
+
+# Автоматическая проверка решений по умолчанию отключена
+GRADER_POOL_SIZE = int(os.getenv("GRADER_POOL_SIZE", 0))
+GRADER_QUEUE_SIZE = int(os.getenv("GRADER_QUEUE_SIZE", 100))
+GRADER_CPU_SECONDS = int(os.getenv("GRADER_CPU_SECONDS", 2))
+GRADER_MEMORY_MB = int(os.getenv("GRADER_MEMORY_MB", 256))
+GRADER_WALL_SECONDS = float(os.getenv("GRADER_WALL_SECONDS", 5))
+GRADER_OUTPUT_BYTES = int(os.getenv("GRADER_OUTPUT_BYTES", 1024 * 1024))
+# Расширение файла решения -> команда запуска, {file} заменяется на файл
+GRADER_RUNNERS = json.loads(
+    os.getenv(
+        "GRADER_RUNNERS", json.dumps({"py": ["python3", "-I", "-S", "{file}"]})
+    )
+)
+# Команда песочницы, перед которой запускается решение,
+# {dir} заменяется на папку запуска, пустой список - без песочницы
+GRADER_SANDBOX = json.loads(
+    os.getenv(
+        "GRADER_SANDBOX",
+        json.dumps(
+            [
+                "bwrap",
+                "--unshare-all",
+                "--die-with-parent",
+                "--new-session",
+                "--uid",
+                "65534",
+                "--gid",
+                "65534",
+                "--ro-bind",
+                "/usr",
+                "/usr",
+                "--symlink",
+                "usr/bin",
+                "/bin",
+                "--symlink",
+                "usr/lib",
+                "/lib",
+                "--symlink",
+                "usr/lib64",
+                "/lib64",
+                "--proc",
+                "/proc",
+                "--dev",
+                "/dev",
+                "--tmpfs",
+                "/tmp",
+                "--bind",
+                "{dir}",
+                "{dir}",
+                "--chdir",
+                "{dir}",
+                "--",
+            ]
+        ),
+    )
+)
+
+# Очередь фоновых заданий -> сколько заданий из неё выполняется одновременно
+JOB_QUEUES = json.loads(
+    os.getenv("JOB_QUEUES", json.dumps({"email": 4, "default": 2}))
+)
+JOB_WORKER_IN_APP = os.getenv("JOB_WORKER_IN_APP", "true").lower() == "true"
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", 10))
+JOB_RETRY_MAX_DELAY = int(os.getenv("JOB_RETRY_MAX_DELAY", 60 * 60))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 5 * 60))
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", 10))
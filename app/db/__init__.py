@@ -1,9 +1,84 @@
 """Пакет с функцией установки соединения к БД."""
 
+from typing import List, Optional, Sequence, Set, Tuple, Type
+
 from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
 from tortoise.contrib.aiohttp import register_tortoise
+from tortoise.exceptions import IntegrityError
+from tortoise.functions import Max
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
 
 from app import config
+from app.db.models.task_solution import TaskSolutionStatus
+from app.logger import logger
+
+
+# Столбцы, добавленные в модели после создания их таблиц: tortoise
+# создаёт только недостающие таблицы, поэтому в уже существующие
+# таблицы столбцы добавляются при запуске. После добавления счётчиков
+# их нужно пересчитать командой `python rebuild_counters.py`
+COLUMNS = (
+    ("course", "students_count", "INT NOT NULL DEFAULT 0"),
+    ("course", "invite_version", "INT NOT NULL DEFAULT 0"),
+    ("course", "pages_version", "INT NOT NULL DEFAULT 0"),
+    ("lesson", "tasks_count", "INT NOT NULL DEFAULT 0"),
+    ("tasksolution", "revisions_count", "INT NOT NULL DEFAULT 0"),
+    ("tasksolution", "lesson_id", "INT NOT NULL DEFAULT 0"),
+    ("tasksolution", "course_id", "INT NOT NULL DEFAULT 0"),
+    ("user", "pages_version", "INT NOT NULL DEFAULT 0"),
+)
+
+# Заполнение добавленных при запуске столбцов, которые не счётчики
+COLUMNS_BACKFILLS = {
+    ("tasksolution", "lesson_id"): (
+        'UPDATE "tasksolution" SET "lesson_id" = ('
+        'SELECT "task"."lesson_id" FROM "task" '
+        'WHERE "task"."id" = "tasksolution"."task_id")'
+    ),
+    ("tasksolution", "course_id"): (
+        'UPDATE "tasksolution" SET "course_id" = ('
+        'SELECT "lesson"."course_id" FROM "task" '
+        'JOIN "lesson" ON "lesson"."id" = "task"."lesson_id" '
+        'WHERE "task"."id" = "tasksolution"."task_id")'
+    ),
+}
+
+# Индексы, которые tortoise не создаёт сам (например, для M2M таблиц)
+INDEXES = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS "uidx_course_user" '
+    'ON "course_user" ("course_id", "user_id")',
+    # Частичные индексы только по ожидающим проверки решениям, по одному
+    # на каждый порядок очереди курса: страница очереди читает из индекса
+    # только свои строки уже в нужном порядке
+    'DROP INDEX IF EXISTS "idx_tasksolution_waiting"',
+    *(
+        f'CREATE INDEX IF NOT EXISTS "idx_tasksolution_waiting_{name}" '
+        f'ON "tasksolution" ("course_id", {columns}"timestamp", "id") '
+        f'WHERE "status" = {TaskSolutionStatus.WAITING.value}'
+        for name, columns in (
+            ("timestamp", ""),
+            ("student", '"student_id", '),
+            ("lesson", '"lesson_id", '),
+        )
+    ),
+    # Уникальность порядковых номеров уроков и задач для таблиц,
+    # созданных до появления unique_together. Повторяющиеся номера,
+    # которые могли появиться раньше, переносятся в конец курса/урока
+    *(
+        f'UPDATE "{table}" SET "order_index" = ('
+        f'SELECT MAX("order_index") FROM "{table}" AS "other" '
+        f'WHERE "other"."{parent}" = "{table}"."{parent}") + "id" '
+        f'WHERE EXISTS (SELECT 1 FROM "{table}" AS "other" '
+        f'WHERE "other"."{parent}" = "{table}"."{parent}" '
+        f'AND "other"."order_index" = "{table}"."order_index" '
+        f'AND "other"."id" < "{table}"."id"); '
+        f'CREATE UNIQUE INDEX IF NOT EXISTS "uidx_{table}_order_index" '
+        f'ON "{table}" ("{parent}", "order_index")'
+        for table, parent in (("lesson", "course_id"), ("task", "lesson_id"))
+    ),
+)
 
 
 def setup_db(app):
@@ -14,6 +89,121 @@ def setup_db(app):
         modules={"models": ["app.db.models"]},
         generate_schemas=True,
     )
+    app.on_startup.append(_on_startup_migrate_schema)
+
+
+async def _on_startup_migrate_schema(app):
+    """Создание недостающих столбцов и индексов после создания схемы."""
+    await add_missing_columns()
+    await create_indexes()
+
+
+async def add_missing_columns() -> List[Tuple[str, str]]:
+    """Добавление недостающих столбцов в существующие таблицы.
+
+    Возвращает добавленные столбцы в виде (таблица, столбец).
+    """
+    connection = Tortoise.get_connection("default")
+    added_columns = []
+    for table, column, definition in COLUMNS:
+        if column in await get_table_columns(connection, table):
+            continue
+
+        await connection.execute_script(
+            f'ALTER TABLE "{table}" ADD COLUMN "{column}" {definition}'
+        )
+        backfill = COLUMNS_BACKFILLS.get((table, column))
+        if backfill is not None:
+            await connection.execute_script(backfill)
+        added_columns.append((table, column))
+        logger.warning(f"В таблицу {table} добавлен столбец {column}")
+
+    return added_columns
+
+
+async def get_table_columns(
+    connection: BaseDBAsyncClient, table: str
+) -> Set[str]:
+    """Названия столбцов таблицы."""
+    if connection.capabilities.dialect == "postgres":
+        _, rows = await execute_query(
+            "SELECT column_name AS name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = ?",
+            table,
+            using_db=connection,
+        )
+    else:
+        _, rows = await execute_query(
+            f'PRAGMA table_info("{table}")', using_db=connection
+        )
+
+    return {row["name"] for row in rows}
+
+
+async def create_indexes():
+    """Создание недостающих индексов."""
+    connection = Tortoise.get_connection("default")
+    for index in INDEXES:
+        await connection.execute_script(index)
+
+
+async def execute_query(
+    query: str,
+    *values,
+    using_db: Optional[BaseDBAsyncClient] = None,
+) -> Tuple[int, Sequence[dict]]:
+    """Выполнение сырого SQL-запроса.
+
+    Параметры в запросе обозначаются через "?" и заменяются
+    на "$1", "$2", ... для PostgreSQL.
+    Возвращается количество затронутых строк и полученные строки.
+    """
+    connection = using_db or Tortoise.get_connection("default")
+    if connection.capabilities.dialect == "postgres":
+        query = _to_numbered_params(query)
+
+    return await connection.execute_query(query, list(values))
+
+
+def _to_numbered_params(query: str) -> str:
+    """Замена параметров "?" на пронумерованные "$1", "$2", ..."""
+    parts = query.split("?")
+    numbered_query = parts[0]
+    for number, part in enumerate(parts[1:], start=1):
+        numbered_query += f"${number}{part}"
+
+    return numbered_query
+
+
+async def create_with_order_index(
+    model: Type[Model], parent_field: str, parent: Model, **fields
+) -> Model:
+    """Создание записи с порядковым номером MAX(order_index) + 1.
+
+    Номер вычисляется и запись создаётся в одной транзакции.
+    Уникальность (parent, order_index) гарантируется ограничением в БД,
+    поэтому при одновременном создании записей проигравшая
+    транзакция повторяется с новым номером.
+    """
+    for attempt in range(config.ORDER_INDEX_ATTEMPTS):
+        try:
+            async with in_transaction() as connection:
+                (max_index,) = await (
+                    model.filter(**{parent_field: parent})
+                    .using_db(connection)
+                    .annotate(max_index=Max("order_index"))
+                    .values_list("max_index", flat=True)
+                )
+                order_index = 0 if max_index is None else max_index + 1
+                return await model.create(
+                    **fields,
+                    **{parent_field: parent},
+                    order_index=order_index,
+                    using_db=connection,
+                )
+        except IntegrityError:
+            if attempt == config.ORDER_INDEX_ATTEMPTS - 1:
+                raise
 
 
 async def init_test_db():
@@ -22,6 +212,8 @@ async def init_test_db():
         db_url="sqlite://:memory:", modules={"models": ["app.db.models"]}
     )
     await Tortoise.generate_schemas()
+    await add_missing_columns()
+    await create_indexes()
 
 
 async def close_test_db():
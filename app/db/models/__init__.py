@@ -5,17 +5,27 @@
 """
 
 from app.db.models.course import Course
+from app.db.models.job import Job
 from app.db.models.lesson import Lesson
+from app.db.models.lesson_progress import LessonProgress
+from app.db.models.solution_blob import SolutionBlob
+from app.db.models.solution_revision import SolutionRevision
 from app.db.models.task import Task
 from app.db.models.task_solution import TaskSolution
+from app.db.models.task_test_case import TaskTestCase
 from app.db.models.user import User, AnonimousUser
 
 
 __all__ = (
     Course,
+    Job,
     Lesson,
+    LessonProgress,
+    SolutionBlob,
+    SolutionRevision,
     Task,
     TaskSolution,
+    TaskTestCase,
     User,
     AnonimousUser,
 )
@@ -11,6 +11,11 @@ class Course(Model):
     title = fields.CharField(max_length=64)
     description = fields.CharField(max_length=128)
     is_private = fields.BooleanField()
+    students_count = fields.IntField(default=0)
+    # Увеличивается при отзыве пригласительных токенов курса
+    invite_version = fields.IntField(default=0)
+    # Увеличивается при изменении уроков и задач курса
+    pages_version = fields.IntField(default=0)
 
     students = fields.ManyToManyField(
         "models.User", related_name="studied_courses"
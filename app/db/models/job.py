@@ -0,0 +1,43 @@
+"""Модуль с моделью фонового задания."""
+
+from enum import IntEnum
+
+from tortoise.models import Model
+from tortoise import fields
+
+
+class JobStatus(IntEnum):
+    """Статус задания - ожидает, выполняется, не выполнено за все попытки."""
+
+    PENDING = 1
+    RUNNING = 2
+    FAILED = 3
+
+
+class Job(Model):
+    """Модель фонового задания.
+
+    Выполненные задания удаляются, а задания, не выполненные
+    за max_attempts попыток, остаются со статусом FAILED.
+    """
+
+    queue = fields.CharField(max_length=32)
+    name = fields.CharField(max_length=64)
+    payload = fields.JSONField()
+    status = fields.IntEnumField(JobStatus, default=JobStatus.PENDING)
+    attempts = fields.IntField(default=0)
+    max_attempts = fields.IntField()
+    # Время, начиная с которого задание можно выполнять
+    run_at = fields.DatetimeField()
+    # Время, после которого выполняемое задание считается брошенным
+    locked_until = fields.DatetimeField(null=True)
+    last_error = fields.TextField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        """Мета-параметры модели.
+
+        Индекс для выборки готовых к выполнению заданий очереди.
+        """
+
+        indexes = (("queue", "status", "run_at"),)
@@ -10,7 +10,16 @@ class Lesson(Model):
     id = fields.IntField(pk=True)
     title = fields.CharField(max_length=64)
     order_index = fields.IntField()
+    tasks_count = fields.IntField(default=0)
 
     course = fields.ForeignKeyField("models.Course", related_name="lessons")
 
     tasks: fields.ReverseRelation["Task"]  # noqa: F821
+
+    class Meta:
+        """Мета-параметры модели.
+
+        Условие на то, что порядковые номера уроков курса не повторяются.
+        """
+
+        unique_together = ("course", "order_index")
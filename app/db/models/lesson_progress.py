@@ -0,0 +1,30 @@
+"""Модуль с моделью прогресса ученика по уроку."""
+
+from tortoise.models import Model
+from tortoise import fields
+
+
+class LessonProgress(Model):
+    """Модель прогресса ученика по уроку.
+
+    Хранит количество засчитанных и ожидающих проверки решений ученика
+    в уроке, чтобы страница курса не пересчитывала их при каждом просмотре.
+    """
+
+    id = fields.IntField(pk=True)
+    correct_count = fields.IntField(default=0)
+    waiting_count = fields.IntField(default=0)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    student = fields.ForeignKeyField(
+        "models.User", related_name="lessons_progress"
+    )
+    lesson = fields.ForeignKeyField("models.Lesson", related_name="progress")
+
+    class Meta:
+        """Мета-параметры модели.
+
+        Условие на то, что у ученика одна запись прогресса на урок.
+        """
+
+        unique_together = ("student", "lesson")
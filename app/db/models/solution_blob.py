@@ -0,0 +1,16 @@
+"""Модуль с моделью содержимого решения."""
+
+from tortoise.models import Model
+from tortoise import fields
+
+
+class SolutionBlob(Model):
+    """Модель сжатого содержимого решения.
+
+    Запись адресуется SHA-256 от содержимого, поэтому одинаковые
+    решения хранятся один раз, а сама запись никогда не меняется.
+    """
+
+    hash = fields.CharField(pk=True, max_length=64)
+    data = fields.BinaryField()
+    size = fields.IntField()
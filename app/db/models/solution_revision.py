@@ -0,0 +1,34 @@
+"""Модуль с моделью версии решения задачи."""
+
+from tortoise.models import Model
+from tortoise import fields
+
+
+class SolutionRevision(Model):
+    """Модель версии решения задачи.
+
+    Версии только добавляются. Версия хранит либо всё содержимое
+    решения (снимок), либо изменения относительно предыдущей версии,
+    в обоих случаях сжатые.
+    """
+
+    id = fields.IntField(pk=True)
+    number = fields.IntField()
+    is_snapshot = fields.BooleanField()
+    data = fields.BinaryField()
+    content_hash = fields.CharField(max_length=64)
+    content_size = fields.IntField()
+    extension = fields.CharField(max_length=8)
+    timestamp = fields.DatetimeField(auto_now_add=True)
+
+    solution = fields.ForeignKeyField(
+        "models.TaskSolution", related_name="revisions"
+    )
+
+    class Meta:
+        """Мета-параметры модели.
+
+        Условие на то, что номера версий решения не повторяются.
+        """
+
+        unique_together = ("solution", "number")
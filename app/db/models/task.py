@@ -16,3 +16,12 @@ class Task(Model):
     lesson = fields.ForeignKeyField("models.Lesson", related_name="tasks")
 
     solutions: fields.ReverseRelation["models.TaskSolution"]  # noqa: F821
+    test_cases: fields.ReverseRelation["models.TaskTestCase"]  # noqa: F821
+
+    class Meta:
+        """Мета-параметры модели.
+
+        Условие на то, что порядковые номера задач урока не повторяются.
+        """
+
+        unique_together = ("lesson", "order_index")
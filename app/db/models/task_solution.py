@@ -30,7 +30,10 @@ class TaskSolutionStatus(IntEnum):
 class TaskSolution(Model):
     """Модель решения задачи."""
 
-    content = fields.TextField()
+    # SHA-256 и размер содержимого, которое хранится в SolutionBlob
+    content_hash = fields.CharField(max_length=64, index=True)
+    content_size = fields.IntField()
+    revisions_count = fields.IntField(default=0)
     extension = fields.CharField(max_length=8)
     status = fields.IntEnumField(
         TaskSolutionStatus,
@@ -40,6 +43,12 @@ class TaskSolution(Model):
 
     student = fields.ForeignKeyField("models.User", related_name="solutions")
     task = fields.ForeignKeyField("models.Task", related_name="solutions")
+    # Копии урока и курса задачи для индексов очереди ожидающих решений
+    # (задачи не переносятся между уроками, поэтому копии не устаревают)
+    lesson_id = fields.IntField()
+    course_id = fields.IntField()
+
+    revisions: fields.ReverseRelation["SolutionRevision"]  # noqa: F821
 
     class Meta:
         """Мета-параметры модели.
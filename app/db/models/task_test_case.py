@@ -0,0 +1,14 @@
+"""Модуль с моделью теста задачи."""
+
+from tortoise.models import Model
+from tortoise import fields
+
+
+class TaskTestCase(Model):
+    """Модель теста задачи: данные на вход и ожидаемый вывод."""
+
+    id = fields.IntField(pk=True)
+    input = fields.TextField()
+    expected_output = fields.TextField()
+
+    task = fields.ForeignKeyField("models.Task", related_name="test_cases")
@@ -3,13 +3,14 @@
 Есть модель для зарегестрированного на сайте пользоваля, и анонимного.
 """
 
-import hashlib
 from enum import IntEnum
 from typing import Optional
 
 from tortoise.models import Model
 from tortoise import fields
 
+from app.passwords import password_hasher
+
 
 class UserRole(IntEnum):
     """Тип пользователя - ученик или учитель."""
@@ -45,6 +46,8 @@ class User(Model):
     username = fields.CharField(max_length=32)
     password_hash = fields.CharField(max_length=128)
     role = fields.IntEnumField(UserRole, default=UserRole.STUDENT)
+    # Увеличивается при изменении решений и подписок пользователя
+    pages_version = fields.IntField(default=0)
 
     studied_courses: fields.ManyToManyRelation["Course"]  # noqa: F821
     taught_courses: fields.ReverseRelation["Course"]  # noqa: F821
@@ -75,25 +78,18 @@ class User(Model):
         """
         return self.role.get_role_name()
 
-    def set_password(self, password: str):
+    async def set_password(self, password: str):
         """Установка пароля пользователю."""
-        password_hash = _make_password_hash(password)
-        self.password_hash = password_hash
+        self.password_hash = await password_hasher.hash(password)
 
     def set_role(self, role: str):
         """Установка роли пользователю."""
         role = UserRole.get_by_role_name(role)
         self.role = role
 
-    def check_password(self, password: str) -> bool:
+    async def check_password(self, password: str) -> bool:
         """Проверка на совпадение пароля."""
-        password_hash = _make_password_hash(password)
-        return self.password_hash == password_hash
-
-
-def _make_password_hash(password: str) -> str:
-    """Создание хэша для пароля пользователя."""
-    return hashlib.sha256(password.encode("u8")).hexdigest()
+        return await password_hasher.verify(password, self.password_hash)
 
 
 class AnonimousUser:
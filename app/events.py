@@ -0,0 +1,158 @@
+"""Модуль с брокером событий внутри процесса.
+
+Сервисы публикуют события (например, об отправке или оценке решения)
+в темы, а открытые соединения пользователей подписываются на свои темы
+и получают события через SSE, вместо того чтобы перезагружать страницы.
+
+У каждой подписки своя очередь ограниченного размера. Если подписчик
+не успевает забирать события и очередь переполнилась, подписка
+закрывается, а клиент переподключается и заново загружает страницу.
+
+Брокер работает в пределах одного процесса, поэтому подписчик получает
+только события, опубликованные в том же процессе.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Optional, Set
+
+from app import config
+
+
+class Event(NamedTuple):
+    """Модель события."""
+
+    type: str
+    data: dict
+
+
+class Subscription:
+    """Подписка на события из нескольких тем."""
+
+    def __init__(self, broker: "EventBroker", topics: Iterable[str]):
+        """Создание подписки с очередью ограниченного размера."""
+        self.topics = tuple(topics)
+        self.is_closed = False
+        self._broker = broker
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=config.EVENTS_QUEUE_SIZE
+        )
+
+    def __enter__(self) -> "Subscription":
+        """Подписка остаётся активной внутри блока with."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Отписка при выходе из блока with."""
+        self.close()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Получение следующего события.
+
+        Возвращает None, если подписка закрыта
+        или за timeout секунд не пришло ни одного события.
+        """
+        if self.is_closed and self._queue.empty():
+            return None
+
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def put(self, event: Event) -> bool:
+        """Добавление события в очередь.
+
+        Возвращает False, если очередь переполнена.
+        """
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+
+        return True
+
+    def close(self):
+        """Закрытие подписки.
+
+        Непрочитанные события отбрасываются, а ожидающий
+        получатель события сразу получает None.
+        """
+        if self.is_closed:
+            return
+
+        self.is_closed = True
+        self._broker.unsubscribe(self)
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+
+class EventBroker:
+    """Брокер событий, публикуемых в темы."""
+
+    def __init__(self):
+        """Создание брокера без подписок."""
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Подписка на события из данных тем."""
+        subscription = Subscription(self, topics)
+        for topic in subscription.topics:
+            self._subscriptions[topic].add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Отписка от всех тем подписки."""
+        for topic in subscription.topics:
+            subscriptions = self._subscriptions.get(topic)
+            if subscriptions is None:
+                continue
+
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[topic]
+
+    def publish(self, topic: str, event_type: str, **data):
+        """Публикация события в тему.
+
+        Подписки, которые не успевают забирать события, закрываются.
+        """
+        event = Event(event_type, data)
+        for subscription in tuple(self._subscriptions.get(topic, ())):
+            if not subscription.put(event):
+                subscription.close()
+
+    def close_all(self):
+        """Закрытие всех подписок, например, при остановке сервера."""
+        subscriptions = set().union(*self._subscriptions.values())
+        for subscription in subscriptions:
+            subscription.close()
+
+    def subscribers_count(self, topic: str) -> int:
+        """Количество подписок на тему."""
+        return len(self._subscriptions.get(topic, ()))
+
+
+broker = EventBroker()
+
+
+def setup_events(app):
+    """Закрытие подписок при остановке приложения."""
+    app.on_shutdown.append(_on_shutdown_close_subscriptions)
+
+
+async def _on_shutdown_close_subscriptions(app):
+    """Закрытие всех подписок, чтобы завершились SSE-соединения."""
+    broker.close_all()
+
+
+def teacher_topic(teacher_id: int) -> str:
+    """Тема событий очереди решений учителя."""
+    return f"teacher:{teacher_id}"
+
+
+def student_topic(student_id: int) -> str:
+    """Тема событий решений ученика."""
+    return f"student:{student_id}"
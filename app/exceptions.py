@@ -39,3 +39,27 @@ class SolutionDoesNotExist(Exception):
 
 class InvalidRegisterToken(Exception):
     """Неправильный токен регистрации."""
+
+
+class InvalidSearchCursor(Exception):
+    """Неверный курсор страницы результатов поиска."""
+
+
+class InvalidWaitingSolutionsQuery(Exception):
+    """Неверный порядок или курсор страницы ожидающих решений."""
+
+
+class InvalidSolutionMarks(Exception):
+    """Неверный формат или количество оценок решений."""
+
+
+class SolutionRevisionDoesNotExist(Exception):
+    """Версии решения с данным номером не существует."""
+
+
+class InvalidTestCase(Exception):
+    """Неверный формат теста задачи."""
+
+
+class PasswordHasherBusy(Exception):
+    """Очередь хэширования паролей заполнена."""
@@ -0,0 +1,230 @@
+"""Модуль с песочницей и пулом для запуска решений задач.
+
+Каждый запуск выполняется командой из GRADER_SANDBOX (по умолчанию
+bubblewrap): от имени непривилегированного пользователя в отдельных
+пространствах имён пользователей, процессов, сети и точек монтирования,
+где видны только /usr и временная папка запуска. Поэтому решение
+не может прочитать БД, окружение приложения (/proc/<pid>/environ),
+обратиться к сети или завершить процесс приложения. Внутри песочницы
+prlimit ограничивает процессорное время, память, размер файлов
+и количество открытых файлов, а окружение состоит только из PATH
+и LANG. По истечении времени ожидания вся группа процессов запуска
+завершается.
+
+Пул запускает не больше заданного количества проверок одновременно,
+а очередь ожидающих проверок ограничена.
+"""
+
+import asyncio
+import os
+import shutil
+import signal
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+
+from app import config
+from app.logger import logger
+
+
+class SandboxLimits(NamedTuple):
+    """Модель ограничений одного запуска."""
+
+    cpu_seconds: int = config.GRADER_CPU_SECONDS
+    memory_bytes: int = config.GRADER_MEMORY_MB * 1024 * 1024
+    wall_seconds: float = config.GRADER_WALL_SECONDS
+    output_bytes: int = config.GRADER_OUTPUT_BYTES
+    open_files: int = 64
+
+
+class RunResult(NamedTuple):
+    """Модель результата запуска."""
+
+    returncode: Optional[int]
+    stdout: bytes
+    timed_out: bool = False
+    output_exceeded: bool = False
+
+    @property
+    def is_ok(self) -> bool:
+        """Завершился ли запуск успешно и в пределах ограничений."""
+        return (
+            self.returncode == 0
+            and not self.timed_out
+            and not self.output_exceeded
+        )
+
+
+async def run_in_sandbox(
+    command: List[str],
+    stdin: bytes,
+    cwd: str,
+    limits: Optional[SandboxLimits] = None,
+) -> RunResult:
+    """Запуск команды с ограничениями и данными на вход."""
+    limits = limits or SandboxLimits()
+    # ограничения ставит prlimit перед запуском команды, а не preexec_fn,
+    # который небезопасно вызывать в процессе с потоками
+    process = await asyncio.create_subprocess_exec(
+        *make_sandbox_command(command, cwd, limits),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        cwd=cwd,
+        env={"PATH": "/usr/local/bin:/usr/bin:/bin", "LANG": "C.UTF-8"},
+        start_new_session=True,
+    )
+
+    try:
+        _, stdout = await asyncio.wait_for(
+            asyncio.gather(
+                _write_stdin(process, stdin),
+                _read_limited(process.stdout, limits.output_bytes),
+            ),
+            timeout=limits.wall_seconds,
+        )
+    except asyncio.TimeoutError:
+        _kill_process_group(process)
+        await process.wait()
+        return RunResult(None, b"", timed_out=True)
+
+    if len(stdout) > limits.output_bytes:
+        _kill_process_group(process)
+        await process.wait()
+        return RunResult(None, b"", output_exceeded=True)
+
+    try:
+        returncode = await asyncio.wait_for(
+            process.wait(), timeout=limits.wall_seconds
+        )
+    except asyncio.TimeoutError:
+        _kill_process_group(process)
+        await process.wait()
+        return RunResult(None, b"", timed_out=True)
+
+    return RunResult(returncode, stdout)
+
+
+def make_sandbox_command(
+    command: List[str], cwd: str, limits: SandboxLimits
+) -> List[str]:
+    """Команда запуска в песочнице с ограничениями.
+
+    {dir} в GRADER_SANDBOX заменяется на папку запуска.
+    """
+    sandbox_command = [
+        part.replace("{dir}", cwd) for part in config.GRADER_SANDBOX
+    ]
+    limits_command = [
+        "prlimit",
+        f"--cpu={limits.cpu_seconds}",
+        f"--as={limits.memory_bytes}",
+        f"--fsize={limits.output_bytes}",
+        f"--nofile={limits.open_files}",
+        "--core=0",
+        "--",
+    ]
+    return [*sandbox_command, *limits_command, *command]
+
+
+def is_sandbox_available() -> bool:
+    """Установлены ли программы песочницы."""
+    programs = ["prlimit"]
+    if config.GRADER_SANDBOX:
+        programs.append(config.GRADER_SANDBOX[0])
+
+    return all(shutil.which(program) for program in programs)
+
+
+async def _write_stdin(process: asyncio.subprocess.Process, stdin: bytes):
+    """Передача данных на вход и закрытие входа."""
+    try:
+        process.stdin.write(stdin)
+        await process.stdin.drain()
+        process.stdin.close()
+    except (BrokenPipeError, ConnectionResetError):
+        # программа завершилась, не прочитав вход
+        pass
+
+
+async def _read_limited(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Чтение вывода, но не больше limit + 1 байт."""
+    chunks = []
+    size = 0
+    while size <= limit:
+        chunk = await stream.read(limit + 1 - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+
+    return b"".join(chunks)
+
+
+def _kill_process_group(process: asyncio.subprocess.Process):
+    """Завершение процесса запуска вместе с его дочерними процессами."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+Job = Callable[..., Awaitable[None]]
+
+
+class GraderPool:
+    """Пул обработчиков очереди проверок."""
+
+    def __init__(self, job: Job):
+        """Создание пула, который для каждой проверки вызывает job."""
+        self._job = job
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        """Запущены ли обработчики."""
+        return bool(self._workers)
+
+    def start(self, size: int = config.GRADER_POOL_SIZE):
+        """Запуск обработчиков очереди."""
+        self._queue = asyncio.Queue(maxsize=config.GRADER_QUEUE_SIZE)
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(size)
+        ]
+
+    async def stop(self):
+        """Остановка обработчиков, непроверенные решения остаются в БД."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, *args) -> bool:
+        """Добавление проверки в очередь.
+
+        Возвращает False, если пул не запущен или очередь заполнена.
+        """
+        if not self.is_running:
+            return False
+
+        try:
+            self._queue.put_nowait(args)
+        except asyncio.QueueFull:
+            return False
+
+        return True
+
+    async def join(self):
+        """Ожидание окончания всех проверок из очереди."""
+        await self._queue.join()
+
+    async def _work(self):
+        """Обработка проверок из очереди по одной."""
+        while True:
+            args = await self._queue.get()
+            try:
+                await self._job(*args)
+            except Exception:
+                logger.exception("Не удалось проверить решение")
+            finally:
+                self._queue.task_done()
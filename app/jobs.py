@@ -0,0 +1,273 @@
+"""Модуль с очередью фоновых заданий, которые хранятся в БД.
+
+Хэндлеры не ждут медленную работу (например, отправку письма),
+а добавляют задание и сразу отвечают. Задания хранятся в БД, поэтому
+переживают перезапуск сервера, а выполняет их обработчик внутри
+приложения или отдельный процесс (run_jobs.py).
+
+Обработчик забирает задание условным UPDATE, поэтому одно задание
+не выполняется двумя обработчиками одновременно. Задание, которое
+не удалось выполнить, повторяется с экспоненциально растущей задержкой,
+а после JOB_MAX_ATTEMPTS попыток остаётся в БД со статусом FAILED.
+Задание, обработчик которого упал во время выполнения, повторяется
+через JOB_LEASE_SECONDS секунд.
+"""
+
+import asyncio
+import datetime as dt
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Set
+
+from tortoise import timezone
+from tortoise.expressions import F
+from tortoise.query_utils import Q
+
+from app import config
+from app.db.models import Job
+from app.db.models.job import JobStatus
+from app.logger import logger
+
+
+JobFunction = Callable[..., Awaitable[None]]
+
+
+class JobHandler(NamedTuple):
+    """Модель функции, которая выполняет задания с данным именем."""
+
+    function: JobFunction
+    queue: str
+
+
+job_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(name: str, queue: str = "default"):
+    """Регистрация функции для выполнения заданий с данным именем.
+
+    Функция вызывается с данными задания в виде именованных аргументов.
+    """
+
+    def register(function: JobFunction) -> JobFunction:
+        job_handlers[name] = JobHandler(function, queue)
+        return function
+
+    return register
+
+
+async def enqueue_job(
+    name: str, payload: dict, delay: int = 0, using_db=None
+) -> Job:
+    """Добавление задания в очередь его функции."""
+    job = await Job.create(
+        queue=job_handlers[name].queue,
+        name=name,
+        payload=payload,
+        max_attempts=config.JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + dt.timedelta(seconds=delay),
+        using_db=using_db,
+    )
+    worker.wake()
+    return job
+
+
+def _ready_jobs_filter(now: dt.datetime) -> Q:
+    """Условие на задания, которые можно забрать на выполнение."""
+    return Q(status=JobStatus.PENDING, run_at__lte=now) | Q(
+        status=JobStatus.RUNNING, locked_until__lt=now
+    )
+
+
+def _retry_delay(attempts: int) -> int:
+    """Задержка перед следующей попыткой выполнить задание."""
+    delay = config.JOB_RETRY_DELAY * 2 ** (attempts - 1)
+    return min(delay, config.JOB_RETRY_MAX_DELAY)
+
+
+class JobWorker:
+    """Обработчик заданий с ограничением одновременных заданий в очереди."""
+
+    def __init__(self, concurrency: Dict[str, int]):
+        """Создание обработчика.
+
+        concurrency - сколько заданий каждой очереди выполнять одновременно,
+        для очередей не из словаря - по одному.
+        """
+        self._concurrency = concurrency
+        self._running: Dict[str, Set[asyncio.Task]] = {}
+        # Событие создаётся в цикле обработки, чтобы в Python 3.9
+        # оно было привязано к работающему event loop, а не к текущему
+        # при импорте модуля
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Запущен ли цикл обработки."""
+        return self._loop_task is not None
+
+    def start(self):
+        """Запуск цикла обработки в фоне."""
+        self._loop_task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Остановка цикла обработки.
+
+        Выполняемым заданиям даётся JOB_SHUTDOWN_TIMEOUT секунд,
+        недоделанные задания повторятся после истечения блокировки.
+        """
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+
+        tasks = set().union(*self._running.values())
+        if tasks:
+            _, pending = await asyncio.wait(
+                tasks, timeout=config.JOB_SHUTDOWN_TIMEOUT
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def wake(self):
+        """Проверка очередей без ожидания JOB_POLL_INTERVAL."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self):
+        """Цикл обработки заданий."""
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Не удалось получить задания из очереди")
+
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=config.JOB_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """Запуск готовых заданий на свободные места в очередях.
+
+        Возвращает количество запущенных заданий.
+        """
+        queues = set(self._concurrency) | {
+            handler.queue for handler in job_handlers.values()
+        }
+        started_count = 0
+        for queue in sorted(queues):
+            running = self._running.setdefault(queue, set())
+            free_count = self._concurrency.get(queue, 1) - len(running)
+            if free_count <= 0:
+                continue
+
+            for job_id, lease_until in await self._claim_jobs(
+                queue, free_count
+            ):
+                task = asyncio.create_task(self._run_job(job_id, lease_until))
+                running.add(task)
+                task.add_done_callback(self._on_job_done(running))
+                started_count += 1
+
+        return started_count
+
+    async def join(self):
+        """Ожидание окончания выполняемых заданий."""
+        tasks = set().union(*self._running.values())
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _on_job_done(self, running: Set[asyncio.Task]):
+        """Освобождение места в очереди после выполнения задания."""
+
+        def callback(task: asyncio.Task):
+            running.discard(task)
+            self.wake()
+
+        return callback
+
+    async def _claim_jobs(self, queue: str, limit: int) -> list:
+        """Получение до limit готовых заданий очереди на выполнение."""
+        now = timezone.now()
+        jobs_ids = await (
+            Job.filter(_ready_jobs_filter(now), queue=queue)
+            .order_by("run_at", "id")
+            .limit(limit)
+            .values_list("id", flat=True)
+        )
+
+        claimed_jobs = []
+        lease_until = now + dt.timedelta(seconds=config.JOB_LEASE_SECONDS)
+        for job_id in jobs_ids:
+            # задание уже могли забрать в другом процессе
+            is_claimed = await Job.filter(
+                _ready_jobs_filter(now), id=job_id
+            ).update(
+                status=JobStatus.RUNNING,
+                locked_until=lease_until,
+                attempts=F("attempts") + 1,
+            )
+            if is_claimed:
+                claimed_jobs.append((job_id, lease_until))
+
+        return claimed_jobs
+
+    async def _run_job(self, job_id: int, lease_until: dt.datetime):
+        """Выполнение задания и сохранение его результата."""
+        job = await Job.get(id=job_id)
+        handler = job_handlers.get(job.name)
+        try:
+            if handler is None:
+                raise LookupError(f"Неизвестное задание {job.name}")
+
+            await asyncio.wait_for(
+                handler.function(**job.payload),
+                timeout=config.JOB_LEASE_SECONDS,
+            )
+        except Exception as error:
+            logger.exception(f"Не удалось выполнить задание {job.id}")
+            await self._fail_job(job, lease_until, repr(error))
+        else:
+            await Job.filter(id=job.id, locked_until=lease_until).delete()
+
+    async def _fail_job(self, job: Job, lease_until: dt.datetime, error: str):
+        """Откладывание задания или перевод в FAILED после всех попыток."""
+        jobs = Job.filter(id=job.id, locked_until=lease_until)
+        if job.attempts >= job.max_attempts or job.name not in job_handlers:
+            await jobs.update(
+                status=JobStatus.FAILED, locked_until=None, last_error=error
+            )
+            return
+
+        run_at = timezone.now() + dt.timedelta(
+            seconds=_retry_delay(job.attempts)
+        )
+        await jobs.update(
+            status=JobStatus.PENDING,
+            locked_until=None,
+            run_at=run_at,
+            last_error=error,
+        )
+
+
+worker = JobWorker(config.JOB_QUEUES)
+
+
+def setup_jobs(app):
+    """Запуск и остановка обработчика заданий вместе с приложением."""
+    if config.JOB_WORKER_IN_APP:
+        app.on_startup.append(_on_startup_start_jobs)
+        app.on_cleanup.append(_on_cleanup_stop_jobs)
+
+
+async def _on_startup_start_jobs(app):
+    """Запуск обработчика заданий."""
+    worker.start()
+
+
+async def _on_cleanup_stop_jobs(app):
+    """Остановка обработчика заданий."""
+    await worker.stop()
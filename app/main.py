@@ -4,30 +4,36 @@
 """
 
 from aiohttp.web import Application
-import aiohttp_jinja2
 from aiohttp_session import setup as setup_sessions
-from aiohttp_session.cookie_storage import EncryptedCookieStorage
-import jinja2
 
-from app import config
 from app.db import setup_db
+from app.events import setup_events
+from app.jobs import setup_jobs
 from app.middlewares import setup_custom_middlewares
+from app.rendering import setup_templates
 from app.routes import setup_routes
 from app.security import setup_security
+from app.services.grading_service import setup_grading
+from app.services.search_service import setup_search
+from app.services.solution_blob_service import setup_solution_blobs
+from app.smtp import setup_smtp
+from app.sessions import create_session_storage
 
 
 async def create_app() -> Application:
     """Инициализация приложения."""
     app = Application()
-    aiohttp_jinja2.setup(
-        app,
-        enable_async=True,
-        loader=jinja2.FileSystemLoader(config.TEMPLATES_PATH),
-    )
+    setup_templates(app)
 
-    setup_sessions(app, EncryptedCookieStorage(config.SECRET_KEY))
+    setup_sessions(app, create_session_storage())
     setup_routes(app)
     setup_security(app)
     setup_custom_middlewares(app)
     setup_db(app)
+    setup_solution_blobs(app)
+    setup_search(app)
+    setup_events(app)
+    setup_grading(app)
+    setup_jobs(app)
+    setup_smtp(app)
     return app
@@ -1,8 +1,14 @@
 """Пакет с фукнцией для установки наших middleware."""
 
 from app.middlewares.error_middleware import error_middleware
+from app.middlewares.rate_limit_middleware import rate_limit_middleware
 
 
 def setup_custom_middlewares(app):
-    """Установка собственных middleware."""
+    """Установка собственных middleware.
+
+    Ограничение частоты запросов стоит первым, чтобы отклонённые
+    запросы не доходили до остальной обработки.
+    """
+    app.middlewares.append(rate_limit_middleware)
     app.middlewares.append(error_middleware)
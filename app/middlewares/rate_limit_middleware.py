@@ -0,0 +1,144 @@
+"""Middleware для ограничения частоты запросов от одного клиента.
+
+Для каждого IP и каждого вошедшего пользователя и имени пути хранится
+"ведро" с токенами: каждый запрос забирает по токену из ведра своего IP
+и, если пользователь вошёл, из ведра пользователя, а токены пополняются
+с заданной скоростью до заданного количества. Если в каком-то из вёдер
+токенов нет, запрос получает 429 с Retry-After и не доходит
+до хэндлера. Статические файлы не ограничиваются: одна страница
+загружает их много.
+
+Ведро хранится как пара (токены, время обновления), а вёдра,
+которые успели наполниться до конца, периодически удаляются,
+поэтому память занимают только недавно активные клиенты.
+"""
+
+import math
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Sequence, Tuple
+
+from aiohttp import web
+from aiohttp.web import Response, Request
+
+from app import config
+from app.utils import get_current_user
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+# Пути, запросы к которым не ограничиваются
+EXEMPT_ROUTES = {"static"}
+
+
+class TokenBuckets:
+    """Вёдра с токенами для разных ключей."""
+
+    def __init__(self, sweep_interval: float):
+        """Создание пустого набора вёдер."""
+        self.sweep_interval = sweep_interval
+        # ключ -> (токены, время обновления, скорость, размер ведра)
+        self._buckets: Dict[Hashable, Tuple[float, float, float, float]] = {}
+        self._swept_at = time.monotonic()
+
+    def take(self, key: Hashable, rate: float, burst: float) -> float:
+        """Взятие токена из ведра.
+
+        Возвращает 0, если токен взят, иначе - через сколько секунд
+        появится следующий токен.
+        """
+        return self.take_all([key], rate, burst)
+
+    def take_all(
+        self, keys: Sequence[Hashable], rate: float, burst: float
+    ) -> float:
+        """Взятие токена из каждого ведра.
+
+        Токены берутся, только если они есть во всех вёдрах. Возвращает 0,
+        если токены взяты, иначе - через сколько секунд токены появятся.
+        """
+        now = time.monotonic()
+        if now - self._swept_at >= self.sweep_interval:
+            self.sweep(now)
+
+        tokens: List[float] = []
+        for key in keys:
+            key_tokens, updated_at, _, _ = self._buckets.get(
+                key, (burst, now, rate, burst)
+            )
+            tokens.append(min(burst, key_tokens + (now - updated_at) * rate))
+
+        retry_after = max((1 - min(tokens)) / rate, 0)
+        taken = 0 if retry_after else 1
+        for key, key_tokens in zip(keys, tokens):
+            self._buckets[key] = (key_tokens - taken, now, rate, burst)
+
+        return retry_after
+
+    def sweep(self, now: float):
+        """Удаление вёдер, которые уже наполнились до конца."""
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if bucket[0] + (now - bucket[1]) * bucket[2] < bucket[3]
+        }
+        self._swept_at = now
+
+    def clear(self):
+        """Удаление всех вёдер."""
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        """Количество вёдер."""
+        return len(self._buckets)
+
+
+rate_limit_buckets = TokenBuckets(config.RATE_LIMIT_SWEEP_INTERVAL)
+
+
+@web.middleware
+async def rate_limit_middleware(
+    request: Request, handler: Handler
+) -> Response:
+    """Отказ в запросе, если клиент превысил ограничение пути."""
+    route_name = request.match_info.route.name
+    if route_name in EXEMPT_ROUTES:
+        return await handler(request)
+
+    rate, burst = config.RATE_LIMITS.get(
+        route_name, config.RATE_LIMITS["default"]
+    )
+    if route_name not in config.RATE_LIMITS:
+        route_name = "default"
+
+    keys = [
+        (route_name, client_key)
+        for client_key in await _get_client_keys(request)
+    ]
+    retry_after = rate_limit_buckets.take_all(keys, rate, burst)
+    if retry_after:
+        return web.HTTPTooManyRequests(
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+    return await handler(request)
+
+
+async def _get_client_keys(request: Request) -> List[Hashable]:
+    """Ключи клиента - IP и ID пользователя, если он вошёл."""
+    keys: List[Hashable] = [("ip", _get_client_ip(request))]
+    user = await get_current_user(request)
+    if user.is_authenticated:
+        keys.append(("user", user.id))
+
+    return keys
+
+
+def _get_client_ip(request: Request) -> str:
+    """IP клиента, в том числе за обратным прокси."""
+    if config.RATE_LIMIT_FORWARDED_HEADER:
+        forwarded = request.headers.get(config.RATE_LIMIT_FORWARDED_HEADER)
+        if forwarded:
+            # последний адрес добавлен нашим прокси
+            return forwarded.rsplit(",", 1)[-1].strip()
+
+    return request.remote
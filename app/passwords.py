@@ -0,0 +1,144 @@
+"""Модуль с хэшированием паролей.
+
+Пароли хэшируются функцией scrypt, параметры и соль хранятся
+вместе с хэшем в виде "scrypt$n$r$p$соль$хэш". Вычисление занимает
+десятки миллисекунд, поэтому выполняется в отдельных потоках,
+а не в цикле событий. Очередь вычислений ограничена: если она
+заполнена, выбрасывается PasswordHasherBusy, и запрос получает
+отказ сразу, а не ждёт вместе с остальными.
+
+Старые хэши (SHA-256 без соли) проверяются как раньше и заменяются
+на новые при входе пользователя, как и хэши с устаревшими параметрами.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from app import config
+from app import exceptions
+
+
+class ScryptParams(NamedTuple):
+    """Модель параметров scrypt."""
+
+    n: int = config.PASSWORD_SCRYPT_N
+    r: int = config.PASSWORD_SCRYPT_R
+    p: int = config.PASSWORD_SCRYPT_P
+
+
+SCRYPT_PREFIX = "scrypt"
+SALT_SIZE = 16
+HASH_SIZE = 32
+
+
+class PasswordHasher:
+    """Хэширование паролей в ограниченном пуле потоков."""
+
+    def __init__(self, workers: int, max_pending: int):
+        """Создание пула на workers потоков и max_pending вычислений."""
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password"
+        )
+        self._pending = 0
+
+    async def hash(self, password: str) -> str:
+        """Создание хэша пароля с новой солью."""
+        params = ScryptParams()
+        salt = os.urandom(SALT_SIZE)
+        password_hash = await self._scrypt(password, salt, params)
+        return "$".join(
+            (
+                SCRYPT_PREFIX,
+                str(params.n),
+                str(params.r),
+                str(params.p),
+                _b64encode(salt),
+                _b64encode(password_hash),
+            )
+        )
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """Проверка пароля по хэшу в любом из поддерживаемых форматов."""
+        parsed_hash = _parse_scrypt_hash(password_hash)
+        if parsed_hash is None:
+            legacy_hash = hashlib.sha256(password.encode("u8")).hexdigest()
+            return hmac.compare_digest(legacy_hash, password_hash)
+
+        params, salt, expected_hash = parsed_hash
+        actual_hash = await self._scrypt(password, salt, params)
+        return hmac.compare_digest(actual_hash, expected_hash)
+
+    def close(self):
+        """Остановка потоков пула."""
+        self._executor.shutdown(wait=False)
+
+    async def _scrypt(
+        self, password: str, salt: bytes, params: ScryptParams
+    ) -> bytes:
+        """Вычисление scrypt в пуле потоков."""
+        if self._pending >= self.max_pending:
+            raise exceptions.PasswordHasherBusy()
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, _scrypt, password, salt, params
+            )
+        finally:
+            self._pending -= 1
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Нужно ли заменить хэш на хэш с текущими параметрами."""
+    parsed_hash = _parse_scrypt_hash(password_hash)
+    return parsed_hash is None or parsed_hash[0] != ScryptParams()
+
+
+def _scrypt(password: str, salt: bytes, params: ScryptParams) -> bytes:
+    """Вычисление scrypt, память ограничена с запасом под параметры."""
+    return hashlib.scrypt(
+        password.encode("u8"),
+        salt=salt,
+        n=params.n,
+        r=params.r,
+        p=params.p,
+        maxmem=256 * params.n * params.r * params.p,
+        dklen=HASH_SIZE,
+    )
+
+
+def _parse_scrypt_hash(
+    password_hash: str,
+) -> Optional[tuple]:
+    """Разбор хэша scrypt на параметры, соль и хэш.
+
+    Возвращает None для хэшей других форматов.
+    """
+    parts = password_hash.split("$")
+    if len(parts) != 6 or parts[0] != SCRYPT_PREFIX:
+        return None
+
+    n, r, p = (int(part) for part in parts[1:4])
+    return ScryptParams(n, r, p), _b64decode(parts[4]), _b64decode(parts[5])
+
+
+def _b64encode(data: bytes) -> str:
+    """Кодирование в base64 без дополнения."""
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    """Декодирование base64 без дополнения."""
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+password_hasher = PasswordHasher(
+    workers=config.PASSWORD_HASH_WORKERS,
+    max_pending=config.PASSWORD_HASH_MAX_PENDING,
+)
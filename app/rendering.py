@@ -0,0 +1,265 @@
+"""Модуль с настройкой шаблонизатора и потоковым рендером.
+
+В режиме production шаблоны не проверяются на изменения при каждом
+рендере, скомпилированный код шаблонов хранится в общей для всех
+воркеров папке, а все шаблоны загружаются при запуске, поэтому первый
+запрос после деплоя не ждёт компиляции. В режиме development шаблоны
+перезагружаются при изменении файлов.
+
+Страницы курсов, уроков и задач кэшируются (см. page_cache_service)
+и отдаются из кэша до получения данных страницы. В режиме production
+у них есть ETag, поэтому на условный запрос с тем же ETag
+отдаётся 304 без тела.
+
+Большие страницы рендерятся потоком: части страницы отправляются
+клиенту по мере рендера, начиная с <head> из base.html, поэтому
+браузер раньше начинает загружать стили и скрипты, а в памяти
+хранится не вся страница, а буфер не больше TEMPLATE_STREAM_CHUNK_SIZE.
+"""
+
+import functools
+import hashlib
+from typing import Any, Awaitable, Callable, Mapping
+
+from aiohttp import hdrs, web
+from aiohttp.web import Application, Request, StreamResponse
+import aiohttp_jinja2
+import jinja2
+
+from app import config
+from app import exceptions
+from app.assets import ASSETS_DIGEST_KEY
+from app.logger import logger
+from app.services.ancestry_service import (
+    get_lesson_ancestry,
+    get_task_ancestry,
+)
+from app.services.page_cache_service import (
+    cache_page,
+    get_cached_page,
+    make_page_etag,
+    make_page_key,
+)
+from app.utils import get_current_user
+
+Handler = Callable[[Request], Awaitable[Any]]
+
+# Ключ запроса, в который потоковый рендер кладёт тело страницы
+RENDERED_BODY_KEY = "rendered_body"
+# Ключ запроса с дополнительными заголовками для потокового рендера
+PAGE_HEADERS_KEY = "page_headers"
+# Ключ приложения с хэшем шаблонов для ETag страниц
+TEMPLATES_DIGEST_KEY = "templates_digest"
+
+
+def setup_templates(app: Application) -> jinja2.Environment:
+    """Инициализация шаблонизатора в режиме из TEMPLATES_MODE."""
+    is_production = config.TEMPLATES_MODE == "production"
+    bytecode_cache = None
+    if is_production:
+        config.TEMPLATES_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(
+            str(config.TEMPLATES_CACHE_PATH)
+        )
+
+    env = aiohttp_jinja2.setup(
+        app,
+        enable_async=True,
+        loader=jinja2.FileSystemLoader(config.TEMPLATES_PATH),
+        auto_reload=not is_production,
+        bytecode_cache=bytecode_cache,
+        cache_size=-1 if is_production else 400,
+    )
+    if is_production:
+        warm_up_templates(env)
+        # в режиме development шаблоны меняются без перезапуска,
+        # поэтому ETag страниц не отправляются
+        app[TEMPLATES_DIGEST_KEY] = get_templates_digest(env)
+
+    return env
+
+
+def warm_up_templates(env: jinja2.Environment) -> int:
+    """Загрузка всех шаблонов заранее.
+
+    Возвращает количество загруженных шаблонов.
+    """
+    templates_names = env.list_templates(extensions=["html"])
+    for template_name in templates_names:
+        env.get_template(template_name)
+
+    return len(templates_names)
+
+
+def get_templates_digest(env: jinja2.Environment) -> str:
+    """Хэш исходников всех шаблонов."""
+    digest = hashlib.sha256()
+    for template_name in sorted(env.list_templates()):
+        source, _, _ = env.loader.get_source(env, template_name)
+        digest.update(template_name.encode("u8"))
+        digest.update(source.encode("u8"))
+
+    return digest.hexdigest()
+
+
+async def render_template_stream(
+    template_name: str,
+    request: Request,
+    context: Mapping[str, Any],
+    status: int = 200,
+) -> StreamResponse:
+    """Рендер шаблона с отправкой частей страницы по мере готовности."""
+    env = aiohttp_jinja2.get_env(request.app)
+    template = env.get_template(template_name)
+    request_context = request.get(aiohttp_jinja2.REQUEST_CONTEXT_KEY)
+    if request_context:
+        context = dict(request_context, **context)
+
+    response = StreamResponse(status=status)
+    response.content_type = "text/html"
+    response.charset = "utf-8"
+    response.headers.update(request.get(PAGE_HEADERS_KEY, {}))
+    await response.prepare(request)
+
+    # тело страницы собирается для кэша, пока не превысит его ограничение
+    body = [] if RENDERED_BODY_KEY in request else None
+    body_size = 0
+    buffer = []
+    buffer_size = 0
+    is_head_sent = False
+    try:
+        async for chunk in template.generate_async(context):
+            data = chunk.encode("utf-8")
+            buffer.append(data)
+            buffer_size += len(data)
+            if body is not None:
+                body.append(data)
+                body_size += len(data)
+                if body_size > config.PAGE_CACHE_MAX_PAGE_SIZE:
+                    body = None
+            if not is_head_sent and b"</head>" in data:
+                is_head_sent = True
+            elif buffer_size < config.TEMPLATE_STREAM_CHUNK_SIZE:
+                continue
+
+            await response.write(b"".join(buffer))
+            buffer.clear()
+            buffer_size = 0
+    except Exception:
+        # заголовки уже отправлены, поэтому страницу ошибки
+        # показать нельзя, а соединение закрывается, чтобы клиент
+        # не принял оборванную страницу за полную
+        logger.exception(f"Не удалось отрендерить шаблон {template_name}")
+        if request.transport is not None:
+            request.transport.close()
+        return response
+
+    if buffer:
+        await response.write(b"".join(buffer))
+    await response.write_eof()
+    if body is not None:
+        request[RENDERED_BODY_KEY] = b"".join(body)
+    return response
+
+
+def streamed_template(template_name: str) -> Callable[[Handler], Handler]:
+    """Декоратор как aiohttp_jinja2.template, но с потоковым рендером."""
+
+    def wrapper(handler: Handler) -> Handler:
+        @functools.wraps(handler)
+        async def wrapped(request: Request) -> StreamResponse:
+            context = await handler(request)
+            if isinstance(context, web.StreamResponse):
+                return context
+
+            return await render_template_stream(
+                template_name, request, context
+            )
+
+        return wrapped
+
+    return wrapper
+
+
+def cached_page(handler: Handler) -> Handler:
+    """Декоратор для ревалидации и кэша страницы до вызова хэндлера.
+
+    Ставится над streamed_template. Если ETag страницы совпадает
+    с If-None-Match, то отдаётся 304, иначе страница отдаётся из кэша
+    или рендерится и попадает в кэш. Всё это только при условии,
+    что курс из пути действительно содержит урок и задачу из пути.
+    """
+
+    @functools.wraps(handler)
+    async def wrapped(request: Request) -> StreamResponse:
+        params = dict(request.match_info)
+        if not await _is_page_path_consistent(params):
+            return await handler(request)
+
+        user = await get_current_user(request)
+        key = await make_page_key(request.match_info.route.name, params, user)
+        if key is None:
+            return await handler(request)
+
+        headers = {"Cache-Control": "private, no-cache", "Vary": "Cookie"}
+        templates_digest = request.app.get(TEMPLATES_DIGEST_KEY)
+        if templates_digest is not None:
+            # страница ссылается на статические файлы по хэшу содержимого
+            assets_digest = request.app.get(ASSETS_DIGEST_KEY, "")
+            etag = make_page_etag(key, templates_digest + assets_digest)
+            headers["ETag"] = etag
+            if _is_etag_matched(request, etag):
+                return web.Response(status=304, headers=headers)
+
+        body = get_cached_page(key)
+        if body is not None:
+            return web.Response(
+                body=body,
+                content_type="text/html",
+                charset="utf-8",
+                headers=headers,
+            )
+
+        request[RENDERED_BODY_KEY] = None
+        request[PAGE_HEADERS_KEY] = headers
+        response = await handler(request)
+        body = request[RENDERED_BODY_KEY]
+        if body is not None:
+            cache_page(key, body)
+
+        return response
+
+    return wrapped
+
+
+def _is_etag_matched(request: Request, etag: str) -> bool:
+    """Есть ли ETag среди If-None-Match запроса."""
+    if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+    if not if_none_match:
+        return False
+
+    for value in if_none_match.split(","):
+        value = value.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        if value in {etag, "*"}:
+            return True
+
+    return False
+
+
+async def _is_page_path_consistent(params: dict) -> bool:
+    """Принадлежат ли урок и задача из пути курсу из пути."""
+    try:
+        if "task_id" in params:
+            ancestry = await get_task_ancestry(params["task_id"])
+        elif "lesson_id" in params:
+            ancestry = await get_lesson_ancestry(params["lesson_id"])
+        else:
+            return True
+    except (exceptions.LessonDoesNotExist, exceptions.TaskDoesNotExist):
+        return False
+
+    return ancestry.course_id == int(
+        params["course_id"]
+    ) and ancestry.lesson_id == int(params.get("lesson_id", 0))
@@ -2,11 +2,11 @@
 
 from aiohttp.web import Application
 
-from app import config
+from app.assets import setup_static
 from app.views import routes
 
 
 def setup_routes(app: Application):
     """Регистрация путей."""
     app.add_routes(routes)
-    app.router.add_static("/static/", path=config.STATIC_PATH, name="static")
+    setup_static(app)
@@ -1,16 +1,25 @@
 """Собственная система авторизации."""
 
-from aiohttp.web import Application
+from aiohttp.web import Application, Request, StreamResponse
 from aiohttp_security import (
+    remember,
     setup as _setup_security,
     SessionIdentityPolicy,
 )
 from aiohttp_security import authorized_userid  # noqa: F401
 from aiohttp_security.abc import AbstractAuthorizationPolicy
+from tortoise.signals import post_delete, post_save
 
+from app import config
+from app.cache import LRUCache
 from app.db.models import User
 
 
+users_cache = LRUCache(
+    maxsize=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL
+)
+
+
 class UserAuthorizationPolicy(AbstractAuthorizationPolicy):
     """Создание собственной политики авторизации.
 
@@ -18,8 +27,20 @@ class UserAuthorizationPolicy(AbstractAuthorizationPolicy):
     """
 
     async def authorized_userid(self, identity):  # noqa: F811
-        """Получение модели пользователя по его identity."""
-        user = await User.get_or_none(id=int(identity))
+        """Получение модели пользователя по его identity.
+
+        Пользователь всегда берётся из кэша или БД, а не из сессии,
+        поэтому изменение роли или имени сразу видно в проверках прав.
+        Старые identity вида "id:role:username" тоже принимаются,
+        но из них используется только ID.
+        """
+        user_id = int(identity.split(":", 1)[0])
+        user = users_cache.get(user_id)
+        if user is None:
+            user = await User.get_or_none(id=user_id)
+            if user is not None:
+                users_cache.set(user_id, user)
+
         return user
 
     async def permits(self, identity, permission, context=None):
@@ -27,6 +48,32 @@ class UserAuthorizationPolicy(AbstractAuthorizationPolicy):
         return True
 
 
+def make_identity(user: User) -> str:
+    """Создание identity пользователя (его ID)."""
+    return str(user.id)
+
+
+async def remember_user(
+    request: Request, response: StreamResponse, user: User
+):
+    """Запоминание пользователя в сессии."""
+    await remember(request, response, make_identity(user))
+
+
+@post_save(User)
+async def _forget_saved_user(
+    sender, instance, created, using_db, update_fields
+):
+    """Удаление сохранённого пользователя из кэша."""
+    users_cache.pop(instance.id)
+
+
+@post_delete(User)
+async def _forget_deleted_user(sender, instance, using_db):
+    """Удаление удалённого пользователя из кэша."""
+    users_cache.pop(instance.id)
+
+
 def setup_security(app: Application):
     """Регистрация идентификационной политики."""
     policy = SessionIdentityPolicy()
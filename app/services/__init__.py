@@ -4,9 +4,17 @@
 `from app.services import ...`.
 """
 
+from app.services.ancestry_service import *
 from app.services.course_service import *
 from app.services.email_service import *
+from app.services.grading_service import *
+from app.services.inbox_service import *
 from app.services.lesson_service import *
+from app.services.page_cache_service import *
+from app.services.progress_service import *
+from app.services.revision_service import *
+from app.services.search_service import *
+from app.services.solution_blob_service import *
 from app.services.solution_service import *
 from app.services.task_service import *
 from app.services.token_service import *
@@ -0,0 +1,119 @@
+"""Сервис для определения курса, к которому относятся урок, задача и решение.
+
+Иерархия курс -> урок -> задача почти не меняется, поэтому цепочка
+предков каждой сущности получается одним запросом и хранится в кэше.
+ID в БД не переиспользуются, так что устаревшими записи могут стать
+только при удалении курса, при котором они и удаляются из кэша.
+"""
+
+from typing import NamedTuple, Optional
+
+from app import config
+from app import exceptions
+from app.cache import LRUCache
+from app.db.models import Course, Lesson, Task, TaskSolution
+
+
+class Ancestry(NamedTuple):
+    """Модель данных предков урока, задачи или решения."""
+
+    lesson_id: Optional[int]
+    course_id: int
+    teacher_id: int
+    is_private: bool
+
+
+# ("lesson" | "task" | "solution", ID) -> Ancestry
+ancestry_cache = LRUCache(maxsize=config.ANCESTRY_CACHE_SIZE)
+
+
+async def get_lesson_ancestry(lesson_id: int) -> Ancestry:
+    """Получение курса и учителя урока."""
+    key = ("lesson", int(lesson_id))
+    ancestry = ancestry_cache.get(key)
+    if ancestry is None:
+        rows = await Lesson.filter(id=lesson_id).values(
+            "course_id",
+            teacher_id="course__teacher_id",
+            is_private="course__is_private",
+        )
+        if not rows:
+            raise exceptions.LessonDoesNotExist()
+
+        ancestry = _make_ancestry(lesson_id=int(lesson_id), **rows[0])
+        ancestry_cache.set(key, ancestry)
+
+    return ancestry
+
+
+async def get_task_ancestry(task_id: int) -> Ancestry:
+    """Получение урока, курса и учителя задачи."""
+    key = ("task", int(task_id))
+    ancestry = ancestry_cache.get(key)
+    if ancestry is None:
+        rows = await Task.filter(id=task_id).values(
+            "lesson_id",
+            course_id="lesson__course_id",
+            teacher_id="lesson__course__teacher_id",
+            is_private="lesson__course__is_private",
+        )
+        if not rows:
+            raise exceptions.TaskDoesNotExist()
+
+        ancestry = _make_ancestry(**rows[0])
+        ancestry_cache.set(key, ancestry)
+
+    return ancestry
+
+
+async def get_solution_ancestry(solution_id: int) -> Ancestry:
+    """Получение урока, курса и учителя задачи данного решения."""
+    key = ("solution", int(solution_id))
+    ancestry = ancestry_cache.get(key)
+    if ancestry is None:
+        rows = await TaskSolution.filter(id=solution_id).values(
+            lesson_id="task__lesson_id",
+            course_id="task__lesson__course_id",
+            teacher_id="task__lesson__course__teacher_id",
+            is_private="task__lesson__course__is_private",
+        )
+        if not rows:
+            raise exceptions.SolutionDoesNotExist()
+
+        ancestry = _make_ancestry(**rows[0])
+        ancestry_cache.set(key, ancestry)
+
+    return ancestry
+
+
+def _make_ancestry(
+    lesson_id: Optional[int],
+    course_id: int,
+    teacher_id: int,
+    is_private: bool,
+) -> Ancestry:
+    """Создание модели предков из строки запроса."""
+    return Ancestry(lesson_id, course_id, teacher_id, bool(is_private))
+
+
+def remember_lesson_ancestry(lesson: Lesson, course: Course):
+    """Сохранение предков только что созданного урока."""
+    ancestry = Ancestry(
+        lesson.id, course.id, course.teacher_id, course.is_private
+    )
+    ancestry_cache.set(("lesson", lesson.id), ancestry)
+
+
+def remember_task_ancestry(task: Task, course: Course):
+    """Сохранение предков только что созданной задачи."""
+    ancestry = Ancestry(
+        task.lesson_id, course.id, course.teacher_id, course.is_private
+    )
+    ancestry_cache.set(("task", task.id), ancestry)
+
+
+def forget_course_ancestry(course_id: int):
+    """Удаление из кэша всех уроков, задач и решений курса."""
+    for key, ancestry in ancestry_cache.items():
+        if ancestry.course_id == int(course_id):
+            ancestry_cache.pop(key)
@@ -2,13 +2,55 @@
 
 from typing import List, TypedDict
 
-from tortoise.functions import Count
-from tortoise.query_utils import Q
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
 
+from app import config
 from app import exceptions
+from app.cache import LRUCache
+from app.db import execute_query
 from app.db.models import Course, Lesson, User
-from app.db.models.task_solution import TaskSolutionStatus
-from app.services.token_service import create_course_invite_link
+from app.services.ancestry_service import forget_course_ancestry
+from app.services.inbox_service import forget_teacher_inbox
+from app.services.page_cache_service import (
+    forget_course_pages,
+    forget_user_pages,
+)
+from app.services.progress_service import get_lessons_progress
+from app.services.search_service import (
+    add_course_to_search_index,
+    remove_course_from_search_index,
+)
+from app.services.token_service import (
+    create_course_invite_link,
+    get_course_invite,
+)
+
+
+# (course_id, user_id) -> записан ли пользователь на курс
+course_students_cache = LRUCache(
+    maxsize=config.COURSE_STUDENTS_CACHE_SIZE,
+    ttl=config.COURSE_STUDENTS_CACHE_TTL,
+)
+
+# Отписка, если пользователь записан, иначе запись на курс,
+# и изменение счётчика учеников курса (только PostgreSQL)
+TOGGLE_COURSE_STUDENT_QUERY = (
+    'WITH "deleted" AS ('
+    'DELETE FROM "course_user" WHERE "course_id" = ? AND "user_id" = ? '
+    "RETURNING 1), "
+    '"inserted" AS ('
+    'INSERT INTO "course_user" ("course_id", "user_id") '
+    "SELECT CAST(? AS INTEGER), CAST(? AS INTEGER) "
+    'WHERE NOT EXISTS (SELECT 1 FROM "deleted") '
+    "ON CONFLICT DO NOTHING RETURNING 1), "
+    '"counted" AS ('
+    'UPDATE "course" SET "students_count" = "students_count" '
+    '+ (SELECT COUNT(*) FROM "inserted") '
+    '- (SELECT COUNT(*) FROM "deleted") WHERE "id" = ?) '
+    'SELECT EXISTS (SELECT 1 FROM "inserted") AS "is_subscribed"'
+)
 
 
 class CourseSubscribeData(TypedDict):
@@ -17,19 +59,13 @@ class CourseSubscribeData(TypedDict):
     isSubscribed: bool  # noqa: N815
 
 
-class SearchedCourseData(TypedDict):
-    """Модель данных курса из результата поиска."""
-
-    id: int
-    title: str
-    description: str
-
-
 async def get_course_page_data(course_id: int, user: User) -> dict:
     """Получение данных для шаблона страницы курса в виде JSON."""
     course = await get_course_by_id(course_id)
     await raise_for_course_access(course, user)
-    course_invite_link = create_course_invite_link(course.id)
+    course_invite_link = create_course_invite_link(
+        course.id, course.invite_version
+    )
     lessons = await get_course_lessons(course, user)
     is_subscribed = await check_is_user_subscribed(user, course)
     return {
@@ -41,29 +77,19 @@ async def get_course_page_data(course_id: int, user: User) -> dict:
 
 
 async def get_course_lessons(course: Course, user: User) -> List[Lesson]:
-    """Получение уроков данного курса."""
-    return await (
-        course.lessons.order_by("-order_index")
-        .annotate(tasks_count=Count("tasks"))
-        .annotate(
-            correct_solutions_count=Count(
-                "tasks__solutions",
-                _filter=Q(
-                    Q(tasks__solutions__student_id=user.id)
-                    & Q(tasks__solutions__status=TaskSolutionStatus.CORRECT)
-                ),
-            )
-        )
-        .annotate(
-            waiting_solutions_count=Count(
-                "tasks__solutions",
-                _filter=Q(
-                    Q(tasks__solutions__student_id=user.id)
-                    & Q(tasks__solutions__status=TaskSolutionStatus.WAITING)
-                ),
-            )
-        )
-    )
+    """Получение уроков данного курса вместе с прогрессом ученика."""
+    lessons = await course.lessons.order_by("-order_index")
+    lessons_progress = await get_lessons_progress(course.id, user)
+    for lesson in lessons:
+        lesson_progress = lessons_progress.get(lesson.id)
+        if lesson_progress is None:
+            lesson.correct_solutions_count = 0
+            lesson.waiting_solutions_count = 0
+        else:
+            lesson.correct_solutions_count = lesson_progress.correct_count
+            lesson.waiting_solutions_count = lesson_progress.waiting_count
+
+    return lessons
 
 
 async def get_user_courses(user: User) -> List[Course]:
@@ -104,6 +130,7 @@ async def create_course(course_data: dict, user: User) -> Course:
         is_private=is_private,
         teacher=user,
     )
+    add_course_to_search_index(course)
     return course
 
 
@@ -118,16 +145,63 @@ async def get_course_by_id(course_id: int) -> Course:
 
 async def raise_for_course_access(course: Course, user: User):
     """Выбрасываем ошибку, если курс закрытый и пользователя в нём нет."""
-    if course.is_private:
-        await course.fetch_related("teacher", "students")
-        if user != course.teacher and user not in course.students:
-            raise exceptions.NotEnoughAccessRights()
+    if not await has_course_access(
+        course.id, course.teacher_id, course.is_private, user
+    ):
+        raise exceptions.NotEnoughAccessRights()
+
+
+async def has_course_access(
+    course_id: int, teacher_id: int, is_private: bool, user: User
+) -> bool:
+    """Может ли пользователь просматривать курс."""
+    if not is_private:
+        return True
+    if not user.is_authenticated:
+        return False
+    if user.id == teacher_id:
+        return True
+
+    return await is_course_student(course_id, user.id)
+
+
+async def is_course_student(course_id: int, user_id: int) -> bool:
+    """Записан ли пользователь на курс.
+
+    Результат кэшируется, а при записи и отписке запись удаляется из кэша.
+    """
+    key = (int(course_id), int(user_id))
+    is_student = course_students_cache.get(key)
+    if is_student is None:
+        is_student = await _exists_course_student(*key)
+        course_students_cache.set(key, is_student)
+
+    return is_student
+
+
+async def _exists_course_student(course_id: int, user_id: int) -> bool:
+    """Проверка записи пользователя на курс одним запросом по индексу."""
+    _, rows = await execute_query(
+        'SELECT 1 FROM "course_user" '
+        'WHERE "course_id" = ? AND "user_id" = ? LIMIT 1',
+        course_id,
+        user_id,
+    )
+    return bool(rows)
+
+
+def forget_course_student(course_id: int, user_id: int):
+    """Удаление из кэша информации о записи пользователя на курс."""
+    course_students_cache.pop((int(course_id), int(user_id)))
 
 
 async def on_course_subscribe_button_click(
     course_id: int, user: User
 ) -> CourseSubscribeData:
     """Запись пользователя на курс; отпись, если уже подписан."""
+    if not user.is_authenticated:
+        raise exceptions.NotEnoughAccessRights()
+
     course = await get_course_by_id(course_id)
     is_subscribed = await toggle_course_subscription(user, course)
     return {"isSubscribed": is_subscribed}
@@ -137,37 +211,112 @@ async def toggle_course_subscription(user: User, course: Course) -> bool:
     """
     Подписка пользователя на курс, если не записан.
     Отписка пользователя от курса, если уже записан.
+
+    В PostgreSQL запись, отписка и изменение счётчика учеников
+    выполняются одним условным запросом, который возвращает новое
+    состояние подписки. SQLite не поддерживает изменение данных
+    внутри WITH, поэтому там это два-три запроса в одной транзакции.
     """
-    is_subscribed = await check_is_user_subscribed(user, course)
-    if is_subscribed:
-        await course.students.remove(user)
-    else:
-        await course.students.add(user)
+    async with in_transaction() as connection:
+        if connection.capabilities.dialect == "postgres":
+            _, rows = await execute_query(
+                TOGGLE_COURSE_STUDENT_QUERY,
+                course.id,
+                user.id,
+                course.id,
+                user.id,
+                course.id,
+                using_db=connection,
+            )
+            is_subscribed = rows[0]["is_subscribed"]
+        else:
+            delta = -await _delete_course_student(
+                course.id, user.id, connection
+            )
+            if not delta:
+                delta = await _insert_course_student(
+                    course.id, user.id, connection
+                )
+            if delta:
+                await _add_students_count(course.id, delta, connection)
+
+            is_subscribed = delta > 0
 
-    return not is_subscribed
+    course_students_cache.set((course.id, user.id), is_subscribed)
+    # учитель видит количество учеников на странице курса
+    await forget_user_pages(user.id, course.teacher_id)
+    return is_subscribed
 
 
 async def subscribe_user_to_course(user: User, course: Course):
     """Подписка пользователя на курс."""
-    await course.students.add(user)
+    async with in_transaction() as connection:
+        if await _insert_course_student(course.id, user.id, connection):
+            await _add_students_count(course.id, 1, connection)
+
+    course_students_cache.set((course.id, user.id), True)
+    await forget_user_pages(user.id, course.teacher_id)
+
+
+async def _insert_course_student(
+    course_id: int, user_id: int, connection: BaseDBAsyncClient
+) -> int:
+    """Запись пользователя на курс, если он ещё не записан.
+
+    Возвращается количество добавленных записей (0 или 1).
+    """
+    inserted_count, _ = await execute_query(
+        'INSERT INTO "course_user" ("course_id", "user_id") VALUES (?, ?) '
+        "ON CONFLICT DO NOTHING RETURNING 1",
+        course_id,
+        user_id,
+        using_db=connection,
+    )
+    return int(inserted_count > 0)
+
+
+async def _delete_course_student(
+    course_id: int, user_id: int, connection: BaseDBAsyncClient
+) -> int:
+    """Отписка пользователя от курса.
+
+    Возвращается количество удалённых записей (0 или 1).
+    """
+    deleted_count, _ = await execute_query(
+        'DELETE FROM "course_user" WHERE "course_id" = ? AND "user_id" = ?',
+        course_id,
+        user_id,
+        using_db=connection,
+    )
+    return int(deleted_count > 0)
+
+
+async def _add_students_count(
+    course_id: int, delta: int, connection: BaseDBAsyncClient
+):
+    """Изменение счётчика учеников курса."""
+    await (
+        Course.filter(id=course_id)
+        .using_db(connection)
+        .update(students_count=F("students_count") + delta)
+    )
+
+
+async def rebuild_students_count():
+    """Пересчёт количества учеников во всех курсах."""
+    await execute_query(
+        'UPDATE "course" SET "students_count" = '
+        '(SELECT COUNT(*) FROM "course_user" '
+        'WHERE "course_user"."course_id" = "course"."id")'
+    )
 
 
 async def check_is_user_subscribed(user: User, course: Course) -> bool:
     """Подписан ли пользователь на данный курс."""
-    students = await course.students
-    return user in students
-
-
-async def search_courses_by_title(
-    title_query: str,
-) -> List[SearchedCourseData]:
-    """Поиск курсов по их названию."""
-    courses = await (
-        Course.filter(
-            Q(is_private=False) & Q(title__icontains=title_query)
-        ).values("id", "title", "description")
-    )
-    return courses
+    if not user.is_authenticated:
+        return False
+
+    return await is_course_student(course.id, user.id)
 
 
 async def delete_course(course_id: int, user: User):
@@ -177,9 +326,39 @@ async def delete_course(course_id: int, user: User):
         raise exceptions.NotEnoughAccessRights()
 
     await course.delete()
+    # версия удалённого курса больше не найдётся, и страницы
+    # курса в этом воркере перестанут отдаваться из кэша
+    await forget_course_pages(course.id)
+    forget_course_ancestry(course.id)
+    forget_teacher_inbox(course.teacher_id)
+    remove_course_from_search_index(course.id)
+
+
+async def get_course_by_invite(invite_token: str) -> Course:
+    """Получение курса по пригласительному токену.
+
+    Токены, выданные до отзыва приглашений курса, не действуют.
+    """
+    invite = get_course_invite(invite_token)
+    course = await get_course_by_id(invite.course_id)
+    if invite.version != course.invite_version:
+        raise exceptions.InvalidCourseInvite()
+
+    return course
+
+
+async def revoke_course_invites(course_id: int, user: User):
+    """Отзыв всех выданных пригласительных токенов курса."""
+    course = await get_course_by_id(course_id)
+    if not await is_course_teacher(course, user):
+        raise exceptions.NotEnoughAccessRights()
+
+    await Course.filter(id=course.id).update(
+        invite_version=F("invite_version") + 1
+    )
+    await forget_course_pages(course.id)
 
 
 async def is_course_teacher(course: Course, user: User) -> bool:
     """Является ли пользователь учителем в курсе."""
-    teacher = await course.teacher
-    return user == teacher
+    return user.is_authenticated and user.id == course.teacher_id
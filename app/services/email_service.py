@@ -2,9 +2,9 @@
 
 from email.mime.text import MIMEText
 
-import aiosmtplib
-
 from app import config
+from app.jobs import enqueue_job, job_handler
+from app.smtp import smtp_pool
 
 
 EMAIL_TEMPLATE = """
@@ -42,6 +42,19 @@ h1 {{
 """
 
 
+async def enqueue_confirmation_email(to_mail: str, confirm_url: str):
+    """Добавление задания на отправку письма для подтверждения регистрации.
+
+    Задание хранится в БД, поэтому в токене ссылки нет пароля,
+    только его хэш (см. create_confirmation_token).
+    """
+    await enqueue_job(
+        "send_confirmation_email",
+        {"to_mail": to_mail, "confirm_url": confirm_url},
+    )
+
+
+@job_handler("send_confirmation_email", queue="email")
 async def send_confirmation_email(to_mail: str, confirm_url: str):
     """Отправка сообщения с подтверждающим регистрацию токеном."""
     html = EMAIL_TEMPLATE.format(confirm_url=confirm_url)
@@ -50,11 +63,4 @@ async def send_confirmation_email(to_mail: str, confirm_url: str):
     message["From"] = config.CONFIRMATION_EMAIL_USERNAME
     message["Subject"] = "Подтверждение почты для Tasker"
 
-    await aiosmtplib.send(
-        message,
-        hostname="smtp.gmail.com",
-        username=config.CONFIRMATION_EMAIL_USERNAME,
-        password=config.CONFIRMATION_EMAIL_PASSWORD,
-        port=465,
-        use_tls=True,
-    )
+    await smtp_pool.send(message)
@@ -0,0 +1,231 @@
+"""Сервис для автоматической проверки решений по тестам задач.
+
+Если у задачи есть тесты, а для расширения решения настроена команда
+запуска, то после отправки решение ставится в очередь проверки.
+Решение засчитывается, если на каждом тесте программа завершилась
+успешно и вывела ожидаемое. Если очередь заполнена или проверка
+не удалась, решение остаётся ожидать проверки учителем.
+"""
+
+import tempfile
+from pathlib import Path
+from typing import List, Optional, TypedDict
+
+from tortoise.transactions import in_transaction
+
+from app import config
+from app import exceptions
+from app.db.models import TaskSolution, TaskTestCase, User
+from app.db.models.task_solution import TaskSolutionStatus
+from app.events import broker, student_topic, teacher_topic
+from app.grader import GraderPool, is_sandbox_available, run_in_sandbox
+from app.logger import logger
+from app.services.ancestry_service import get_task_ancestry
+from app.services.inbox_service import forget_teacher_inbox
+from app.services.page_cache_service import forget_user_pages
+from app.services.progress_service import change_lesson_progress
+from app.services.solution_blob_service import load_solution_content
+
+
+class TaskTestCaseData(TypedDict):
+    """Модель данных теста задачи."""
+
+    id: int
+    input: str
+    expected_output: str
+
+
+async def add_task_test_case(
+    task_id: int, test_case_data: dict, user: User
+) -> TaskTestCase:
+    """Добавление теста к задаче учителем курса."""
+    ancestry = await get_task_ancestry(task_id)
+    if not user.is_authenticated or user.id != ancestry.teacher_id:
+        raise exceptions.NotEnoughAccessRights()
+
+    try:
+        test_input = str(test_case_data["input"])
+        expected_output = str(test_case_data["expectedOutput"])
+    except (KeyError, TypeError):
+        raise exceptions.InvalidTestCase()
+
+    return await TaskTestCase.create(
+        task_id=task_id, input=test_input, expected_output=expected_output
+    )
+
+
+async def get_task_test_cases(
+    task_id: int, user: User
+) -> List[TaskTestCaseData]:
+    """Получение тестов задачи учителем курса."""
+    ancestry = await get_task_ancestry(task_id)
+    if not user.is_authenticated or user.id != ancestry.teacher_id:
+        raise exceptions.NotEnoughAccessRights()
+
+    return await (
+        TaskTestCase.filter(task_id=task_id)
+        .order_by("id")
+        .values("id", "input", "expected_output")
+    )
+
+
+async def submit_solution_for_grading(solution: TaskSolution) -> bool:
+    """Постановка решения в очередь проверки.
+
+    Возвращает False, если решение будет проверять учитель
+    или оно уже оценено: при изменении содержимого решение снова
+    ожидает проверки, поэтому оценённым остаётся только
+    повторно отправленное без изменений решение.
+    """
+    if solution.status != TaskSolutionStatus.WAITING:
+        return False
+
+    command = config.GRADER_RUNNERS.get(solution.extension)
+    if command is None or not grader_pool.is_running:
+        return False
+
+    if not await TaskTestCase.filter(task_id=solution.task_id).exists():
+        return False
+
+    is_submitted = grader_pool.submit(solution.id, solution.content_hash)
+    if not is_submitted:
+        logger.warning(f"Очередь проверки заполнена, решение {solution.id}")
+
+    return is_submitted
+
+
+async def grade_solution(solution_id: int, content_hash: str):
+    """Проверка содержимого решения на тестах его задачи."""
+    solution = await TaskSolution.get_or_none(id=solution_id)
+    if solution is None or solution.content_hash != content_hash:
+        return
+
+    command = config.GRADER_RUNNERS.get(solution.extension)
+    if command is None:
+        return
+
+    test_cases = await (
+        TaskTestCase.filter(task_id=solution.task_id)
+        .order_by("id")
+        .values_list("input", "expected_output")
+    )
+    if not test_cases:
+        return
+
+    content = await load_solution_content(content_hash)
+    is_correct = await _run_test_cases(
+        content, solution.extension, command, test_cases
+    )
+    await _set_solution_grade(solution_id, content_hash, is_correct)
+
+
+async def _run_test_cases(
+    content: str, extension: str, command: List[str], test_cases: list
+) -> bool:
+    """Прохождение решением всех тестов."""
+    with tempfile.TemporaryDirectory(prefix="tasker-") as directory:
+        solution_path = Path(directory) / f"solution.{extension}"
+        solution_path.write_text(content)
+        run_command = [
+            part.replace("{file}", str(solution_path)) for part in command
+        ]
+
+        for test_input, expected_output in test_cases:
+            result = await run_in_sandbox(
+                run_command, test_input.encode(), directory
+            )
+            if not result.is_ok:
+                return False
+            if _normalize_output(
+                result.stdout.decode(errors="replace")
+            ) != _normalize_output(expected_output):
+                return False
+
+    return True
+
+
+def _normalize_output(output: str) -> str:
+    """Вывод без пробелов в конце строк и пустых строк в конце."""
+    lines = [line.rstrip() for line in output.splitlines()]
+    return "\n".join(lines).rstrip("\n")
+
+
+async def _set_solution_grade(
+    solution_id: int, content_hash: str, is_correct: bool
+):
+    """Установка статуса по результату проверки.
+
+    Статус не меняется, если решение успели отправить заново
+    или оценить вручную.
+    """
+    async with in_transaction() as connection:
+        solution: Optional[TaskSolution] = await (
+            TaskSolution.select_for_update()
+            .filter(id=solution_id)
+            .using_db(connection)
+            .first()
+        )
+        if (
+            solution is None
+            or solution.content_hash != content_hash
+            or solution.status != TaskSolutionStatus.WAITING
+        ):
+            return
+
+        ancestry = await get_task_ancestry(solution.task_id)
+        old_status = solution.status
+        solution.set_status(is_correct)
+        await solution.save(update_fields=["status"], using_db=connection)
+        await change_lesson_progress(
+            solution.student_id,
+            ancestry.lesson_id,
+            old_status,
+            solution.status,
+            using_db=connection,
+        )
+
+    forget_teacher_inbox(ancestry.teacher_id)
+    await forget_user_pages(solution.student_id)
+    event_data = {
+        "solution_id": solution.id,
+        "course_id": ancestry.course_id,
+        "lesson_id": ancestry.lesson_id,
+        "task_id": solution.task_id,
+        "status": solution.status.value,
+    }
+    broker.publish(
+        student_topic(solution.student_id), "solution_marked", **event_data
+    )
+    broker.publish(
+        teacher_topic(ancestry.teacher_id), "solution_marked", **event_data
+    )
+
+
+grader_pool = GraderPool(grade_solution)
+
+
+def setup_grading(app):
+    """Запуск и остановка пула проверки вместе с приложением."""
+    app.on_startup.append(_on_startup_start_grading)
+    app.on_cleanup.append(_on_cleanup_stop_grading)
+
+
+async def _on_startup_start_grading(app):
+    """Запуск пула проверки, если он включён и песочница установлена."""
+    if config.GRADER_POOL_SIZE <= 0:
+        return
+
+    if not is_sandbox_available():
+        # без песочницы решения выполнялись бы с правами приложения
+        logger.error(
+            "Автоматическая проверка отключена: не найдены программы "
+            "песочницы GRADER_SANDBOX и prlimit"
+        )
+        return
+
+    grader_pool.start()
+
+
+async def _on_cleanup_stop_grading(app):
+    """Остановка пула проверки."""
+    await grader_pool.stop()
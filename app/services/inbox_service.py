@@ -0,0 +1,153 @@
+"""Сервис для работы с общей очередью ожидающих решений учителя.
+
+Количество ожидающих решений во всех курсах учителя считается одним
+сгруппированным запросом и хранится в кэше до отправки или оценки
+решения в любом из его курсов.
+"""
+
+import datetime as dt
+from typing import List, TypedDict
+
+from app import config
+from app import exceptions
+from app.cache import LRUCache
+from app.db import execute_query
+from app.db.models import TaskSolution, User
+from app.db.models.task_solution import TaskSolutionStatus
+
+
+class InboxLessonData(TypedDict):
+    """Модель данных урока с ожидающими решениями."""
+
+    lesson_id: int
+    title: str
+    waiting_count: int
+
+
+class InboxCourseData(TypedDict):
+    """Модель данных курса с ожидающими решениями."""
+
+    course_id: int
+    title: str
+    waiting_count: int
+    lessons: List[InboxLessonData]
+
+
+class InboxSolutionData(TypedDict):
+    """Модель данных ожидающего решения (без его содержимого)."""
+
+    student_username: str
+    course_id: int
+    lesson_id: int
+    task_id: int
+    solution_id: int
+    task_title: str
+    timestamp: dt.datetime
+
+
+class TeacherInboxData(TypedDict):
+    """Модель данных общей очереди ожидающих решений учителя."""
+
+    waiting_count: int
+    courses: List[InboxCourseData]
+    oldest_solutions: List[InboxSolutionData]
+
+
+# ID учителя -> TeacherInboxData
+inbox_cache = LRUCache(
+    maxsize=config.INBOX_CACHE_SIZE, ttl=config.INBOX_CACHE_TTL
+)
+
+WAITING_COUNTS_QUERY = (
+    'SELECT "course"."id" AS "course_id", "course"."title" AS "course_title", '
+    '"lesson"."id" AS "lesson_id", "lesson"."title" AS "lesson_title", '
+    'COUNT(*) AS "waiting_count" '
+    'FROM "tasksolution" '
+    'JOIN "task" ON "task"."id" = "tasksolution"."task_id" '
+    'JOIN "lesson" ON "lesson"."id" = "task"."lesson_id" '
+    'JOIN "course" ON "course"."id" = "lesson"."course_id" '
+    'WHERE "course"."teacher_id" = ? AND "tasksolution"."status" = ? '
+    'GROUP BY "course"."id", "course"."title", "lesson"."id", '
+    '"lesson"."title", "lesson"."order_index" '
+    'ORDER BY "course"."id", "lesson"."order_index"'
+)
+
+
+async def get_teacher_inbox(user: User) -> TeacherInboxData:
+    """Получение ожидающих решений во всех курсах учителя."""
+    if not user.is_authenticated or not user.is_teacher:
+        raise exceptions.NotEnoughAccessRights()
+
+    inbox = inbox_cache.get(user.id)
+    if inbox is None:
+        courses = await _get_waiting_counts(user.id)
+        oldest_solutions = await _get_oldest_waiting_solutions(user.id)
+        inbox = {
+            "waiting_count": sum(
+                course["waiting_count"] for course in courses
+            ),
+            "courses": courses,
+            "oldest_solutions": oldest_solutions,
+        }
+        inbox_cache.set(user.id, inbox)
+
+    return inbox
+
+
+def forget_teacher_inbox(teacher_id: int):
+    """Удаление очереди учителя из кэша после изменения решений."""
+    inbox_cache.pop(teacher_id)
+
+
+async def _get_waiting_counts(teacher_id: int) -> List[InboxCourseData]:
+    """Количество ожидающих решений по курсам и урокам учителя."""
+    _, rows = await execute_query(
+        WAITING_COUNTS_QUERY, teacher_id, TaskSolutionStatus.WAITING.value
+    )
+
+    courses: List[InboxCourseData] = []
+    for row in rows:
+        if not courses or courses[-1]["course_id"] != row["course_id"]:
+            courses.append(
+                {
+                    "course_id": row["course_id"],
+                    "title": row["course_title"],
+                    "waiting_count": 0,
+                    "lessons": [],
+                }
+            )
+
+        course = courses[-1]
+        course["waiting_count"] += row["waiting_count"]
+        course["lessons"].append(
+            {
+                "lesson_id": row["lesson_id"],
+                "title": row["lesson_title"],
+                "waiting_count": row["waiting_count"],
+            }
+        )
+
+    return courses
+
+
+async def _get_oldest_waiting_solutions(
+    teacher_id: int,
+) -> List[InboxSolutionData]:
+    """Получение самых давних ожидающих решений во всех курсах учителя."""
+    return await (
+        TaskSolution.filter(
+            task__lesson__course__teacher_id=teacher_id,
+            status=TaskSolutionStatus.WAITING,
+        )
+        .order_by("timestamp", "id")
+        .limit(config.INBOX_OLDEST_SOLUTIONS_COUNT)
+        .values(
+            student_username="student__username",
+            course_id="task__lesson__course_id",
+            lesson_id="task__lesson_id",
+            task_id="task_id",
+            solution_id="id",
+            task_title="task__title",
+            timestamp="timestamp",
+        )
+    )
@@ -5,13 +5,19 @@ from typing import List, TypedDict
 from tortoise.query_utils import Prefetch
 
 from app import exceptions
-from app.db.models import Course, Lesson, Task, TaskSolution, User
+from app.db import create_with_order_index
+from app.db.models import Lesson, Task, TaskSolution, User
 from app.db.models.task_solution import TaskSolutionStatus
+from app.services.ancestry_service import (
+    get_lesson_ancestry,
+    remember_lesson_ancestry,
+)
 from app.services.course_service import (
     get_course_by_id,
+    has_course_access,
     is_course_teacher,
-    raise_for_course_access,
 )
+from app.services.page_cache_service import forget_course_pages
 
 
 class TaskData(TypedDict, total=False):
@@ -45,8 +51,11 @@ async def _get_lesson_by_id(lesson_id: int) -> Lesson:
 
 async def _raise_for_lesson_access(lesson: Lesson, user: User):
     """Выбрасываем ошибку, если курс закрытый и пользователь в нём нет."""
-    course = await lesson.course
-    await raise_for_course_access(course, user)
+    ancestry = await get_lesson_ancestry(lesson.id)
+    if not await has_course_access(
+        ancestry.course_id, ancestry.teacher_id, ancestry.is_private, user
+    ):
+        raise exceptions.NotEnoughAccessRights()
 
 
 async def _get_lesson_tasks(lesson: Lesson, user: User) -> List[TaskData]:
@@ -60,6 +69,12 @@ async def _get_lesson_tasks_with_solutions(
     lesson: Lesson, user: User
 ) -> List[Task]:
     """Получение списка задач урока с их решением."""
+    if not user.is_authenticated:
+        tasks = await Task.filter(lesson_id=lesson.id)
+        for task in tasks:
+            task.solution = []
+        return tasks
+
     return await (
         Task.filter(lesson_id=lesson.id).prefetch_related(
             Prefetch(
@@ -92,18 +107,10 @@ async def create_lesson(
     if not await is_course_teacher(course, user):
         raise exceptions.NotEnoughAccessRights()
 
-    order_index = await _get_order_index(course)
-
     title = lesson_data["title"]
-    lesson = await Lesson.create(
-        title=title,
-        order_index=order_index,
-        course=course,
+    lesson = await create_with_order_index(
+        Lesson, "course", course, title=title
     )
+    remember_lesson_ancestry(lesson, course)
+    await forget_course_pages(course.id)
     return lesson
-
-
-async def _get_order_index(course: Course) -> int:
-    """Получение порядкового номера для нового урока."""
-    lessons = await course.lessons
-    return len(lessons)
@@ -0,0 +1,128 @@
+"""Сервис для кэша и ревалидации страниц курсов, уроков и задач.
+
+Страница определяется именем пути, его параметрами и зрителем:
+анонимный пользователь (одна страница на всех), ученик или учитель
+(у каждого своя страница, так как на ней его прогресс и имя),
+а также версиями страниц курса и зрителя, которые хранятся в БД.
+Изменение содержимого курса увеличивает версию курса, а отправка
+и оценка решений и подписка на курс - версию ученика, поэтому
+устаревшие страницы больше не находятся в кэше и вытесняются из него,
+а ETag страницы меняется во всех воркерах.
+
+Чтобы страница из кэша отдавалась без запросов к БД, версии хранятся
+и в памяти воркера: воркер, который изменил версию, видит её сразу,
+а остальные - не позже чем через PAGE_VERSIONS_TTL секунд.
+"""
+
+import hashlib
+import time
+from typing import Dict, Hashable, Optional, Tuple, Type, Union
+
+from tortoise.expressions import F
+from tortoise.models import Model
+
+from app import config
+from app.cache import LRUCache
+from app.db.models import AnonimousUser, Course, User
+
+
+# ключ страницы -> тело страницы
+page_cache = LRUCache(
+    maxsize=config.PAGE_CACHE_SIZE, ttl=config.PAGE_CACHE_TTL
+)
+# (модель, ID) -> версия страниц курса или пользователя из БД
+page_versions = LRUCache(
+    maxsize=config.PAGE_CACHE_SIZE, ttl=config.PAGE_VERSIONS_TTL
+)
+
+
+async def make_page_key(
+    route_name: str,
+    params: Dict[str, str],
+    user: Union[User, AnonimousUser],
+) -> Optional[Tuple[Hashable, ...]]:
+    """Ключ страницы для данного зрителя с текущими версиями.
+
+    Возвращает None, если курса из пути нет.
+    """
+    course_version = await _get_pages_version(Course, int(params["course_id"]))
+    if course_version is None:
+        return None
+
+    if not user.is_authenticated:
+        viewer = ("anonymous",)
+    else:
+        # версия берётся не из кэша пользователей, который
+        # не сбрасывается при изменении версии
+        user_version = await _get_pages_version(User, user.id)
+        viewer = (user.role.value, user.id, user_version)
+        if user.is_teacher:
+            # на странице курса учитель видит пригласительную ссылку,
+            # которая меняется раз в INVITE_TOKEN_BUCKET секунд
+            viewer += (int(time.time()) // config.INVITE_TOKEN_BUCKET,)
+
+    return (
+        route_name,
+        tuple(sorted(params.items())),
+        course_version,
+        viewer,
+    )
+
+
+async def _get_pages_version(
+    model: Type[Model], object_id: int
+) -> Optional[int]:
+    """Версия страниц курса или пользователя, None - если его нет."""
+    key = (model.__name__, object_id)
+    version = page_versions.get(key)
+    if version is None:
+        versions = await model.filter(id=object_id).values_list(
+            "pages_version", flat=True
+        )
+        if not versions:
+            return None
+
+        version = versions[0]
+        page_versions.set(key, version)
+
+    return version
+
+
+def make_page_etag(key: Tuple[Hashable, ...], salt: str) -> str:
+    """Создание ETag страницы из её ключа и хэша шаблонов и статики."""
+    data = repr((salt, key)).encode("u8")
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def get_cached_page(key: Hashable) -> Optional[bytes]:
+    """Получение тела страницы из кэша."""
+    return page_cache.get(key)
+
+
+def cache_page(key: Hashable, body: bytes):
+    """Сохранение тела страницы, если оно не слишком большое."""
+    if len(body) <= config.PAGE_CACHE_MAX_PAGE_SIZE:
+        page_cache.set(key, body)
+
+
+async def forget_course_pages(course_id: int):
+    """Инвалидация страниц курса, его уроков и задач."""
+    await Course.filter(id=course_id).update(
+        pages_version=F("pages_version") + 1
+    )
+    page_versions.pop((Course.__name__, int(course_id)))
+
+
+async def forget_user_pages(*users_ids: int):
+    """Инвалидация страниц, которые видят данные пользователи."""
+    await User.filter(id__in=users_ids).update(
+        pages_version=F("pages_version") + 1
+    )
+    for user_id in users_ids:
+        page_versions.pop((User.__name__, int(user_id)))
+
+
+def clear_page_cache():
+    """Очистка кэша страниц и версий страниц."""
+    page_cache.clear()
+    page_versions.clear()
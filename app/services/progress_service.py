@@ -0,0 +1,146 @@
+"""Сервис для работы с прогрессом учеников по урокам."""
+
+import itertools
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from app.db import execute_query
+from app.db.models import LessonProgress, User
+from app.db.models.task_solution import TaskSolutionStatus
+
+
+# Сколько записей прогресса обновляется одним запросом: у каждой записи
+# 4 параметра, а SQLite принимает не больше 999 параметров в запросе
+PROGRESS_UPSERT_BATCH_SIZE = 999 // 4
+
+
+async def get_lessons_progress(
+    course_id: int, user: User
+) -> Dict[int, LessonProgress]:
+    """Получение прогресса ученика по урокам курса в виде {lesson_id: ...}."""
+    if not user.is_authenticated or not user.is_student:
+        return {}
+
+    progress = await LessonProgress.filter(
+        student_id=user.id, lesson__course_id=course_id
+    )
+    return {
+        lesson_progress.lesson_id: lesson_progress
+        for lesson_progress in progress
+    }
+
+
+class StatusChange(NamedTuple):
+    """Модель смены статуса решения ученика в уроке."""
+
+    student_id: int
+    lesson_id: int
+    old_status: Optional[TaskSolutionStatus]
+    new_status: TaskSolutionStatus
+
+
+async def change_lesson_progress(
+    student_id: int,
+    lesson_id: int,
+    old_status: Optional[TaskSolutionStatus],
+    new_status: TaskSolutionStatus,
+    using_db: Optional[BaseDBAsyncClient] = None,
+):
+    """Учёт смены статуса решения ученика в прогрессе по уроку.
+
+    old_status равен None, если решение только что создано.
+    """
+    await change_lessons_progress(
+        [StatusChange(student_id, lesson_id, old_status, new_status)],
+        using_db=using_db,
+    )
+
+
+async def change_lessons_progress(
+    status_changes: Iterable[StatusChange],
+    using_db: Optional[BaseDBAsyncClient] = None,
+):
+    """Учёт смены статусов нескольких решений в прогрессе по урокам.
+
+    Изменения суммируются по (ученик, урок), и записи прогресса
+    создаются или обновляются одним запросом
+    на каждые PROGRESS_UPSERT_BATCH_SIZE записей.
+    """
+    deltas: Dict[Tuple[int, int], List[int]] = defaultdict(lambda: [0, 0])
+    for student_id, lesson_id, old_status, new_status in status_changes:
+        delta = deltas[(student_id, lesson_id)]
+        delta[0] += _status_delta(
+            TaskSolutionStatus.CORRECT, old_status, new_status
+        )
+        delta[1] += _status_delta(
+            TaskSolutionStatus.WAITING, old_status, new_status
+        )
+
+    rows = [
+        (*key, correct_delta, waiting_delta)
+        for key, (correct_delta, waiting_delta) in deltas.items()
+        if correct_delta or waiting_delta
+    ]
+    for start in range(0, len(rows), PROGRESS_UPSERT_BATCH_SIZE):
+        end = start + PROGRESS_UPSERT_BATCH_SIZE
+        batch = rows[start:end]
+        values_placeholders = ", ".join(
+            ["(?, ?, ?, ?, CURRENT_TIMESTAMP)"] * len(batch)
+        )
+        await execute_query(
+            'INSERT INTO "lessonprogress" '
+            '("student_id", "lesson_id", "correct_count", "waiting_count", '
+            f'"updated_at") VALUES {values_placeholders} '
+            'ON CONFLICT ("student_id", "lesson_id") DO UPDATE SET '
+            '"correct_count" = "lessonprogress"."correct_count" '
+            '+ EXCLUDED."correct_count", '
+            '"waiting_count" = "lessonprogress"."waiting_count" '
+            '+ EXCLUDED."waiting_count", '
+            '"updated_at" = EXCLUDED."updated_at"',
+            *itertools.chain.from_iterable(batch),
+            using_db=using_db,
+        )
+
+
+def _status_delta(
+    status: TaskSolutionStatus,
+    old_status: Optional[TaskSolutionStatus],
+    new_status: TaskSolutionStatus,
+) -> int:
+    """Изменение количества решений с данным статусом."""
+    return int(new_status == status) - int(old_status == status)
+
+
+async def rebuild_lessons_progress():
+    """Пересчёт прогресса всех учеников и количества задач в уроках.
+
+    Нужен для восстановления счётчиков, если они разошлись с решениями.
+    """
+    async with in_transaction() as connection:
+        await execute_query(
+            'DELETE FROM "lessonprogress"', using_db=connection
+        )
+        await execute_query(
+            'INSERT INTO "lessonprogress" '
+            '("student_id", "lesson_id", "correct_count", "waiting_count", '
+            '"updated_at") '
+            'SELECT "tasksolution"."student_id", "task"."lesson_id", '
+            'SUM(CASE WHEN "tasksolution"."status" = ? THEN 1 ELSE 0 END), '
+            'SUM(CASE WHEN "tasksolution"."status" = ? THEN 1 ELSE 0 END), '
+            "CURRENT_TIMESTAMP "
+            'FROM "tasksolution" '
+            'JOIN "task" ON "task"."id" = "tasksolution"."task_id" '
+            'GROUP BY "tasksolution"."student_id", "task"."lesson_id"',
+            TaskSolutionStatus.CORRECT.value,
+            TaskSolutionStatus.WAITING.value,
+            using_db=connection,
+        )
+        await execute_query(
+            'UPDATE "lesson" SET "tasks_count" = '
+            '(SELECT COUNT(*) FROM "task" '
+            'WHERE "task"."lesson_id" = "lesson"."id")',
+            using_db=connection,
+        )
@@ -0,0 +1,203 @@
+"""Сервис для работы с версиями решений задач.
+
+Каждая отправка решения добавляет новую версию. Первая версия
+и каждая SOLUTION_SNAPSHOT_INTERVAL-я после неё хранят всё содержимое,
+остальные - построчные изменения относительно предыдущей версии.
+Поэтому место растёт с объёмом правок, а для восстановления любой
+версии достаточно прочитать не больше SOLUTION_SNAPSHOT_INTERVAL версий.
+"""
+
+import datetime as dt
+import difflib
+import json
+import zlib
+from typing import List, Optional, TypedDict, Union
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app import config
+from app import exceptions
+from app.db.models import SolutionRevision, TaskSolution, User
+from app.services.ancestry_service import get_solution_ancestry
+from app.services.solution_blob_service import BlobAddress
+
+
+class SolutionRevisionData(TypedDict):
+    """Модель данных версии решения (без её содержимого)."""
+
+    number: int
+    extension: str
+    content_size: int
+    timestamp: dt.datetime
+
+
+# Операция изменений: [начало, конец) строк предыдущей версии
+# для копирования или вставляемый текст
+DeltaOperation = Union[List[int], str]
+
+
+async def append_solution_revision(
+    solution: TaskSolution,
+    old_content: Optional[str],
+    content: str,
+    content_address: BlobAddress,
+    using_db: Optional[BaseDBAsyncClient] = None,
+) -> SolutionRevision:
+    """Добавление новой версии решения.
+
+    old_content - содержимое предыдущей версии или None, если версий нет.
+    Вызывается в транзакции, в которой решение заблокировано.
+    """
+    number = solution.revisions_count + 1
+    snapshot = zlib.compress(content.encode())
+    data, is_snapshot = snapshot, True
+    if old_content is not None and not _is_snapshot_number(number):
+        delta = zlib.compress(_encode_delta(old_content, content))
+        if len(delta) < len(snapshot):
+            data, is_snapshot = delta, False
+
+    revision = await SolutionRevision.create(
+        solution=solution,
+        number=number,
+        is_snapshot=is_snapshot,
+        data=data,
+        content_hash=content_address.hash,
+        content_size=content_address.size,
+        extension=solution.extension,
+        using_db=using_db,
+    )
+    solution.revisions_count = number
+    await solution.save(update_fields=["revisions_count"], using_db=using_db)
+    return revision
+
+
+async def get_solution_revisions(
+    solution_id: int, user: User
+) -> List[SolutionRevisionData]:
+    """Получение списка версий решения."""
+    await _raise_for_revisions_access(solution_id, user)
+    return await (
+        SolutionRevision.filter(solution_id=solution_id)
+        .order_by("number")
+        .values("number", "extension", "content_size", "timestamp")
+    )
+
+
+async def get_solution_revision_content(
+    solution_id: int, number: int, user: User
+) -> str:
+    """Получение содержимого версии решения."""
+    await _raise_for_revisions_access(solution_id, user)
+    return await _rebuild_revision_content(solution_id, number)
+
+
+async def diff_solution_revisions(
+    solution_id: int, old_number: int, new_number: int, user: User
+) -> str:
+    """Получение изменений между двумя версиями решения.
+
+    Изменения возвращаются в формате unified diff.
+    """
+    await _raise_for_revisions_access(solution_id, user)
+    old_content = await _rebuild_revision_content(solution_id, old_number)
+    new_content = await _rebuild_revision_content(solution_id, new_number)
+    return "".join(
+        difflib.unified_diff(
+            old_content.splitlines(keepends=True),
+            new_content.splitlines(keepends=True),
+            fromfile=f"revision {old_number}",
+            tofile=f"revision {new_number}",
+        )
+    )
+
+
+async def _raise_for_revisions_access(solution_id: int, user: User):
+    """Выбрасываем ошибку, если пользователь не ученик и не учитель решения.
+
+    Версии решения может смотреть ученик, который его отправил,
+    и учитель курса.
+    """
+    if not user.is_authenticated:
+        raise exceptions.NotEnoughAccessRights()
+
+    ancestry = await get_solution_ancestry(solution_id)
+    if user.id == ancestry.teacher_id:
+        return
+
+    if not await TaskSolution.filter(
+        id=solution_id, student_id=user.id
+    ).exists():
+        raise exceptions.NotEnoughAccessRights()
+
+
+async def _rebuild_revision_content(solution_id: int, number: int) -> str:
+    """Восстановление содержимого версии по ближайшему снимку до неё."""
+    number = int(number)
+    snapshot_number = await (
+        SolutionRevision.filter(
+            solution_id=solution_id, number__lte=number, is_snapshot=True
+        )
+        .order_by("-number")
+        .first()
+        .values_list("number", flat=True)
+    )
+    if not snapshot_number:
+        raise exceptions.SolutionRevisionDoesNotExist()
+
+    (snapshot_number,) = snapshot_number
+    revisions = await (
+        SolutionRevision.filter(
+            solution_id=solution_id,
+            number__gte=snapshot_number,
+            number__lte=number,
+        )
+        .order_by("number")
+        .values_list("number", "is_snapshot", "data")
+    )
+    if revisions[-1][0] != number:
+        raise exceptions.SolutionRevisionDoesNotExist()
+
+    content = ""
+    for _, is_snapshot, data in revisions:
+        data = zlib.decompress(data)
+        if is_snapshot:
+            content = data.decode()
+        else:
+            content = _apply_delta(content, json.loads(data))
+
+    return content
+
+
+def _is_snapshot_number(number: int) -> bool:
+    """Должна ли версия с данным номером хранить всё содержимое."""
+    return (number - 1) % config.SOLUTION_SNAPSHOT_INTERVAL == 0
+
+
+def _encode_delta(old_content: str, content: str) -> bytes:
+    """Кодирование построчных изменений между двумя версиями."""
+    old_lines = old_content.splitlines(keepends=True)
+    lines = content.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, lines, autojunk=False)
+
+    operations: List[DeltaOperation] = []
+    for tag, old_start, old_end, start, end in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([old_start, old_end])
+        elif start < end:
+            operations.append("".join(lines[start:end]))
+
+    return json.dumps(operations, separators=(",", ":")).encode()
+
+
+def _apply_delta(old_content: str, operations: List[DeltaOperation]) -> str:
+    """Применение построчных изменений к предыдущей версии."""
+    old_lines = old_content.splitlines(keepends=True)
+    parts = []
+    for operation in operations:
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            old_start, old_end = operation
+            parts.extend(old_lines[old_start:old_end])
+
+    return "".join(parts)
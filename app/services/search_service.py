@@ -0,0 +1,466 @@
+"""Сервис поиска открытых курсов.
+
+По умолчанию названия и описания открытых курсов хранятся в памяти
+процесса в инвертированном индексе по триграммам. Индекс загружается
+из БД при первом поиске, обновляется при создании и удалении курсов
+и перестраивается раз в SEARCH_INDEX_TTL секунд, чтобы подхватить
+курсы, созданные другими процессами. Отсортированные результаты
+последних запросов хранятся до изменения индекса, поэтому следующие
+страницы того же запроса не ищутся и не сортируются заново.
+
+На PostgreSQL при SEARCH_BACKEND=pg_trgm поиск выполняется в БД
+по GIN-индексам расширения pg_trgm.
+"""
+
+import base64
+import bisect
+import re
+import time
+from collections import defaultdict
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypedDict,
+)
+
+from tortoise import Tortoise
+
+from app import config
+from app import exceptions
+from app.cache import LRUCache
+from app.db import execute_query
+from app.db.models import Course
+
+
+class SearchedCourseData(TypedDict):
+    """Модель данных курса из результата поиска."""
+
+    id: int
+    title: str
+    description: str
+
+
+class SearchPageData(TypedDict):
+    """Модель данных страницы результатов поиска."""
+
+    courses: List[SearchedCourseData]
+    nextCursor: Optional[str]  # noqa: N815
+
+
+class _IndexedCourse(NamedTuple):
+    """Курс в поисковом индексе."""
+
+    data: SearchedCourseData
+    title: str
+    description: str
+    grams: FrozenSet[str]
+    words_grams: Tuple[FrozenSet[str], ...]
+
+
+# (-релевантность, ID курса), по возрастанию которых сортируются результаты
+SortKey = Tuple[float, int]
+
+
+class _SearchResults(NamedTuple):
+    """Отсортированные результаты поиска и их ключи сортировки."""
+
+    courses: List[SearchedCourseData]
+    keys: List[SortKey]
+
+
+PG_TRGM_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS "idx_course_title_trgm" '
+    'ON "course" USING gin (lower("title") gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "idx_course_description_trgm" '
+    'ON "course" USING gin (lower("description") gin_trgm_ops)',
+)
+
+PG_SEARCH_QUERY = (
+    'SELECT "id", "title", "description", "rank" FROM ('
+    'SELECT "id", "title", "description", ('
+    'CASE WHEN lower("title") LIKE ? THEN 1 ELSE 0 END + GREATEST('
+    'word_similarity(?, lower("title")), '
+    'similarity(lower("description"), ?) / 2))::float8 AS "rank" '
+    'FROM "course" WHERE NOT "is_private" AND ('
+    'lower("title") LIKE ? OR lower("description") LIKE ? '
+    'OR ? <% lower("title"))) AS "found" '
+)
+
+
+class CourseSearchIndex:
+    """Инвертированный индекс открытых курсов по триграммам."""
+
+    def __init__(self):
+        """Создание пустого индекса."""
+        self.clear()
+
+    def clear(self):
+        """Очистка индекса."""
+        self._courses: Dict[int, _IndexedCourse] = {}
+        # Триграмма названия или описания -> ID курсов
+        self._grams: Dict[str, Set[int]] = defaultdict(set)
+        # Триграмма отдельного слова с границами -> ID курсов
+        self._words_grams: Dict[str, Set[int]] = defaultdict(set)
+        # Нормализованный запрос -> результаты поиска
+        self._results = LRUCache(maxsize=config.SEARCH_RESULTS_CACHE_SIZE)
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def is_stale(self) -> bool:
+        """Нужно ли заново загрузить индекс из БД."""
+        return (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at > config.SEARCH_INDEX_TTL
+        )
+
+    def load(self, courses: Iterable[SearchedCourseData]):
+        """Заполнение индекса данными всех открытых курсов."""
+        self.clear()
+        for course in courses:
+            self.add(course["id"], course["title"], course["description"])
+
+        self.loaded_at = time.monotonic()
+
+    def add(self, course_id: int, title: str, description: str):
+        """Добавление курса в индекс."""
+        self.remove(course_id)
+        self._results.clear()
+        data = {"id": course_id, "title": title, "description": description}
+        title, description = _normalize(title), _normalize(description)
+        grams = frozenset(_grams(title) | _grams(description))
+        words_grams = tuple(
+            frozenset(_word_grams(word))
+            for word in set(_words(title) + _words(description))
+        )
+        self._courses[course_id] = _IndexedCourse(
+            data=data,
+            title=title,
+            description=description,
+            grams=grams,
+            words_grams=words_grams,
+        )
+        for gram in grams:
+            self._grams[gram].add(course_id)
+        for gram in frozenset().union(*words_grams):
+            self._words_grams[gram].add(course_id)
+
+    def remove(self, course_id: int):
+        """Удаление курса из индекса."""
+        course = self._courses.pop(course_id, None)
+        if course is None:
+            return
+
+        self._results.clear()
+        _discard_posting(self._grams, course.grams, course_id)
+        words_grams = frozenset().union(*course.words_grams)
+        _discard_posting(self._words_grams, words_grams, course_id)
+
+    def search(self, query: str) -> _SearchResults:
+        """Поиск курсов, отсортированных по убыванию релевантности.
+
+        Каждое слово запроса должно входить в название или описание курса.
+        Если таких курсов нет, ищутся курсы с похожими словами,
+        чтобы находить их и при опечатках в запросе.
+        """
+        query = _normalize(query)
+        results = self._results.get(query)
+        if results is None:
+            results = self._search(query.split())
+            self._results.set(query, results)
+
+        return results
+
+    def _search(self, terms: List[str]) -> _SearchResults:
+        """Поиск и сортировка курсов по словам запроса."""
+        found = []
+        if terms:
+            found = self._search_substrings(terms) or self._search_similar(
+                terms
+            )
+            found.sort(key=_sort_key)
+
+        return _SearchResults(
+            courses=[course for _, course in found],
+            keys=[_sort_key(item) for item in found],
+        )
+
+    def _search_substrings(
+        self, terms: List[str]
+    ) -> List[Tuple[float, SearchedCourseData]]:
+        """Поиск курсов, содержащих все слова запроса."""
+        postings = [
+            self._grams.get(gram, set())
+            for term in terms
+            for gram in _grams(term)
+        ]
+        if postings:
+            candidates = set.intersection(*sorted(postings, key=len))
+        else:
+            # Слова запроса короче триграммы, поэтому индекс не поможет
+            candidates = set(self._courses)
+
+        found = []
+        for course_id in candidates:
+            course = self._courses[course_id]
+            score = 0.0
+            for term in terms:
+                term_score = _term_score(term, course)
+                if not term_score:
+                    break
+                score += term_score
+            else:
+                found.append((score, course.data))
+
+        return found
+
+    def _search_similar(
+        self, terms: List[str]
+    ) -> List[Tuple[float, SearchedCourseData]]:
+        """Поиск курсов со словами, похожими на все слова запроса."""
+        terms_grams = [
+            _word_grams(word) for term in terms for word in _words(term)
+        ]
+        candidates = set().union(
+            *(
+                self._words_grams.get(gram, set())
+                for term_grams in terms_grams
+                for gram in term_grams
+            )
+        )
+
+        found = []
+        for course_id in candidates:
+            course = self._courses[course_id]
+            score = 0.0
+            for term_grams in terms_grams:
+                similarity = max(
+                    _similarity(term_grams, word_grams)
+                    for word_grams in course.words_grams
+                )
+                if similarity < config.SEARCH_SIMILARITY_THRESHOLD:
+                    break
+                score += similarity
+            else:
+                found.append((score, course.data))
+
+        return found
+
+
+search_index = CourseSearchIndex()
+
+
+def setup_search(app):
+    """Подготовка поиска при запуске приложения."""
+    app.on_startup.append(_on_startup_prepare_search)
+
+
+async def _on_startup_prepare_search(app):
+    """Создание индексов pg_trgm или загрузка индекса в память."""
+    if _is_pg_trgm_backend():
+        connection = Tortoise.get_connection("default")
+        for index in PG_TRGM_INDEXES:
+            await connection.execute_script(index)
+    else:
+        await load_search_index()
+
+
+async def load_search_index():
+    """Загрузка открытых курсов из БД в индекс."""
+    courses = await Course.filter(is_private=False).values(
+        "id", "title", "description"
+    )
+    search_index.load(courses)
+
+
+def add_course_to_search_index(course: Course):
+    """Добавление только что созданного курса в индекс."""
+    if not course.is_private:
+        search_index.add(course.id, course.title, course.description)
+
+
+def remove_course_from_search_index(course_id: int):
+    """Удаление курса из индекса."""
+    search_index.remove(int(course_id))
+
+
+async def search_public_courses(
+    query: str,
+    limit: int = config.SEARCH_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> SearchPageData:
+    """Поиск открытых курсов по названию и описанию.
+
+    Результаты отдаются страницами по limit курсов. Следующая
+    страница запрашивается по курсору nextCursor из предыдущей.
+    """
+    after = _decode_cursor(cursor) if cursor is not None else None
+    if _is_pg_trgm_backend():
+        return await _search_courses_in_db(query, limit, after)
+
+    if search_index.is_stale:
+        await load_search_index()
+
+    results = search_index.search(query)
+    start = 0
+    if after is not None:
+        start = bisect.bisect_right(results.keys, after)
+
+    end = start + limit
+    next_cursor = None
+    if end < len(results.keys):
+        next_cursor = _encode_cursor(results.keys[end - 1])
+
+    return {
+        "courses": results.courses[start:end],
+        "nextCursor": next_cursor,
+    }
+
+
+async def _search_courses_in_db(
+    query: str, limit: int, after: Optional[SortKey]
+) -> SearchPageData:
+    """Поиск открытых курсов в PostgreSQL по индексам pg_trgm."""
+    query = _normalize(query)
+    pattern = f"%{_escape_like(query)}%"
+    sql = PG_SEARCH_QUERY
+    values = [pattern, query, query, pattern, pattern, query]
+    if after is not None:
+        sql += 'WHERE "rank" < ? OR ("rank" = ? AND "id" > ?) '
+        values += [-after[0], -after[0], after[1]]
+
+    # Лишняя строка показывает, есть ли следующая страница
+    sql += 'ORDER BY "rank" DESC, "id" LIMIT ?'
+    values.append(limit + 1)
+
+    _, rows = await execute_query(sql, *values)
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > len(page):
+        next_cursor = _encode_cursor((-page[-1]["rank"], page[-1]["id"]))
+
+    return {
+        "courses": [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+            }
+            for row in page
+        ],
+        "nextCursor": next_cursor,
+    }
+
+
+def _is_pg_trgm_backend() -> bool:
+    """Выполняется ли поиск в PostgreSQL."""
+    if config.SEARCH_BACKEND != "pg_trgm":
+        return False
+
+    connection = Tortoise.get_connection("default")
+    return connection.capabilities.dialect == "postgres"
+
+
+def _sort_key(item: Tuple[float, SearchedCourseData]) -> SortKey:
+    """Ключ сортировки результата поиска."""
+    score, course = item
+    return -score, course["id"]
+
+
+def _encode_cursor(key: SortKey) -> str:
+    """Кодирование ключа последнего курса страницы в курсор."""
+    raw_cursor = f"{key[0]!r}:{key[1]}".encode()
+    return base64.urlsafe_b64encode(raw_cursor).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> SortKey:
+    """Декодирование курсора в ключ последнего курса страницы."""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw_cursor = base64.urlsafe_b64decode(cursor + padding)
+        score, course_id = raw_cursor.decode().split(":")
+        return float(score), int(course_id)
+    except ValueError:
+        raise exceptions.InvalidSearchCursor()
+
+
+def _normalize(text: str) -> str:
+    """Приведение текста к нижнему регистру с одиночными пробелами."""
+    return " ".join(text.casefold().split())
+
+
+def _words(text: str) -> List[str]:
+    """Разбиение текста на слова."""
+    return re.findall(r"\w+", text)
+
+
+def _grams(text: str) -> Set[str]:
+    """Триграммы текста."""
+    return {"".join(gram) for gram in zip(text, text[1:], text[2:])}
+
+
+def _word_grams(word: str) -> Set[str]:
+    """Триграммы слова с границами, как в pg_trgm."""
+    return _grams(f"  {word} ")
+
+
+def _similarity(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """Доля общих триграмм двух слов."""
+    return len(first & second) / len(first | second)
+
+
+def _term_score(term: str, course: _IndexedCourse) -> float:
+    """Релевантность курса для одного слова запроса.
+
+    Совпадения в названии важнее, чем в описании,
+    а совпадения с началом слова важнее, чем с его серединой.
+    """
+    if course.title == term:
+        return 8.0
+    if course.title.startswith(term):
+        return 6.0
+    if _is_at_word_start(term, course.title):
+        return 4.0
+    if term in course.title:
+        return 3.0
+    if _is_at_word_start(term, course.description):
+        return 2.0
+    if term in course.description:
+        return 1.0
+    return 0.0
+
+
+def _is_at_word_start(term: str, text: str) -> bool:
+    """Входит ли слово запроса в текст с начала какого-либо слова."""
+    start = text.find(term)
+    while start != -1:
+        if start == 0 or not text[start - 1].isalnum():
+            return True
+        start = text.find(term, start + 1)
+
+    return False
+
+
+def _escape_like(text: str) -> str:
+    """Экранирование спецсимволов шаблона LIKE."""
+    return re.sub(r"([\\%_])", r"\\\1", text)
+
+
+def _discard_posting(
+    postings: Dict[str, Set[int]], grams: Iterable[str], course_id: int
+):
+    """Удаление курса из списков курсов по триграммам."""
+    for gram in grams:
+        course_ids = postings.get(gram)
+        if course_ids is None:
+            continue
+
+        course_ids.discard(course_id)
+        if not course_ids:
+            del postings[gram]
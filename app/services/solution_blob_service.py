@@ -0,0 +1,179 @@
+"""Сервис для хранения содержимого решений.
+
+Содержимое решений хранится отдельно от самих решений, сжатым
+и по SHA-256 от содержимого, поэтому одинаковые решения хранятся
+один раз, а запросы к решениям не читают их содержимое.
+
+Содержимое записывается в той же транзакции, что и ссылающееся
+на него решение, и уже после записи решения, а удаление
+неиспользуемого содержимого в PostgreSQL ждёт окончания таких
+транзакций, поэтому не удаляет содержимое, на которое вот-вот
+сошлётся решение.
+"""
+
+import hashlib
+import zlib
+from typing import NamedTuple, Optional
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from app import config
+from app import exceptions
+from app.cache import LRUCache
+from app.db import execute_query, get_table_columns
+from app.db.models import SolutionBlob
+from app.logger import logger
+
+
+class BlobAddress(NamedTuple):
+    """Модель адреса содержимого решения."""
+
+    hash: str
+    size: int
+
+
+# SHA-256 содержимого -> содержимое
+solution_blobs_cache = LRUCache(maxsize=config.SOLUTION_BLOB_CACHE_SIZE)
+
+
+def get_content_address(content: str) -> BlobAddress:
+    """Получение адреса содержимого решения без его сохранения."""
+    data = content.encode()
+    return BlobAddress(hashlib.sha256(data).hexdigest(), len(data))
+
+
+async def save_solution_content(
+    content: str, using_db: Optional[BaseDBAsyncClient] = None
+) -> BlobAddress:
+    """Сохранение содержимого решения, если такого ещё нет."""
+    address = get_content_address(content)
+    await execute_query(
+        'INSERT INTO "solutionblob" ("hash", "data", "size") '
+        'VALUES (?, ?, ?) ON CONFLICT ("hash") DO NOTHING',
+        address.hash,
+        zlib.compress(content.encode()),
+        address.size,
+        using_db=using_db,
+    )
+    return address
+
+
+async def load_solution_content(content_hash: str) -> str:
+    """Получение содержимого решения по его SHA-256."""
+    content = solution_blobs_cache.get(content_hash)
+    if content is None:
+        data = await (
+            SolutionBlob.filter(hash=content_hash)
+            .first()
+            .values_list("data", flat=True)
+        )
+        if not data:
+            raise exceptions.SolutionDoesNotExist()
+
+        (data,) = data
+        content = zlib.decompress(data).decode()
+        solution_blobs_cache.set(content_hash, content)
+
+    return content
+
+
+async def delete_unused_solution_blobs() -> int:
+    """Удаление содержимого, на которое не ссылается ни одно решение.
+
+    Возвращает количество удалённых записей.
+    """
+    async with in_transaction() as connection:
+        if connection.capabilities.dialect == "postgres":
+            # ожидание транзакций, которые пишут решения и их содержимое,
+            # и запрет новых до конца удаления
+            await execute_query(
+                'LOCK TABLE "tasksolution" IN SHARE MODE', using_db=connection
+            )
+        deleted_count, _ = await execute_query(
+            'DELETE FROM "solutionblob" WHERE NOT EXISTS ('
+            'SELECT 1 FROM "tasksolution" '
+            'WHERE "tasksolution"."content_hash" = "solutionblob"."hash")',
+            using_db=connection,
+        )
+
+    return deleted_count
+
+
+def setup_solution_blobs(app):
+    """Перенос содержимого решений из старой схемы при запуске."""
+    app.on_startup.append(_on_startup_move_solutions_content)
+
+
+async def _on_startup_move_solutions_content(app):
+    """Перенос содержимого решений до приёма запросов.
+
+    Без переноса новые решения не сохраняются, так как в старой
+    таблице решений нет адреса содержимого, а столбец content
+    обязателен.
+    """
+    moved_count = await move_solutions_content_to_blobs()
+    if moved_count:
+        logger.warning(f"Содержимое {moved_count} решений перенесено")
+
+
+async def move_solutions_content_to_blobs(batch_size: int = 500) -> int:
+    """Перенос содержимого решений из старого столбца content.
+
+    Для таблицы решений, созданной до хранения содержимого отдельно:
+    содержимое переносится в solutionblob, а столбец content удаляется.
+    Возвращает количество перенесённых решений.
+    """
+    connection = Tortoise.get_connection("default")
+    columns = await get_table_columns(connection, "tasksolution")
+    if "content" not in columns:
+        return 0
+
+    for column, definition in (
+        ("content_hash", "VARCHAR(64) NOT NULL DEFAULT ''"),
+        ("content_size", "INT NOT NULL DEFAULT 0"),
+    ):
+        if column not in columns:
+            await connection.execute_script(
+                'ALTER TABLE "tasksolution" '
+                f'ADD COLUMN "{column}" {definition}'
+            )
+
+    moved_count = 0
+    while True:
+        async with in_transaction() as transaction:
+            _, rows = await execute_query(
+                'SELECT "id", "content" FROM "tasksolution" '
+                "WHERE \"content_hash\" = '' LIMIT ?",
+                batch_size,
+                using_db=transaction,
+            )
+            for row in rows:
+                address = await save_solution_content(
+                    row["content"], using_db=transaction
+                )
+                await execute_query(
+                    'UPDATE "tasksolution" '
+                    'SET "content_hash" = ?, "content_size" = ? '
+                    'WHERE "id" = ?',
+                    address.hash,
+                    address.size,
+                    row["id"],
+                    using_db=transaction,
+                )
+
+        moved_count += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    # в PostgreSQL столбец мог удалить одновременно запущенный воркер
+    if_exists = (
+        "IF EXISTS " if connection.capabilities.dialect == "postgres" else ""
+    )
+    await connection.execute_script(
+        f'ALTER TABLE "tasksolution" DROP COLUMN {if_exists}"content"; '
+        'CREATE INDEX IF NOT EXISTS "idx_tasksolution_content_hash" '
+        'ON "tasksolution" ("content_hash")'
+    )
+    return moved_count
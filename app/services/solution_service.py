@@ -1,15 +1,40 @@
 """Сервис для работы с решениями задач."""
 
+import base64
 import datetime as dt
-from typing import List, Optional, TypedDict
+import json
+from typing import Dict, List, Optional, Tuple, TypedDict
 
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
 from tortoise.query_utils import Q
+from tortoise.transactions import in_transaction
 
+from app import config
 from app import exceptions
 from app.db.models import Course, TaskSolution, User
 from app.db.models.task_solution import TaskSolutionStatus
-from app.services.course_service import get_course_by_id
-from app.services.task_service import _get_task_by_id
+from app.events import broker, student_topic, teacher_topic
+from app.services.ancestry_service import (
+    Ancestry,
+    get_solution_ancestry,
+    get_task_ancestry,
+)
+from app.services.course_service import get_course_by_id, is_course_teacher
+from app.services.grading_service import submit_solution_for_grading
+from app.services.inbox_service import forget_teacher_inbox
+from app.services.page_cache_service import forget_user_pages
+from app.services.progress_service import (
+    StatusChange,
+    change_lesson_progress,
+    change_lessons_progress,
+)
+from app.services.revision_service import append_solution_revision
+from app.services.solution_blob_service import (
+    get_content_address,
+    load_solution_content,
+    save_solution_content,
+)
 
 
 class SolutionData(TypedDict):
@@ -23,8 +48,9 @@ class SolutionData(TypedDict):
 
 
 class WaitingSolutionData(TypedDict):
-    """Модель данных ожидающего решения."""
+    """Модель данных ожидающего решения (без его содержимого)."""
 
+    student_id: int
     student_username: str
     course_id: int
     lesson_id: int
@@ -32,13 +58,29 @@ class WaitingSolutionData(TypedDict):
     solution_id: int
     task_title: str
     timestamp: dt.datetime
-    content: str
 
 
-class WaitingSolutionsData(TypedDict):
-    """Модель данных ожидающих решений."""
+class WaitingSolutionsPageData(TypedDict):
+    """Модель данных страницы очереди ожидающих решений."""
 
     solutions: List[WaitingSolutionData]
+    nextCursor: Optional[str]  # noqa: N815
+
+
+# Режим сортировки -> поля порядка, последнее из которых уникально
+WAITING_SOLUTIONS_ORDERINGS = {
+    "timestamp": ("timestamp", "id"),
+    "student": ("student_id", "timestamp", "id"),
+    "lesson": ("lesson_id", "timestamp", "id"),
+}
+
+# Поле порядка -> ключ в данных ожидающего решения
+_WAITING_SOLUTION_KEYS = {
+    "timestamp": "timestamp",
+    "id": "solution_id",
+    "student_id": "student_id",
+    "lesson_id": "lesson_id",
+}
 
 
 async def get_solution_page_data(solution_id: int, user: User) -> dict:
@@ -70,15 +112,17 @@ async def _is_solution_task_teacher(
     solution: TaskSolution, user: User
 ) -> bool:
     """Является ли пользователь учителем курса данного решения задачи."""
-    teacher = await _get_solution_task_teacher(solution)
-    return user == teacher
+    if not user.is_authenticated:
+        return False
+
+    ancestry = await get_solution_ancestry(solution.id)
+    return user.id == ancestry.teacher_id
 
 
 async def _get_solution_task_teacher(solution: TaskSolution) -> User:
     """Получение учителя курса, в котором находится задача данного решения."""
-    await solution.fetch_related("task__lesson__course__teacher")
-    teacher = solution.task.lesson.course.teacher
-    return teacher
+    ancestry = await get_solution_ancestry(solution.id)
+    return await User.get_by_id(ancestry.teacher_id)
 
 
 async def _get_solution_data(solution: TaskSolution) -> SolutionData:
@@ -90,60 +134,260 @@ async def _get_solution_data(solution: TaskSolution) -> SolutionData:
             task_condition="task__condition",
             student_name="student__username",
             solution_id="id",
-            content="content",
         )
     )
-    return solution_data_list[0]
+    solution_data = solution_data_list[0]
+    solution_data["content"] = await load_solution_content(
+        solution.content_hash
+    )
+    return solution_data
 
 
 async def mark_solution(mark_data: dict, user: User):
     """Обработка JSON-запроса при оценке решения."""
-    solution_id = mark_data["solutionId"]
-    solution = await _get_solution_by_id(solution_id)
-    if not await _is_solution_task_teacher(solution, user):
+    await mark_solutions([mark_data], user)
+
+
+async def mark_solutions(marks_data: List[dict], user: User):
+    """Обработка JSON-запроса при оценке нескольких решений.
+
+    Права учителя на все решения проверяются одним запросом,
+    а статусы и прогресс учеников меняются в одной транзакции
+    несколькими запросами на все решения сразу.
+    """
+    marks = _parse_marks(marks_data)
+    solutions = await _get_marked_solutions(list(marks), user)
+
+    async with in_transaction() as connection:
+        old_statuses = dict(
+            await TaskSolution.select_for_update()
+            .filter(id__in=list(marks))
+            .using_db(connection)
+            .values_list("id", "status")
+        )
+        timestamp = timezone.now()
+        for is_correct in (True, False):
+            solutions_ids = [
+                solution_id
+                for solution_id, is_solution_correct in marks.items()
+                if is_solution_correct == is_correct
+            ]
+            if solutions_ids:
+                await TaskSolution.filter(id__in=solutions_ids).using_db(
+                    connection
+                ).update(status=_mark_status(is_correct), timestamp=timestamp)
+
+        await change_lessons_progress(
+            [
+                StatusChange(
+                    solution["student_id"],
+                    solution["lesson_id"],
+                    TaskSolutionStatus(old_statuses[solution["id"]]),
+                    _mark_status(marks[solution["id"]]),
+                )
+                for solution in solutions
+                # решение могло быть удалено вместе с курсом
+                if solution["id"] in old_statuses
+            ],
+            using_db=connection,
+        )
+
+    forget_teacher_inbox(user.id)
+    await forget_user_pages(
+        *{solution["student_id"] for solution in solutions}
+    )
+    for solution in solutions:
+        event_data = {
+            "solution_id": solution["id"],
+            "course_id": solution["course_id"],
+            "lesson_id": solution["lesson_id"],
+            "task_id": solution["task_id"],
+            "status": _mark_status(marks[solution["id"]]).value,
+        }
+        broker.publish(
+            student_topic(solution["student_id"]),
+            "solution_marked",
+            **event_data,
+        )
+        broker.publish(teacher_topic(user.id), "solution_marked", **event_data)
+
+
+def _parse_marks(marks_data: List[dict]) -> Dict[int, bool]:
+    """Получение оценок в виде {ID решения: зачтено ли решение}."""
+    if not isinstance(marks_data, list) or not marks_data:
+        raise exceptions.InvalidSolutionMarks()
+    if len(marks_data) > config.MARK_SOLUTIONS_MAX_COUNT:
+        raise exceptions.InvalidSolutionMarks()
+
+    try:
+        marks = {
+            int(mark_data["solutionId"]): mark_data["isCorrect"]
+            for mark_data in marks_data
+        }
+    except (KeyError, TypeError, ValueError):
+        raise exceptions.InvalidSolutionMarks()
+
+    # bool("false") == True, поэтому принимаются только true и false
+    if not all(isinstance(is_correct, bool) for is_correct in marks.values()):
+        raise exceptions.InvalidSolutionMarks()
+
+    return marks
+
+
+async def _get_marked_solutions(
+    solutions_ids: List[int], user: User
+) -> List[dict]:
+    """Получение оцениваемых решений с проверкой прав учителя на них."""
+    if not user.is_authenticated:
         raise exceptions.NotEnoughAccessRights()
 
-    is_correct = mark_data["isCorrect"]
-    solution.set_status(is_correct)
-    await solution.save()
+    solutions = await TaskSolution.filter(id__in=solutions_ids).values(
+        "id",
+        "student_id",
+        "task_id",
+        lesson_id="task__lesson_id",
+        course_id="task__lesson__course_id",
+        teacher_id="task__lesson__course__teacher_id",
+    )
+    if len(solutions) != len(solutions_ids):
+        raise exceptions.SolutionDoesNotExist()
+    if any(solution["teacher_id"] != user.id for solution in solutions):
+        raise exceptions.NotEnoughAccessRights()
 
+    return solutions
 
-async def get_waiting_solutions_page_data(course_id: int) -> dict:
+
+def _mark_status(is_correct: bool) -> TaskSolutionStatus:
+    """Статус решения после оценки."""
+    if is_correct:
+        return TaskSolutionStatus.CORRECT
+
+    return TaskSolutionStatus.INCORRECT
+
+
+async def get_waiting_solutions_page_data(
+    course_id: int,
+    user: User,
+    sorted_by: str = "timestamp",
+    cursor: Optional[str] = None,
+) -> dict:
     # точка в начале убирает ошибку D400
     """.
     Получение данных для шаблона страницы
     ожидающих решений данного курса в виде JSON.
     """
     course = await get_course_by_id(course_id)
-    solutions = await _get_course_waiting_solutions(course)
-    return {"course": course, "solutions": solutions}
+    if not await is_course_teacher(course, user):
+        raise exceptions.NotEnoughAccessRights()
 
+    waiting_solutions_page = await _get_course_waiting_solutions(
+        course, sorted_by, cursor
+    )
+    return {
+        "course": course,
+        "solutions": waiting_solutions_page["solutions"],
+        "next_cursor": waiting_solutions_page["nextCursor"],
+        "sorted_by": sorted_by,
+    }
+
+
+async def get_waiting_solutions_page(
+    course_id: int,
+    user: User,
+    sorted_by: str = "timestamp",
+    cursor: Optional[str] = None,
+    limit: int = config.WAITING_SOLUTIONS_PAGE_SIZE,
+) -> WaitingSolutionsPageData:
+    """Получение страницы очереди ожидающих решений курса."""
+    course = await get_course_by_id(course_id)
+    if not await is_course_teacher(course, user):
+        raise exceptions.NotEnoughAccessRights()
 
-async def _get_course_waiting_solutions(
-    course: Course, sorted_by: Optional[str] = "timestamp"
-) -> WaitingSolutionsData:
-    """Получение всех ожидающих решений из данного курса в виде JSON."""
-    base_query = TaskSolution.filter(
-        Q(task__lesson__course=course) & Q(status=TaskSolutionStatus.WAITING)
+    return await _get_course_waiting_solutions(
+        course, sorted_by, cursor, limit
     )
 
-    if sorted_by == "timestamp":
-        query = base_query.order_by("timestamp")
-    elif sorted_by == "student":
-        query = base_query.order_by("student")
-    elif sorted_by == "lesson":
-        query = base_query.order_by("task__lesson")
 
-    return await query.values(
-        student_username="student__username",
-        course_id="task__lesson__course_id",
-        lesson_id="task__lesson_id",
-        task_id="task_id",
-        solution_id="id",
-        task_title="task__title",
-        timestamp="timestamp",
-        content="content",
+async def _get_course_waiting_solutions(
+    course: Course,
+    sorted_by: str = "timestamp",
+    cursor: Optional[str] = None,
+    limit: int = config.WAITING_SOLUTIONS_PAGE_SIZE,
+) -> WaitingSolutionsPageData:
+    """Получение страницы ожидающих решений из данного курса.
+
+    Содержимое решений не загружается. Страницы выбираются по ключу
+    последнего решения предыдущей страницы, а не по смещению, поэтому
+    страницы не сдвигаются, когда решения проверяются. Для каждого
+    порядка есть частичный индекс ожидающих решений по курсу и полям
+    порядка, поэтому каждая страница читает из индекса только limit строк.
+    """
+    ordering = WAITING_SOLUTIONS_ORDERINGS.get(sorted_by)
+    if ordering is None:
+        raise exceptions.InvalidWaitingSolutionsQuery()
+
+    query = TaskSolution.filter(
+        course_id=course.id, status=TaskSolutionStatus.WAITING
     )
+    if cursor is not None:
+        query = query.filter(
+            _after_cursor_filter(ordering, _decode_cursor(cursor, ordering))
+        )
+
+    # Лишняя строка показывает, есть ли следующая страница
+    solutions = await (
+        query.order_by(*ordering)
+        .limit(limit + 1)
+        .values(
+            student_id="student_id",
+            student_username="student__username",
+            course_id="course_id",
+            lesson_id="lesson_id",
+            task_id="task_id",
+            solution_id="id",
+            task_title="task__title",
+            timestamp="timestamp",
+        )
+    )
+    next_cursor = None
+    if len(solutions) > limit:
+        solutions = solutions[:limit]
+        next_cursor = _encode_cursor(
+            [solutions[-1][_WAITING_SOLUTION_KEYS[key]] for key in ordering]
+        )
+
+    return {"solutions": solutions, "nextCursor": next_cursor}
+
+
+def _after_cursor_filter(ordering: Tuple[str, ...], values: list) -> Q:
+    """Условие на то, что решение идёт после решения с данным ключом."""
+    conditions = []
+    for index, field in enumerate(ordering):
+        equal_fields = dict(zip(ordering[:index], values[:index]))
+        conditions.append(Q(**equal_fields, **{f"{field}__gt": values[index]}))
+
+    return Q(*conditions, join_type="OR")
+
+
+def _encode_cursor(values: list) -> str:
+    """Кодирование ключа последнего решения страницы в курсор."""
+    raw_cursor = json.dumps(values, default=dt.datetime.isoformat)
+    return base64.urlsafe_b64encode(raw_cursor.encode()).decode()
+
+
+def _decode_cursor(cursor: str, ordering: Tuple[str, ...]) -> list:
+    """Декодирование курсора в ключ последнего решения страницы."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor))
+        if len(values) != len(ordering):
+            raise ValueError()
+
+        position = ordering.index("timestamp")
+        values[position] = dt.datetime.fromisoformat(values[position])
+    except (ValueError, TypeError):
+        raise exceptions.InvalidWaitingSolutionsQuery()
+
+    return values
 
 
 async def create_or_update_solution(
@@ -155,14 +399,96 @@ async def create_or_update_solution(
 
     content = solution_data["content"].strip()
     extension = solution_data["extension"]
-    task = await _get_task_by_id(task_id)
-
-    solution, _ = await TaskSolution.update_or_create(
-        defaults={
-            "content": content,
-            "extension": extension,
-        },
-        student=user,
-        task=task,
+    ancestry = await get_task_ancestry(task_id)
+
+    try:
+        solution = await _save_solution(
+            task_id, ancestry, content, extension, user
+        )
+    except IntegrityError:
+        # решение этой задачи было одновременно создано другим запросом
+        solution = await _save_solution(
+            task_id, ancestry, content, extension, user
+        )
+
+    forget_teacher_inbox(ancestry.teacher_id)
+    await forget_user_pages(user.id)
+    broker.publish(
+        teacher_topic(ancestry.teacher_id),
+        "solution_submitted",
+        solution_id=solution.id,
+        course_id=ancestry.course_id,
+        lesson_id=ancestry.lesson_id,
+        task_id=int(task_id),
+        student_id=user.id,
+        student_username=user.username,
     )
+    await submit_solution_for_grading(solution)
+    return solution
+
+
+async def _save_solution(
+    task_id: int,
+    ancestry: Ancestry,
+    content: str,
+    extension: str,
+    user: User,
+) -> TaskSolution:
+    """Создание или обновление решения вместе с прогрессом по уроку.
+
+    Решение с изменённым содержимым снова ожидает проверки,
+    а его содержимое сохраняется как новая версия.
+    Содержимое записывается в той же транзакции после решения,
+    чтобы его не удалила очистка неиспользуемого содержимого.
+    """
+    content_address = get_content_address(content)
+    async with in_transaction() as connection:
+        solution = await (
+            TaskSolution.select_for_update()
+            .filter(student_id=user.id, task_id=task_id)
+            .using_db(connection)
+            .first()
+        )
+        old_content = None
+        if solution is None:
+            old_status = None
+            solution = await TaskSolution.create(
+                content_hash=content_address.hash,
+                content_size=content_address.size,
+                extension=extension,
+                student=user,
+                task_id=task_id,
+                lesson_id=ancestry.lesson_id,
+                course_id=ancestry.course_id,
+                using_db=connection,
+            )
+        else:
+            old_status = solution.status
+            if solution.revisions_count:
+                old_content = await load_solution_content(
+                    solution.content_hash
+                )
+            if solution.content_hash != content_address.hash:
+                solution.status = TaskSolutionStatus.WAITING
+            solution.content_hash = content_address.hash
+            solution.content_size = content_address.size
+            solution.extension = extension
+            await solution.save(using_db=connection)
+
+        await save_solution_content(content, using_db=connection)
+        await append_solution_revision(
+            solution,
+            old_content,
+            content,
+            content_address,
+            using_db=connection,
+        )
+        await change_lesson_progress(
+            user.id,
+            ancestry.lesson_id,
+            old_status,
+            solution.status,
+            using_db=connection,
+        )
+
     return solution
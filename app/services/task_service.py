@@ -2,15 +2,24 @@
 
 from typing import TypedDict
 
+from tortoise.expressions import F
+
 from app import exceptions
+from app.db import create_with_order_index
 from app.db.models import Lesson, Task, TaskSolution, User
 from app.db.models.task_solution import TaskSolutionStatus
+from app.services.ancestry_service import (
+    get_task_ancestry,
+    remember_task_ancestry,
+)
 from app.services.course_service import (
     is_course_teacher,
     get_course_by_id,
-    raise_for_course_access,
+    has_course_access,
 )
 from app.services.lesson_service import _get_lesson_by_id
+from app.services.page_cache_service import forget_course_pages
+from app.services.solution_blob_service import load_solution_content
 
 
 class TaskSolutionData(TypedDict):
@@ -30,27 +39,26 @@ async def create_task(
         raise exceptions.NotEnoughAccessRights()
 
     lesson = await _get_lesson_by_id(lesson_id)
-    order_index = await _get_order_index(lesson)
+    if lesson.course_id != course.id:
+        raise exceptions.NotEnoughAccessRights()
 
     title = task_data["title"]
     condition = task_data["condition"]
     example = task_data["example"]
-    task = await Task.create(
+    task = await create_with_order_index(
+        Task,
+        "lesson",
+        lesson,
         title=title,
         condition=condition,
         example=example,
-        order_index=order_index,
-        lesson=lesson,
     )
+    await Lesson.filter(id=lesson.id).update(tasks_count=F("tasks_count") + 1)
+    remember_task_ancestry(task, course)
+    await forget_course_pages(course.id)
     return task
 
 
-async def _get_order_index(lesson: Lesson) -> int:
-    """Получение порядкового номера для новой задачи."""
-    tasks = await lesson.tasks
-    return len(tasks)
-
-
 async def get_task_page_data(task_id: int, user: User) -> dict:
     """Получение данных для шаблона страницы задачи в виде JSON."""
     task = await _get_task_by_id(task_id)
@@ -70,19 +78,27 @@ async def _get_task_by_id(task_id: int) -> Task:
 
 async def _raise_for_task_access(task: Task, user: User):
     """Выбрасываем ошибку, если курс закрытый и пользователь в нём нет."""
-    lesson = await task.lesson
-    course = await lesson.course
-    await raise_for_course_access(course, user)
+    ancestry = await get_task_ancestry(task.id)
+    if not await has_course_access(
+        ancestry.course_id, ancestry.teacher_id, ancestry.is_private, user
+    ):
+        raise exceptions.NotEnoughAccessRights()
 
 
 async def _get_task_solution(task: Task, user: User) -> TaskSolutionData:
     """Получение решения задачи, если таковое имеется."""
+    if not user.is_authenticated:
+        return None
+
     solution_data = await (
         TaskSolution.get_or_none(task=task, student=user).values(
-            "extension", "content", "status"
+            "extension", "content_hash", "status"
         )
     )
     if solution_data:
         (solution_data,) = solution_data
+        solution_data["content"] = await load_solution_content(
+            solution_data.pop("content_hash")
+        )
 
     return solution_data
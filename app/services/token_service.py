@@ -1,41 +1,101 @@
-"""Сервис для работы с зашифрованными данными."""
+"""Сервис для работы с зашифрованными данными.
+
+Пригласительный токен курса выдаётся на интервал времени длиной
+INVITE_TOKEN_BUCKET секунд: в пределах интервала для курса всегда
+создаётся один и тот же токен, поэтому страница курса не меняется
+от запроса к запросу, а подписанные и проверенные токены кэшируются.
+В токене хранится версия приглашений курса, увеличение которой
+отзывает все выданные ранее токены.
+"""
 
 import datetime as dt
+import time
+from typing import NamedTuple
 
 import jwt
 
 from app import config
 from app import exceptions
+from app.cache import LRUCache
+from app.passwords import password_hasher
 
 
-def create_course_invite_link(course_id: int) -> str:
-    """Создание токена для приглашения в курс."""
-    current_time = dt.datetime.utcnow()
-    payload = {
-        "iat": current_time,
-        "exp": current_time + dt.timedelta(seconds=config.TOKEN_EXPIRATION),
-        "course_id": course_id,
-    }
-    return jwt.encode(payload, config.SECRET_KEY, config.JWT_ALGORITHM)
+class CourseInvite(NamedTuple):
+    """Модель данных пригласительного токена."""
 
+    course_id: int
+    version: int
+    expires_at: int
+
+
+# (course_id, version, начало интервала) -> токен
+invite_tokens_cache = LRUCache(maxsize=config.INVITE_CACHE_SIZE)
+# токен -> данные проверенного токена
+verified_invites_cache = LRUCache(maxsize=config.INVITE_CACHE_SIZE)
+
+
+def create_course_invite_link(course_id: int, version: int = 0) -> str:
+    """Создание токена для приглашения в курс.
+
+    Токен действует не меньше TOKEN_EXPIRATION секунд после создания.
+    """
+    bucket = config.INVITE_TOKEN_BUCKET
+    issued_at = int(time.time()) // bucket * bucket
+    key = (int(course_id), int(version), issued_at)
+    token = invite_tokens_cache.get(key)
+    if token is None:
+        payload = {
+            "iat": issued_at,
+            "exp": issued_at + bucket + int(config.TOKEN_EXPIRATION),
+            "course_id": int(course_id),
+            "v": int(version),
+        }
+        token = jwt.encode(payload, config.SECRET_KEY, config.JWT_ALGORITHM)
+        invite_tokens_cache.set(key, token)
+
+    return token
+
+
+def get_course_invite(token: str) -> CourseInvite:
+    """Получаем данные из пригласительного токена.
+
+    Версию из токена нужно сравнить с версией приглашений курса.
+    """
+    invite = verified_invites_cache.get(token)
+    if invite is not None and invite.expires_at > time.time():
+        return invite
 
-def get_course_id_from_token(token: str) -> int:
-    """Получаем ID курса из пригласительного токена."""
     try:
         token_data = jwt.decode(
             token,
             key=config.SECRET_KEY,
             algorithms=config.JWT_ALGORITHM,
         )
-        course_id = token_data["course_id"]
+        invite = CourseInvite(
+            course_id=token_data["course_id"],
+            version=token_data.get("v", 0),
+            expires_at=token_data["exp"],
+        )
     except Exception:
         raise exceptions.InvalidCourseInvite()
-    else:
-        return course_id
 
+    verified_invites_cache.set(token, invite)
+    return invite
+
+
+def get_course_id_from_token(token: str) -> int:
+    """Получаем ID курса из пригласительного токена."""
+    return get_course_invite(token).course_id
+
+
+async def create_confirmation_token(register_data: dict) -> str:
+    """Создание токена для подтверждения регистрации.
 
-def create_confirmation_token(register_data: dict) -> str:
-    """Создание токена для подтверждения регистрации."""
+    Токен подписан, но не зашифрован, а ссылка с ним хранится в БД
+    в задании на отправку письма, поэтому в токене хранится
+    не пароль, а его хэш.
+    """
+    password_hash = await password_hasher.hash(register_data["password"])
     current_time = dt.datetime.utcnow()
     payload = {
         "iat": current_time,
@@ -43,7 +103,7 @@ def create_confirmation_token(register_data: dict) -> str:
         + dt.timedelta(seconds=config.CONFIRMATION_TOKEN_EXPIRATION),
         "email": register_data["email"],
         "username": register_data["username"],
-        "password": register_data["password"],
+        "password_hash": password_hash,
         "role": register_data["role"],
     }
     return jwt.encode(payload, config.SECRET_KEY, config.JWT_ALGORITHM)
@@ -4,11 +4,12 @@ import tortoise.exceptions
 
 from app import exceptions
 from app.db.models import User
+from app.passwords import needs_rehash
 
 
 async def create_user(user_data: dict) -> User:
     """Создание пользователя по данным."""
-    user = _create_user_from_data(user_data)
+    user = await _create_user_from_data(user_data)
     try:
         await user.save()
     except tortoise.exceptions.IntegrityError:
@@ -17,13 +18,17 @@ async def create_user(user_data: dict) -> User:
         return user
 
 
-def _create_user_from_data(data: dict) -> User:
+async def _create_user_from_data(data: dict) -> User:
     """Создание модели пользователя из данных."""
     user = User(
         email=data["email"],
         username=data["username"],
     )
-    user.set_password(data["password"])
+    if "password_hash" in data:
+        # данные из токена регистрации, пароль в котором уже захэширован
+        user.password_hash = data["password_hash"]
+    else:
+        await user.set_password(data["password"])
     user.set_role(data["role"])
     return user
 
@@ -34,7 +39,12 @@ async def get_user(email: str, password: str) -> User:
     if user is None:
         raise exceptions.UserDoesNotExist()
 
-    if not user.check_password(password):
+    if not await user.check_password(password):
         raise exceptions.IncorrectPassword()
 
+    if needs_rehash(user.password_hash):
+        # старый хэш заменяется, пока известен пароль
+        await user.set_password(password)
+        await user.save(update_fields=["password_hash"])
+
     return user
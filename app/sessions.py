@@ -0,0 +1,108 @@
+"""Модуль с хранилищами сессий.
+
+По умолчанию сессия шифруется целиком (EncryptedCookieStorage).
+Облегчённый вариант - подписанная HMAC кука: данные сессии
+(идентификатор, роль и имя пользователя) не секретны,
+поэтому их достаточно защитить от подделки, а не шифровать.
+"""
+
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional
+
+from aiohttp.web import Request
+from aiohttp_session import AbstractStorage, Session
+from aiohttp_session.cookie_storage import EncryptedCookieStorage
+
+from app import config
+from app.logger import logger
+
+
+class SignedCookieStorage(AbstractStorage):
+    """Хранилище сессии в компактной JSON-куке с подписью HMAC-SHA256."""
+
+    def __init__(self, secret_key: bytes, **kwargs):
+        """Создание хранилища, подписывающего куки ключом secret_key."""
+        kwargs.setdefault(
+            "encoder", functools.partial(json.dumps, separators=(",", ":"))
+        )
+        super().__init__(**kwargs)
+        self._secret_key = secret_key
+
+    async def load_session(self, request: Request) -> Session:
+        """Загрузка сессии из куки; без куки подпись не проверяется."""
+        cookie = self.load_cookie(request)
+        if cookie is None:
+            return Session(None, data=None, new=True, max_age=self.max_age)
+
+        data = self._load_cookie_data(cookie)
+        if data is None:
+            logger.warning("Неверная подпись куки сессии")
+            return Session(None, data=None, new=True, max_age=self.max_age)
+
+        return Session(None, data=data, new=False, max_age=self.max_age)
+
+    async def save_session(self, request: Request, response, session: Session):
+        """Сохранение сессии в подписанную куку."""
+        if session.empty:
+            return self.save_cookie(response, "", max_age=session.max_age)
+
+        payload = self._encoder(self._get_session_data(session))
+        self.save_cookie(
+            response,
+            self._dump_cookie_data(payload.encode("u8")),
+            max_age=session.max_age,
+        )
+
+    def _dump_cookie_data(self, payload: bytes) -> str:
+        """Кодирование данных сессии вместе с подписью."""
+        payload = _b64encode(payload)
+        signature = _b64encode(self._sign(payload))
+        return f"{payload}.{signature}"
+
+    def _load_cookie_data(self, cookie: str) -> Optional[dict]:
+        """Получение данных сессии из куки, если подпись верна."""
+        payload, _, signature = cookie.partition(".")
+        try:
+            signature = _b64decode(signature)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            data = self._decoder(_b64decode(payload).decode("u8"))
+        except ValueError:
+            return None
+
+        if self.max_age is not None:
+            if data.get("created", 0) + self.max_age < time.time():
+                return None
+
+        return data
+
+    def _sign(self, payload: str) -> bytes:
+        """Подпись закодированных данных сессии."""
+        return hmac.new(
+            self._secret_key, payload.encode("ascii"), hashlib.sha256
+        ).digest()
+
+
+def _b64encode(data: bytes) -> str:
+    """Кодирование в base64 без выравнивающих символов."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    """Декодирование base64 без выравнивающих символов."""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def create_session_storage() -> AbstractStorage:
+    """Создание хранилища сессий, выбранного в конфигурации."""
+    if config.SESSION_STORAGE == "signed":
+        return SignedCookieStorage(config.SECRET_KEY)
+    elif config.SESSION_STORAGE == "encrypted":
+        return EncryptedCookieStorage(config.SECRET_KEY)
+
+    raise ValueError(f"Неизвестное хранилище сессий: {config.SESSION_STORAGE}")
@@ -0,0 +1,150 @@
+"""Модуль с пулом постоянных соединений к SMTP-серверу.
+
+Вместо нового TCP и TLS соединения с авторизацией на каждое письмо
+письма отправляются через открытые соединения, которые остаются
+в пуле между отправками. Перед использованием соединение, которое
+простаивало дольше SMTP_NOOP_INTERVAL секунд, проверяется командой
+NOOP, а если сервер закрыл соединение во время отправки, письмо
+отправляется ещё раз через новое соединение.
+"""
+
+import asyncio
+import time
+from email.message import Message
+from typing import List, Optional, Tuple
+
+import aiosmtplib
+
+from app import config
+
+
+# Ошибки, после которых соединение больше не используется
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+)
+
+
+class SMTPPool:
+    """Пул соединений к SMTP-серверу."""
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        use_tls: bool,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = config.SMTP_POOL_SIZE,
+    ):
+        """Создание пула, соединения открываются при первой отправке."""
+        self.hostname = hostname
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.size = size
+        # Семафор создаётся при первой отправке: в Python 3.9 он
+        # запоминает event loop при создании, а пул создаётся при импорте
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Свободные соединения и время их последнего использования
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []
+
+    async def send(self, message: Message):
+        """Отправка письма через свободное соединение."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+
+        async with self._semaphore:
+            client = await self._acquire()
+            try:
+                await client.send_message(message)
+            except CONNECTION_ERRORS:
+                # сервер закрыл соединение, пока оно было в пуле
+                client.close()
+                client = await self._connect()
+                await self._send_or_close(client, message)
+            except Exception:
+                client.close()
+                raise
+
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self):
+        """Закрытие всех свободных соединений."""
+        self._semaphore = None
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except (aiosmtplib.SMTPException, ConnectionError):
+                client.close()
+
+    @property
+    def idle_count(self) -> int:
+        """Количество свободных соединений."""
+        return len(self._idle)
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        """Получение рабочего соединения из пула или нового соединения."""
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if not client.is_connected:
+                continue
+
+            if time.monotonic() - last_used >= config.SMTP_NOOP_INTERVAL:
+                try:
+                    await client.noop()
+                except (aiosmtplib.SMTPException, ConnectionError):
+                    client.close()
+                    continue
+
+            return client
+
+        return await self._connect()
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """Открытие соединения и авторизация."""
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            timeout=config.SMTP_TIMEOUT,
+        )
+        await client.connect()
+        if self.username:
+            try:
+                await client.login(self.username, self.password)
+            except Exception:
+                client.close()
+                raise
+
+        return client
+
+    async def _send_or_close(self, client: aiosmtplib.SMTP, message: Message):
+        """Отправка письма, при ошибке соединение закрывается."""
+        try:
+            await client.send_message(message)
+        except Exception:
+            client.close()
+            raise
+
+
+smtp_pool = SMTPPool(
+    hostname=config.SMTP_HOSTNAME,
+    port=config.SMTP_PORT,
+    use_tls=config.SMTP_USE_TLS,
+    username=config.CONFIRMATION_EMAIL_USERNAME,
+    password=config.CONFIRMATION_EMAIL_PASSWORD,
+)
+
+
+def setup_smtp(app):
+    """Закрытие соединений пула при остановке приложения."""
+    app.on_cleanup.append(_on_cleanup_close_smtp)
+
+
+async def _on_cleanup_close_smtp(app):
+    """Закрытие соединений пула."""
+    await smtp_pool.close()
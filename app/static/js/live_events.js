@@ -0,0 +1,13 @@
+function listenEvents(handlers) {
+    if (!window.EventSource) { return };
+    var source = new EventSource("/events");
+    for (const [eventType, handler] of Object.entries(handlers)) {
+        source.addEventListener(eventType, event => {
+            handler(JSON.parse(event.data));
+        });
+    };
+}
+
+function showQueueChanged() {
+    document.getElementById("queueChanged").hidden = false;
+}
@@ -0,0 +1,12 @@
+function revokeCourseInvites(courseId) {
+    $.ajax({
+        url: `/course/${courseId}/revoke_invites`,
+        type: "POST",
+        success: response => {
+            window.location.reload();
+        },
+        error: (request, status, error) => {
+            console.log(error);
+        }
+    });
+}
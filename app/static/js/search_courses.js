@@ -1,30 +1,47 @@
+var nextCursor = null;
+
 function performSearch() {
     var requestText = $("#searchInput").val();
     if(requestText) {
-        $.ajax({
-            url: `/search_courses?q=${requestText}`,
-            type: "POST",
-            success: response => {
-                if (response.error) { console.log(response.error) }
-                else { drawCoursesCards(response.courses) };
-            },
-            error: (request, status, error) => {
-                console.log(error);
-            }
-        })
+        requestCourses(requestText, null);
     };
 }
 
-function drawCoursesCards(courses) {
+function loadMoreCourses() {
+    var requestText = $("#searchInput").val();
+    if(requestText && nextCursor) {
+        requestCourses(requestText, nextCursor);
+    };
+}
+
+function requestCourses(requestText, cursor) {
+    var url = `/search_courses?q=${encodeURIComponent(requestText)}`;
+    if (cursor) { url += `&cursor=${encodeURIComponent(cursor)}` };
+    $.ajax({
+        url: url,
+        type: "POST",
+        success: response => {
+            if (response.error) { console.log(response.error) }
+            else { drawCoursesCards(response.courses, Boolean(cursor), response.nextCursor) };
+        },
+        error: (request, status, error) => {
+            console.log(error);
+        }
+    })
+}
+
+function drawCoursesCards(courses, append, cursor) {
     var cardsGrid = document.getElementById("cardsGrid");
-    clearCardsGrid(cardsGrid);
+    if (!append) { clearCardsGrid(cardsGrid) };
     if (Array.isArray(courses) && courses.length) {
         courses.forEach(function(course) {
             drawCourseCard(cardsGrid, course);
         });
-    } else {
+    } else if (!append) {
         respondEmptyResult(cardsGrid);
     };
+    nextCursor = cursor;
+    document.getElementById("loadMoreButton").hidden = !nextCursor;
 }
 
 function clearCardsGrid(cardsGrid) {
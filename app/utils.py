@@ -1,27 +1,65 @@
 """Модуль с разными полезными функциями."""
 
-from typing import Union
+import datetime as dt
+import json
+from typing import Any, Union
 
 from aiohttp.web import Request
 from aiohttp_security import authorized_userid
+from aiohttp_session import STORAGE_KEY
 from yarl import URL
 
 from app.db.models import AnonimousUser, User
 
 
+CURRENT_USER_KEY = "current_user"
+
+
 async def get_current_user(request: Request) -> Union[User, AnonimousUser]:
     """Обёртка над authorized_userid.
 
     При анонимном доступе, функция (authorized_userid) возвращает None,
     поэтому нужно её перехватывать и заменять None на экземляр AnonimousUser.
+
+    Пользователь запоминается в запросе, поэтому повторный вызов
+    (например, при рендере страницы ошибки) не обращается к БД.
+    Если у запроса нет куки сессии, то сессия не загружается вовсе.
     """
-    user = await authorized_userid(request)
+    user = request.get(CURRENT_USER_KEY)
+    if user is not None:
+        return user
+
+    if has_session_cookie(request):
+        user = await authorized_userid(request)
     if user is None:
         user = AnonimousUser()
 
+    request[CURRENT_USER_KEY] = user
     return user
 
 
+def has_session_cookie(request: Request) -> bool:
+    """Есть ли в запросе кука сессии."""
+    storage = request.get(STORAGE_KEY)
+    if storage is None:
+        return True
+
+    return storage.cookie_name in request.cookies
+
+
 def get_route(request: Request, route: str, **params) -> URL:
     """Обёртка над request.app.router[...].url_for(...)."""
     return request.app.router[route].url_for(**params)
+
+
+def json_dumps(data: Any) -> str:
+    """Сериализация в JSON, в том числе дат и времени."""
+    return json.dumps(data, default=_json_default)
+
+
+def _json_default(value: Any) -> str:
+    """Сериализация значений, которые json не поддерживает сам."""
+    if isinstance(value, dt.date):
+        return value.isoformat()
+
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
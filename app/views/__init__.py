@@ -3,6 +3,7 @@
 import itertools
 
 from app.views import course_handler
+from app.views import event_handler
 from app.views import index_hander
 from app.views import lesson_handler
 from app.views import solution_handler
@@ -13,6 +14,7 @@ from app.views import user_handler
 
 routes = itertools.chain(
     course_handler.routes,
+    event_handler.routes,
     index_hander.routes,
     lesson_handler.routes,
     solution_handler.routes,
@@ -4,13 +4,16 @@ import aiohttp_jinja2
 from aiohttp import web
 from aiohttp.web import Response, Request
 
+from app import config
 from app import exceptions
+from app.rendering import cached_page, streamed_template
 from app.services import (
     get_course_page_data,
     create_course,
-    search_courses_by_title,
+    search_public_courses,
     on_course_subscribe_button_click,
     delete_course,
+    revoke_course_invites,
 )
 from app.utils import get_current_user, get_route
 
@@ -19,7 +22,8 @@ routes = web.RouteTableDef()
 
 
 @routes.get(r"/course/{course_id:\d+}", name="course")
-@aiohttp_jinja2.template("course.html")
+@cached_page
+@streamed_template("course.html")
 async def course(request: Request) -> Response:
     """Страница курса."""
     course_id = request.match_info["course_id"]
@@ -71,15 +75,26 @@ async def search_courses(request: Request) -> Response:
     return {"user": user}
 
 
-@routes.post("/search_courses")
+@routes.post("/search_courses", name="handle_search_courses")
 async def handle_search_courses(request: Request) -> Response:
     """Обработка запроса поиска курса."""
     query = request.query.get("q", None)
     if query is None:
         return web.json_response({"error": "query param is missing"})
 
-    courses = await search_courses_by_title(query)
-    return web.json_response({"courses": courses})
+    try:
+        limit = int(request.query.get("limit", config.SEARCH_PAGE_SIZE))
+    except ValueError:
+        return web.json_response({"error": "limit param is invalid"})
+
+    limit = min(max(limit, 1), config.SEARCH_MAX_PAGE_SIZE)
+    cursor = request.query.get("cursor", None)
+    try:
+        search_page = await search_public_courses(query, limit, cursor)
+    except exceptions.InvalidSearchCursor:
+        return web.json_response({"error": "cursor param is invalid"})
+    else:
+        return web.json_response(search_page)
 
 
 @routes.post(r"/subscribe/{course_id:\d+}")
@@ -87,8 +102,15 @@ async def handle_course_subscribe(request: Request) -> Response:
     """Обработка запроса на запись в курс."""
     course_id = request.match_info["course_id"]
     user = await get_current_user(request)
-    json_response = await on_course_subscribe_button_click(course_id, user)
-    return web.json_response(json_response)
+
+    try:
+        json_response = await on_course_subscribe_button_click(course_id, user)
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    except exceptions.CourseDoesNotExist:
+        return web.json_response({"error": "course does not exist"})
+    else:
+        return web.json_response(json_response)
 
 
 @routes.post(r"/delete_course/{course_id:\d+}", name="delete_course")
@@ -104,3 +126,19 @@ async def handle_delete_course(request: Request) -> Response:
     else:
         route = get_route(request, "index")
         return web.HTTPFound(location=route)
+
+
+@routes.post(r"/course/{course_id:\d+}/revoke_invites")
+async def handle_revoke_course_invites(request: Request) -> Response:
+    """Обработка запроса на отзыв пригласительных токенов курса."""
+    course_id = request.match_info["course_id"]
+    user = await get_current_user(request)
+
+    try:
+        await revoke_course_invites(course_id, user)
+    except exceptions.CourseDoesNotExist:
+        return web.json_response({"error": "course does not exist"})
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    else:
+        return web.json_response({})
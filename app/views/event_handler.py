@@ -0,0 +1,60 @@
+"""Модуль с хэндлером потока событий."""
+
+import json
+
+from aiohttp import web
+from aiohttp.web import Response, Request, StreamResponse
+
+from app import config
+from app.events import broker, student_topic, teacher_topic
+from app.utils import get_current_user
+
+
+routes = web.RouteTableDef()
+
+
+@routes.get("/events", name="events")
+async def events(request: Request) -> StreamResponse:
+    """Поток событий пользователя (Server-Sent Events).
+
+    Учитель получает события об отправке и оценке решений в своих курсах,
+    а ученик - об оценке своих решений.
+    """
+    user = await get_current_user(request)
+    if not user.is_authenticated:
+        return Response(status=401)
+
+    if user.is_teacher:
+        topic = teacher_topic(user.id)
+    else:
+        topic = student_topic(user.id)
+
+    response = StreamResponse(
+        headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+    await response.prepare(request)
+    await response.write(b"retry: 3000\n\n")
+
+    with broker.subscribe([topic]) as subscription:
+        try:
+            while True:
+                event = await subscription.get(config.EVENTS_PING_INTERVAL)
+                if subscription.is_closed:
+                    break
+                if event is None:
+                    # комментарий не даёт прокси закрыть соединение
+                    await response.write(b": ping\n\n")
+                    continue
+
+                data = json.dumps(event.data)
+                await response.write(
+                    f"event: {event.type}\ndata: {data}\n\n".encode()
+                )
+        except ConnectionResetError:
+            pass
+
+    return response
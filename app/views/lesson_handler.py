@@ -5,6 +5,7 @@ from aiohttp import web
 from aiohttp.web import Response, Request
 
 from app import exceptions
+from app.rendering import cached_page, streamed_template
 from app.services import (
     get_course_by_id,
     is_course_teacher,
@@ -18,7 +19,8 @@ routes = web.RouteTableDef()
 
 
 @routes.get(r"/course/{course_id:\d+}/lesson/{lesson_id:\d+}", name="lesson")
-@aiohttp_jinja2.template("lesson.html")
+@cached_page
+@streamed_template("lesson.html")
 async def lesson(request: Request) -> Response:
     """Страница урока из курса."""
     lesson_id = request.match_info["lesson_id"]
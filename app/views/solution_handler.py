@@ -4,14 +4,22 @@ import aiohttp_jinja2
 from aiohttp import web
 from aiohttp.web import Response, Request
 
+from app import config
 from app import exceptions
+from app.rendering import streamed_template
 from app.services import (
     get_solution_page_data,
+    get_teacher_inbox,
+    get_waiting_solutions_page,
     get_waiting_solutions_page_data,
     create_or_update_solution,
+    diff_solution_revisions,
+    get_solution_revision_content,
+    get_solution_revisions,
     mark_solution,
+    mark_solutions,
 )
-from app.utils import get_current_user
+from app.utils import get_current_user, json_dumps
 
 
 routes = web.RouteTableDef()
@@ -42,20 +50,85 @@ async def solution(request: Request) -> Response:
     r"/course/{course_id:\d+}/waiting_solutions",
     name="waiting_solutions",
 )
-@aiohttp_jinja2.template("waiting_solutions.html")
+@streamed_template("waiting_solutions.html")
 async def waiting_solutions(request: Request) -> Response:
     """Страница ожидающих решений из данного курса."""
     course_id = request.match_info["course_id"]
     user = await get_current_user(request)
 
+    sorted_by = request.query.get("sorted_by", "timestamp")
+    cursor = request.query.get("cursor", None)
+
     try:
-        page_data = await get_waiting_solutions_page_data(course_id, user)
+        page_data = await get_waiting_solutions_page_data(
+            course_id, user, sorted_by, cursor
+        )
+    except exceptions.CourseDoesNotExist:
+        raise web.HTTPNotFound()
     except exceptions.NotEnoughAccessRights:
         raise web.HTTPForbidden()
+    except exceptions.InvalidWaitingSolutionsQuery:
+        raise web.HTTPBadRequest()
     else:
         return {"user": user, **page_data}
 
 
+@routes.post(r"/course/{course_id:\d+}/waiting_solutions")
+async def handle_waiting_solutions(request: Request) -> Response:
+    """Обработка запроса страницы ожидающих решений в виде JSON."""
+    course_id = request.match_info["course_id"]
+    user = await get_current_user(request)
+    sorted_by = request.query.get("sorted_by", "timestamp")
+    cursor = request.query.get("cursor", None)
+    try:
+        limit = int(
+            request.query.get("limit", config.WAITING_SOLUTIONS_PAGE_SIZE)
+        )
+    except ValueError:
+        return web.json_response({"error": "limit param is invalid"})
+
+    limit = min(max(limit, 1), config.WAITING_SOLUTIONS_MAX_PAGE_SIZE)
+    try:
+        waiting_solutions_page = await get_waiting_solutions_page(
+            course_id, user, sorted_by, cursor, limit
+        )
+    except exceptions.CourseDoesNotExist:
+        return web.json_response({"error": "course does not exist"})
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    except exceptions.InvalidWaitingSolutionsQuery:
+        return web.json_response({"error": "sorted_by or cursor is invalid"})
+    else:
+        return web.json_response(waiting_solutions_page, dumps=json_dumps)
+
+
+@routes.get("/inbox", name="inbox")
+@aiohttp_jinja2.template("inbox.html")
+async def inbox(request: Request) -> Response:
+    """Страница ожидающих решений из всех курсов учителя."""
+    user = await get_current_user(request)
+
+    try:
+        teacher_inbox = await get_teacher_inbox(user)
+    except exceptions.NotEnoughAccessRights:
+        raise web.HTTPForbidden()
+    else:
+        return {"user": user, "inbox": teacher_inbox}
+
+
+@routes.post("/inbox")
+async def handle_inbox(request: Request) -> Response:
+    """Обработка запроса ожидающих решений из всех курсов учителя."""
+    user = await get_current_user(request)
+
+    try:
+        teacher_inbox = await get_teacher_inbox(user)
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    else:
+        return web.json_response(teacher_inbox, dumps=json_dumps)
+
+
 @routes.post(r"/submit_solution/{task_id:\d+}")
 async def handle_task_solution(request: Request) -> Response:
     """Обработка загрузки решения задачи."""
@@ -77,11 +150,106 @@ async def handle_task_solution(request: Request) -> Response:
 async def handle_mark_solution(request: Request) -> Response:
     """Обработка запроса оценивания решения."""
     mark_data = await request.json()
-    user = await get_current_user(mark_data)
+    user = await get_current_user(request)
 
     try:
-        await mark_solution(request, user)
+        await mark_solution(mark_data, user)
     except exceptions.NotEnoughAccessRights:
         return web.json_response({"error": "Не достаточно прав доступа"})
+    except exceptions.SolutionDoesNotExist:
+        return web.json_response({"error": "Решение не найдено"})
+    except exceptions.InvalidSolutionMarks:
+        return web.json_response({"error": "Неверная оценка решения"})
     else:
         return web.json_response({})
+
+
+@routes.post("/mark_solutions")
+async def handle_mark_solutions(request: Request) -> Response:
+    """Обработка запроса оценивания нескольких решений.
+
+    Тело запроса: {"marks": [{"solutionId": ..., "isCorrect": ...}, ...]}.
+    """
+    request_data = await request.json()
+    user = await get_current_user(request)
+    marks_data = None
+    if isinstance(request_data, dict):
+        marks_data = request_data.get("marks")
+
+    try:
+        await mark_solutions(marks_data, user)
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "Не достаточно прав доступа"})
+    except exceptions.SolutionDoesNotExist:
+        return web.json_response({"error": "Решение не найдено"})
+    except exceptions.InvalidSolutionMarks:
+        return web.json_response({"error": "Неверные оценки решений"})
+    else:
+        return web.json_response({})
+
+
+@routes.post(r"/solution/{solution_id:\d+}/revisions")
+async def handle_solution_revisions(request: Request) -> Response:
+    """Обработка запроса списка версий решения."""
+    solution_id = request.match_info["solution_id"]
+    user = await get_current_user(request)
+
+    try:
+        revisions = await get_solution_revisions(solution_id, user)
+    except exceptions.SolutionDoesNotExist:
+        return web.json_response({"error": "solution does not exist"})
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    else:
+        return web.json_response({"revisions": revisions}, dumps=json_dumps)
+
+
+@routes.post(r"/solution/{solution_id:\d+}/revision/{number:\d+}")
+async def handle_solution_revision(request: Request) -> Response:
+    """Обработка запроса содержимого версии решения."""
+    solution_id = request.match_info["solution_id"]
+    number = request.match_info["number"]
+    user = await get_current_user(request)
+
+    try:
+        content = await get_solution_revision_content(
+            solution_id, number, user
+        )
+    except (
+        exceptions.SolutionDoesNotExist,
+        exceptions.SolutionRevisionDoesNotExist,
+    ):
+        return web.json_response({"error": "revision does not exist"})
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    else:
+        return web.json_response({"content": content})
+
+
+@routes.post(r"/solution/{solution_id:\d+}/diff")
+async def handle_solution_diff(request: Request) -> Response:
+    """Обработка запроса изменений между версиями решения.
+
+    Номера версий передаются в параметрах запроса from и to.
+    """
+    solution_id = request.match_info["solution_id"]
+    user = await get_current_user(request)
+    try:
+        old_number = int(request.query["from"])
+        new_number = int(request.query["to"])
+    except (KeyError, ValueError):
+        return web.json_response({"error": "from or to param is invalid"})
+
+    try:
+        diff = await diff_solution_revisions(
+            solution_id, old_number, new_number, user
+        )
+    except (
+        exceptions.SolutionDoesNotExist,
+        exceptions.SolutionRevisionDoesNotExist,
+    ):
+        return web.json_response({"error": "revision does not exist"})
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    else:
+        return web.json_response({"diff": diff})
@@ -5,8 +5,11 @@ from aiohttp import web
 from aiohttp.web import Response, Request
 
 from app import exceptions
+from app.rendering import cached_page, streamed_template
 from app.services import (
+    add_task_test_case,
     get_task_page_data,
+    get_task_test_cases,
     get_course_by_id,
     is_course_teacher,
     create_task,
@@ -21,7 +24,8 @@ routes = web.RouteTableDef()
     r"/course/{course_id:\d+}/lesson/{lesson_id:\d+}/task/{task_id:\d+}",
     name="task",
 )
-@aiohttp_jinja2.template("task.html")
+@cached_page
+@streamed_template("task.html")
 async def task(request: Request) -> Response:
     """Страница задачи из урока."""
     task_id = request.match_info["task_id"]
@@ -84,3 +88,47 @@ async def handle_create_task(request: Request) -> Response:
             task_id=str(task.id),
         )
         return web.HTTPFound(location=route)
+
+
+@routes.post(
+    r"/course/{course_id:\d+}/lesson/{lesson_id:\d+}"
+    r"/task/{task_id:\d+}/test_cases"
+)
+async def handle_task_test_cases(request: Request) -> Response:
+    """Обработка запроса списка тестов задачи."""
+    task_id = request.match_info["task_id"]
+    user = await get_current_user(request)
+
+    try:
+        test_cases = await get_task_test_cases(task_id, user)
+    except exceptions.TaskDoesNotExist:
+        return web.json_response({"error": "task does not exist"})
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    else:
+        return web.json_response({"testCases": test_cases})
+
+
+@routes.post(
+    r"/course/{course_id:\d+}/lesson/{lesson_id:\d+}"
+    r"/task/{task_id:\d+}/add_test_case"
+)
+async def handle_add_task_test_case(request: Request) -> Response:
+    """Обработка добавления теста к задаче.
+
+    Тело запроса: {"input": ..., "expectedOutput": ...}.
+    """
+    task_id = request.match_info["task_id"]
+    test_case_data = await request.json()
+    user = await get_current_user(request)
+
+    try:
+        test_case = await add_task_test_case(task_id, test_case_data, user)
+    except exceptions.TaskDoesNotExist:
+        return web.json_response({"error": "task does not exist"})
+    except exceptions.NotEnoughAccessRights:
+        return web.json_response({"error": "not enough access rights"})
+    except exceptions.InvalidTestCase:
+        return web.json_response({"error": "test case is invalid"})
+    else:
+        return web.json_response({"id": test_case.id})
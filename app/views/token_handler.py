@@ -3,17 +3,16 @@
 from aiohttp import web
 from aiohttp.web import Response, Request
 import aiohttp_jinja2
-from aiohttp_security import remember
 
 from app import exceptions
+from app.security import remember_user
 from app.services import (
     create_user,
     create_confirmation_token,
-    send_confirmation_email,
+    enqueue_confirmation_email,
     get_register_token_data,
-    get_course_id_from_token,
+    get_course_by_invite,
     subscribe_user_to_course,
-    get_course_by_id,
 )
 from app.utils import get_current_user, get_route
 
@@ -21,14 +20,18 @@ from app.utils import get_current_user, get_route
 routes = web.RouteTableDef()
 
 
-@routes.post("/create_token_confirmation")
+@routes.post("/create_token_confirmation", name="create_token_confirmation")
 async def create_token_confirmation(request: Request) -> Response:
     """Обработка запроса на создание токена удостоверения регистрации."""
     register_data = await request.json()
     email = register_data["email"]
-    token = create_confirmation_token(register_data)
+    try:
+        token = await create_confirmation_token(register_data)
+    except exceptions.PasswordHasherBusy:
+        return web.HTTPServiceUnavailable(headers={"Retry-After": "1"})
+
     confirm_url = make_register_confirm_url(request, token)
-    await send_confirmation_email(email, confirm_url)
+    await enqueue_confirmation_email(email, confirm_url)
     return web.json_response({"email": email})
 
 
@@ -48,9 +51,11 @@ async def handle_register_token(request: Request) -> Response:
         return {"user": user, "is_incorrect_token": True}
     except exceptions.NotUniqueEmail:
         return {"user": user, "is_incorrect_email": True}
+    except exceptions.PasswordHasherBusy:
+        return web.HTTPServiceUnavailable(headers={"Retry-After": "1"})
     else:
         redirect_response = web.HTTPFound("/register/hello")
-        await remember(request, redirect_response, str(user.id))
+        await remember_user(request, redirect_response, user)
         return redirect_response
 
 
@@ -77,8 +82,7 @@ async def confirm_course_invite(request: Request) -> Response:
     invite_token = (await request.json())["invite"]
 
     try:
-        course_id = get_course_id_from_token(invite_token)
-        course = await get_course_by_id(course_id)
+        course = await get_course_by_invite(invite_token)
     except exceptions.InvalidCourseInvite:
         return web.json_response({"error": "Неверное приглашение"})
     except exceptions.CourseDoesNotExist:
@@ -3,9 +3,10 @@
 import aiohttp_jinja2
 from aiohttp import web
 from aiohttp.web import Response, Request
-from aiohttp_security import forget, remember
+from aiohttp_security import forget
 
 from app import exceptions
+from app.security import remember_user
 from app.services import get_user
 from app.utils import get_current_user, get_route
 
@@ -47,7 +48,7 @@ async def login(request: Request) -> Response:
     return {"user": user}
 
 
-@routes.post("/login")
+@routes.post("/login", name="handle_login")
 async def handle_login(request: Request) -> Response:
     """Обработка данных для входа в аккаунт."""
     try:
@@ -59,9 +60,11 @@ async def handle_login(request: Request) -> Response:
     except (exceptions.IncorrectPassword, exceptions.UserDoesNotExist):
         route = get_route(request, "login")
         return web.HTTPFound(location=route)
+    except exceptions.PasswordHasherBusy:
+        return web.HTTPServiceUnavailable(headers={"Retry-After": "1"})
     else:
         redirect_response = web.HTTPFound(location=route)
-        await remember(request, redirect_response, str(user.id))
+        await remember_user(request, redirect_response, user)
         return redirect_response
 
 
@@ -0,0 +1 @@
+"""Пакет с замерами производительности."""
@@ -0,0 +1,77 @@
+"""Замер количества входов в секунду в одном воркере.
+
+Проверка пароля выполняется в пуле потоков, поэтому замеряется
+и пропускная способность, и задержка цикла событий, пока идут входы.
+
+Запуск: `SECRET_KEY=... python -m benchmarks.password_hashing`.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import time
+
+from app import config
+from app.passwords import password_hasher
+
+
+LOGINS = 200
+PASSWORD = "12345678"
+
+
+async def measure_loop_lag(stop: asyncio.Event) -> float:
+    """Максимальная задержка цикла событий, в миллисекундах."""
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+    return max_lag * 1000
+
+
+async def bench_logins(password_hash: str, concurrency: int) -> tuple:
+    """Количество проверок пароля в секунду и задержка цикла событий."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            assert await password_hasher.verify(PASSWORD, password_hash)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return LOGINS / elapsed, await lag_task
+
+
+def bench_legacy() -> float:
+    """Количество проверок старого хэша SHA-256 в секунду."""
+    password_hash = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    start = time.perf_counter()
+    for _ in range(LOGINS):
+        hmac.compare_digest(
+            hashlib.sha256(PASSWORD.encode()).hexdigest(), password_hash
+        )
+    return LOGINS / (time.perf_counter() - start)
+
+
+async def main():
+    """Запуск замеров для нескольких уровней одновременности."""
+    password_hash = await password_hasher.hash(PASSWORD)
+    print(
+        f"scrypt n={config.PASSWORD_SCRYPT_N} r={config.PASSWORD_SCRYPT_R} "
+        f"p={config.PASSWORD_SCRYPT_P}, "
+        f"потоков: {config.PASSWORD_HASH_WORKERS}"
+    )
+    print(f"{'concurrency':<12} {'logins/s':>10} {'max lag, ms':>12}")
+    for concurrency in (1, 4, 16):
+        logins_per_second, lag = await bench_logins(password_hash, concurrency)
+        print(f"{concurrency:<12} {logins_per_second:>10.1f} {lag:>12.2f}")
+
+    print(f"{'sha256':<12} {bench_legacy():>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Сравнение стоимости загрузки и сохранения сессии на один запрос.
+
+Запуск: `SECRET_KEY=... python -m benchmarks.session_storage`.
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+from aiohttp_session.cookie_storage import EncryptedCookieStorage
+
+from app import config
+from app.sessions import SignedCookieStorage
+from app.utils import has_session_cookie
+
+
+ITERATIONS = 20000
+# Identity вошедшего пользователя - его ID (см. app.security.make_identity).
+SESSION_DATA = {"AIOHTTP_SECURITY": "42"}
+
+
+async def make_cookie(storage) -> str:
+    """Получение куки с данными вошедшего пользователя."""
+    session = await storage.new_session()
+    session.update(SESSION_DATA)
+    response = web.Response()
+    await storage.save_session(None, response, session)
+    return response.cookies[storage.cookie_name].value
+
+
+async def bench_load(storage, cookie: str) -> float:
+    """Время загрузки сессии из куки, в микросекундах."""
+    request = make_mocked_request(
+        "GET", "/", headers={"Cookie": f"{storage.cookie_name}={cookie}"}
+    )
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await storage.load_session(request)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+async def bench_save(storage) -> float:
+    """Время сохранения изменённой сессии в куку, в микросекундах."""
+    session = await storage.new_session()
+    session.update(SESSION_DATA)
+    response = web.Response()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await storage.save_session(None, response, session)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def bench_anonymous(storage) -> float:
+    """Время проверки запроса без куки, в микросекундах."""
+    request = make_mocked_request("GET", "/")
+    request["aiohttp_session_storage"] = storage
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        has_session_cookie(request)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+async def main():
+    """Запуск замеров для обоих хранилищ."""
+    storages = {
+        "encrypted": EncryptedCookieStorage(config.SECRET_KEY),
+        "signed": SignedCookieStorage(config.SECRET_KEY),
+    }
+    print(f"{'storage':<10} {'load, us':>10} {'save, us':>10} {'cookie':>8}")
+    for name, storage in storages.items():
+        cookie = await make_cookie(storage)
+        load_time = await bench_load(storage, cookie)
+        save_time = await bench_save(storage)
+        print(
+            f"{name:<10} {load_time:>10.2f} "
+            f"{save_time:>10.2f} {len(cookie):>8}"
+        )
+
+    anonymous_time = bench_anonymous(storages["signed"])
+    print(f"{'anonymous':<10} {anonymous_time:>10.2f} {'-':>10} {'-':>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,12 @@
+"""Файл сборки статических файлов для режима production.
+
+Файлы собираются и при запуске приложения, но сборка при деплое
+избавляет первый запуск от сжатия всех файлов.
+"""
+
+from app import config
+from app.assets import build_assets
+
+
+manifest = build_assets(config.STATIC_PATH, config.ASSETS_PATH)
+print(f"Собрано статических файлов: {len(manifest)}")
@@ -0,0 +1,24 @@
+"""Файл переноса содержимого решений в отдельную таблицу.
+
+Нужен для БД, созданной до хранения содержимого решений отдельно:
+переносит содержимое из столбца content таблицы решений
+в таблицу solutionblob и удаляет этот столбец.
+"""
+
+from tortoise import Tortoise, run_async
+
+from app import config
+from app.services import move_solutions_content_to_blobs
+
+
+async def main():
+    """Подключение к БД и перенос содержимого решений."""
+    await Tortoise.init(
+        db_url=config.DATABASE_URL, modules={"models": ["app.db.models"]}
+    )
+    await Tortoise.generate_schemas(safe=True)
+    moved_count = await move_solutions_content_to_blobs()
+    print(f"Перенесено решений: {moved_count}")
+
+
+run_async(main())
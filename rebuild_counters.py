@@ -0,0 +1,28 @@
+"""Файл пересчёта денормализованных счётчиков в БД.
+
+Пересчитывает прогресс учеников по урокам, количество задач в уроках
+и количество учеников в курсах, а также удаляет содержимое решений,
+на которое больше не ссылается ни одно решение.
+"""
+
+from tortoise import Tortoise, run_async
+
+from app import config
+from app.services import (
+    delete_unused_solution_blobs,
+    rebuild_lessons_progress,
+    rebuild_students_count,
+)
+
+
+async def main():
+    """Подключение к БД, пересчёт счётчиков и очистка содержимого."""
+    await Tortoise.init(
+        db_url=config.DATABASE_URL, modules={"models": ["app.db.models"]}
+    )
+    await rebuild_lessons_progress()
+    await rebuild_students_count()
+    await delete_unused_solution_blobs()
+
+
+run_async(main())
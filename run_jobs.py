@@ -0,0 +1,22 @@
+"""Файл запуска обработчика фоновых заданий отдельным процессом.
+
+Используется вместе с JOB_WORKER_IN_APP=false, чтобы задания
+не выполнялись в процессах, которые обслуживают запросы.
+"""
+
+from tortoise import Tortoise, run_async
+
+from app import config
+from app import services  # noqa: F401 - регистрация функций заданий
+from app.jobs import worker
+
+
+async def main():
+    """Подключение к БД и обработка заданий до остановки процесса."""
+    await Tortoise.init(
+        db_url=config.DATABASE_URL, modules={"models": ["app.db.models"]}
+    )
+    await worker.run()
+
+
+run_async(main())
@@ -1,6 +1,17 @@
 import pytest
 
 from app.db import init_test_db, close_test_db
+from app.security import users_cache
+from app.services.ancestry_service import ancestry_cache
+from app.services.course_service import course_students_cache
+from app.services.inbox_service import inbox_cache
+from app.services.page_cache_service import clear_page_cache
+from app.services.search_service import search_index
+from app.services.solution_blob_service import solution_blobs_cache
+from app.services.token_service import (
+    invite_tokens_cache,
+    verified_invites_cache,
+)
 from app.services import course_service
 from app.services import lesson_service
 from app.services import solution_service
@@ -11,6 +22,15 @@ from app.services import user_service
 @pytest.fixture(autouse=True)
 async def open_test_db():
     await init_test_db()
+    users_cache.clear()
+    ancestry_cache.clear()
+    course_students_cache.clear()
+    inbox_cache.clear()
+    search_index.clear()
+    clear_page_cache()
+    solution_blobs_cache.clear()
+    invite_tokens_cache.clear()
+    verified_invites_cache.clear()
     yield
     await close_test_db()
 
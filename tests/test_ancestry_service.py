@@ -0,0 +1,46 @@
+import pytest
+
+from app import exceptions
+from app.services import ancestry_service, course_service
+
+
+@pytest.mark.asyncio
+async def test_get_task_ancestry(
+    create_teacher, create_course, create_lesson, create_task
+):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher, is_private=True)
+    lesson = await create_lesson(course=course, teacher=teacher)
+    task = await create_task(course=course, lesson=lesson, teacher=teacher)
+
+    ancestry_service.ancestry_cache.clear()
+    ancestry = await ancestry_service.get_task_ancestry(task.id)
+    assert ancestry == (lesson.id, course.id, teacher.id, True)
+    assert ("task", task.id) in ancestry_service.ancestry_cache
+
+    ancestry = await ancestry_service.get_lesson_ancestry(lesson.id)
+    assert ancestry == (lesson.id, course.id, teacher.id, True)
+
+    with pytest.raises(exceptions.TaskDoesNotExist):
+        await ancestry_service.get_task_ancestry(-1)
+    with pytest.raises(exceptions.LessonDoesNotExist):
+        await ancestry_service.get_lesson_ancestry(-1)
+
+
+@pytest.mark.asyncio
+async def test_forget_course_ancestry(
+    create_teacher, create_course, create_lesson, create_task
+):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+    lesson = await create_lesson(course=course, teacher=teacher)
+    task = await create_task(course=course, lesson=lesson, teacher=teacher)
+
+    assert ("lesson", lesson.id) in ancestry_service.ancestry_cache
+    assert ("task", task.id) in ancestry_service.ancestry_cache
+
+    await course_service.delete_course(course.id, teacher)
+    assert ("lesson", lesson.id) not in ancestry_service.ancestry_cache
+    assert ("task", task.id) not in ancestry_service.ancestry_cache
+    with pytest.raises(exceptions.TaskDoesNotExist):
+        await ancestry_service.get_task_ancestry(task.id)
@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import config
+from app.assets import ASSETS_DIGEST_KEY, build_assets, setup_static
+
+
+CSS = b"body { color: black; }\n" * 100
+
+
+@pytest.fixture
+def static_path(tmp_path):
+    path = tmp_path / "static"
+    (path / "css").mkdir(parents=True)
+    (path / "css" / "base.css").write_bytes(CSS)
+    (path / "logo.png").write_bytes(b"png")
+    return path
+
+
+def test_build_assets(static_path, tmp_path):
+    output = tmp_path / "assets"
+    manifest = build_assets(static_path, output)
+    assert set(manifest) == {"css/base.css", "logo.png"}
+
+    css_name = manifest["css/base.css"]
+    assert css_name.startswith("css/base.") and css_name.endswith(".css")
+    assert (output / css_name).read_bytes() == CSS
+    gzip_path = output / "gzip" / css_name
+    assert gzip.decompress(gzip_path.read_bytes()) == CSS
+    # картинки не сжимаются
+    assert not (output / "gzip" / manifest["logo.png"]).exists()
+
+    # сборка без изменений даёт те же имена
+    assert build_assets(static_path, output) == manifest
+
+    (static_path / "css" / "base.css").write_bytes(CSS + b"a {}\n")
+    assert build_assets(static_path, output)["css/base.css"] != css_name
+
+
+@pytest.fixture
+async def make_static_client(monkeypatch, static_path, tmp_path):
+    clients = []
+
+    async def _make_static_client(mode):
+        monkeypatch.setattr(config, "TEMPLATES_MODE", mode)
+        monkeypatch.setattr(config, "STATIC_PATH", static_path)
+        monkeypatch.setattr(config, "ASSETS_PATH", tmp_path / "assets")
+        app = web.Application()
+        setup_static(app)
+        client = TestClient(TestServer(app))
+        await client.start_server()
+        clients.append(client)
+        return client
+
+    yield _make_static_client
+
+    for client in clients:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_development_static(make_static_client):
+    client = await make_static_client("development")
+    url = client.app.router["static"].url_for(filename="css/base.css")
+    assert str(url) == "/static/css/base.css"
+    assert ASSETS_DIGEST_KEY not in client.app
+
+    response = await client.get(url)
+    assert response.status == 200
+    assert await response.read() == CSS
+
+
+@pytest.mark.asyncio
+async def test_production_static(make_static_client):
+    client = await make_static_client("production")
+    url = client.app.router["static"].url_for(filename="css/base.css")
+    assert str(url) != "/static/css/base.css"
+
+    response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Content-Type"].startswith("text/css")
+    assert "immutable" in response.headers["Cache-Control"]
+    assert await response.read() == CSS
+
+    response = await client.get(
+        url, headers={"Accept-Encoding": "gzip;q=0, identity"}
+    )
+    assert "Content-Encoding" not in response.headers
+    assert await response.read() == CSS
+
+    # ссылки на исходные имена работают, но перепроверяются
+    response = await client.get("/static/css/base.css")
+    assert response.status == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = await client.get("/static/missing.css")
+    assert response.status == 404
@@ -0,0 +1,34 @@
+import time
+
+from app.cache import LRUCache
+
+
+def test_lru_cache_get_set():
+    cache = LRUCache(maxsize=2)
+    assert cache.get("a") is None
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+
+    cache.pop("a")
+    assert "a" not in cache
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
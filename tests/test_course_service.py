@@ -2,7 +2,7 @@ import pytest
 
 from app import exceptions
 from app.db.models.user import AnonimousUser
-from app.services import course_service
+from app.services import course_service, search_service
 
 
 @pytest.mark.asyncio
@@ -189,8 +189,8 @@ async def test_search_courses_by_title(create_course):
     for title in (*correct_titles, *incorrect_titles):
         await create_course(title=title)
 
-    courses = await course_service.search_courses_by_title("max")
-    courses_titles = {course["title"] for course in courses}
+    search_page = await search_service.search_public_courses("max")
+    courses_titles = {course["title"] for course in search_page["courses"]}
 
     assert courses_titles == correct_titles
     assert not (courses_titles & incorrect_titles)
@@ -210,3 +210,70 @@ async def test_on_course_subscribe_button_click(create_user, create_course):
         course.id, student
     )
     assert not response["isSubscribed"]
+
+
+@pytest.mark.asyncio
+async def test_is_course_student_cache_invalidation(
+    create_student, create_course
+):
+    student = await create_student()
+    course = await create_course(is_private=True)
+
+    assert not await course_service.is_course_student(course.id, student.id)
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await course_service.raise_for_course_access(course, student)
+
+    await course_service.subscribe_user_to_course(student, course)
+    assert await course_service.is_course_student(course.id, student.id)
+    await course_service.raise_for_course_access(course, student)
+
+    await course_service.toggle_course_subscription(student, course)
+    assert not await course_service.is_course_student(course.id, student.id)
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await course_service.raise_for_course_access(course, student)
+
+
+@pytest.mark.asyncio
+async def test_course_students_count(create_student, create_course):
+    course = await create_course()
+    first_student = await create_student()
+    second_student = await create_student()
+
+    await course_service.toggle_course_subscription(first_student, course)
+    await course_service.subscribe_user_to_course(second_student, course)
+    await course_service.subscribe_user_to_course(second_student, course)
+    course = await course_service.get_course_by_id(course.id)
+    assert course.students_count == 2
+
+    is_subscribed = await course_service.toggle_course_subscription(
+        first_student, course
+    )
+    assert not is_subscribed
+    teacher = await course.teacher
+    page_data = await course_service.get_course_page_data(course.id, teacher)
+    assert page_data["course"].students_count == 1
+
+
+@pytest.mark.asyncio
+async def test_revoke_course_invites(create_teacher, create_student):
+    teacher = await create_teacher()
+    course = await course_service.create_course(
+        {"title": "title", "description": "description"}, teacher
+    )
+    page_data = await course_service.get_course_page_data(course.id, teacher)
+    token = page_data["course_invite_link"]
+    assert (await course_service.get_course_by_invite(token)).id == course.id
+
+    student = await create_student()
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await course_service.revoke_course_invites(course.id, student)
+
+    await course_service.revoke_course_invites(course.id, teacher)
+    with pytest.raises(exceptions.InvalidCourseInvite):
+        await course_service.get_course_by_invite(token)
+
+    page_data = await course_service.get_course_page_data(course.id, teacher)
+    new_token = page_data["course_invite_link"]
+    assert new_token != token
+    course_ = await course_service.get_course_by_invite(new_token)
+    assert course_.id == course.id
@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+from app import db
+from app.db import (
+    INDEXES,
+    _to_numbered_params,
+    add_missing_columns,
+    execute_query,
+)
+from app.db.models import TaskSolution
+from app.db.models.task_solution import TaskSolutionStatus
+from app.services.solution_service import WAITING_SOLUTIONS_ORDERINGS
+
+
+def test_to_numbered_params():
+    query = 'SELECT 1 FROM "t" WHERE "a" = ? AND "b" = ?'
+    assert _to_numbered_params(query) == (
+        'SELECT 1 FROM "t" WHERE "a" = $1 AND "b" = $2'
+    )
+    assert _to_numbered_params("SELECT 1") == "SELECT 1"
+
+
+def test_unique_order_index_for_old_tables():
+    # таблица без unique_together, как до его появления
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        'CREATE TABLE "lesson" ("id" INTEGER PRIMARY KEY, '
+        '"course_id" INT, "order_index" INT)'
+    )
+    connection.executemany(
+        'INSERT INTO "lesson" VALUES (?, ?, ?)',
+        [(1, 1, 0), (2, 1, 1), (3, 1, 1), (4, 1, 1), (5, 2, 1)],
+    )
+    (index,) = [index for index in INDEXES if "uidx_lesson" in index]
+    connection.executescript(index)
+    connection.executescript(index)
+
+    rows = connection.execute(
+        'SELECT "id", "order_index" FROM "lesson" ORDER BY "id"'
+    ).fetchall()
+    assert rows[:2] == [(1, 0), (2, 1)]
+    assert rows[4] == (5, 1)
+    assert len({order_index for _, order_index in rows[:4]}) == 4
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute('INSERT INTO "lesson" VALUES (6, 1, 0)')
+
+
+@pytest.mark.asyncio
+async def test_add_missing_columns(monkeypatch, create_course):
+    course = await create_course()
+    assert await add_missing_columns() == []
+
+    monkeypatch.setattr(
+        db,
+        "COLUMNS",
+        (*db.COLUMNS, ("course", "extra_count", "INT NOT NULL DEFAULT 0")),
+    )
+    assert await add_missing_columns() == [("course", "extra_count")]
+    assert await add_missing_columns() == []
+
+    _, rows = await execute_query(
+        'SELECT "extra_count" FROM "course" WHERE "id" = ?', course.id
+    )
+    assert rows[0]["extra_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_solution_ancestry_columns_backfill(create_solution):
+    solution = await create_solution()
+    task = await solution.task
+    lesson = await task.lesson
+    # таблица решений без копий урока и курса, как до их появления
+    for name in ("timestamp", "student", "lesson"):
+        await execute_query(f'DROP INDEX "idx_tasksolution_waiting_{name}"')
+    for column in ("lesson_id", "course_id"):
+        await execute_query(
+            f'ALTER TABLE "tasksolution" DROP COLUMN "{column}"'
+        )
+
+    assert await add_missing_columns() == [
+        ("tasksolution", "lesson_id"),
+        ("tasksolution", "course_id"),
+    ]
+    _, rows = await execute_query(
+        'SELECT "lesson_id", "course_id" FROM "tasksolution" WHERE "id" = ?',
+        solution.id,
+    )
+    assert (rows[0]["lesson_id"], rows[0]["course_id"]) == (
+        lesson.id,
+        lesson.course_id,
+    )
+
+
+@pytest.mark.asyncio
+async def test_waiting_solutions_queue_uses_index(create_course):
+    course = await create_course()
+    for sorted_by, ordering in WAITING_SOLUTIONS_ORDERINGS.items():
+        query = (
+            TaskSolution.filter(
+                course_id=course.id, status=TaskSolutionStatus.WAITING
+            )
+            .order_by(*ordering)
+            .limit(10)
+            .values("id")
+            .sql()
+        )
+        _, rows = await execute_query(f"EXPLAIN QUERY PLAN {query}")
+        plan = " ".join(row["detail"] for row in rows)
+        assert f"idx_tasksolution_waiting_{sorted_by}" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,61 @@
+import pytest
+
+from app import config
+from app.events import EventBroker, broker, student_topic, teacher_topic
+from app.db.models import User
+from app.services import ancestry_service, solution_service
+
+
+@pytest.mark.asyncio
+async def test_publish_and_get():
+    event_broker = EventBroker()
+    with event_broker.subscribe(["first", "second"]) as subscription:
+        event_broker.publish("first", "event", value=1)
+        event_broker.publish("other", "event", value=2)
+        event_broker.publish("second", "event", value=3)
+
+        assert (await subscription.get()).data == {"value": 1}
+        assert (await subscription.get()).data == {"value": 3}
+        assert await subscription.get(timeout=0.01) is None
+
+    assert subscription.is_closed
+    assert event_broker.subscribers_count("first") == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped():
+    event_broker = EventBroker()
+    slow_subscription = event_broker.subscribe(["topic"])
+    with event_broker.subscribe(["topic"]) as subscription:
+        for number in range(config.EVENTS_QUEUE_SIZE + 1):
+            event_broker.publish("topic", "event", number=number)
+            await subscription.get()
+
+    assert slow_subscription.is_closed
+    assert await slow_subscription.get() is None
+    assert await slow_subscription.get() is None
+    assert event_broker.subscribers_count("topic") == 0
+
+
+@pytest.mark.asyncio
+async def test_solution_events(create_solution):
+    solution = await create_solution()
+    student = await solution.student
+    ancestry = await ancestry_service.get_solution_ancestry(solution.id)
+    teacher = await User.get(id=ancestry.teacher_id)
+
+    with broker.subscribe([teacher_topic(teacher.id)]) as teacher_events:
+        with broker.subscribe([student_topic(student.id)]) as student_events:
+            await solution_service.create_or_update_solution(
+                solution.task_id, {"content": "", "extension": ""}, student
+            )
+            event = await teacher_events.get(timeout=1)
+            assert event.type == "solution_submitted"
+            assert event.data["solution_id"] == solution.id
+
+            mark_data = {"solutionId": solution.id, "isCorrect": True}
+            await solution_service.mark_solution(mark_data, teacher)
+            for events in (teacher_events, student_events):
+                event = await events.get(timeout=1)
+                assert event.type == "solution_marked"
+                assert event.data["status"] == 3
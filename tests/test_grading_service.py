@@ -0,0 +1,202 @@
+import shutil
+import sys
+
+import pytest
+
+from app import config
+from app import exceptions
+from app.db.models import LessonProgress, TaskSolution
+from app.db.models.task_solution import TaskSolutionStatus
+from app.grader import SandboxLimits, make_sandbox_command, run_in_sandbox
+from app.services import grading_service
+from app.services.course_service import subscribe_user_to_course
+
+
+DEFAULT_SANDBOX = config.GRADER_SANDBOX
+
+
+@pytest.fixture(autouse=True)
+def without_sandbox(monkeypatch):
+    # bubblewrap есть не везде, песочница проверяется отдельно
+    monkeypatch.setattr(config, "GRADER_SANDBOX", [])
+    monkeypatch.setattr(
+        config, "GRADER_RUNNERS", {"py": [sys.executable, "-I", "{file}"]}
+    )
+
+
+@pytest.fixture
+async def grader_pool():
+    grading_service.grader_pool.start(size=1)
+    yield grading_service.grader_pool
+    await grading_service.grader_pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_run_in_sandbox(tmp_path):
+    command = [sys.executable, "-c", "print(input()[::-1])"]
+    result = await run_in_sandbox(command, b"abc\n", str(tmp_path))
+    assert result.is_ok
+    assert result.stdout == b"cba\n"
+
+    result = await run_in_sandbox(
+        [sys.executable, "-c", "raise SystemExit(3)"], b"", str(tmp_path)
+    )
+    assert not result.is_ok
+    assert result.returncode == 3
+
+
+@pytest.mark.asyncio
+async def test_run_in_sandbox_limits(tmp_path):
+    limits = SandboxLimits(wall_seconds=0.5)
+    result = await run_in_sandbox(
+        [sys.executable, "-c", "while True: pass"], b"", str(tmp_path), limits
+    )
+    assert result.timed_out
+
+    limits = SandboxLimits(output_bytes=10)
+    result = await run_in_sandbox(
+        [sys.executable, "-c", "print('a' * 100)"], b"", str(tmp_path), limits
+    )
+    assert result.output_exceeded
+
+
+@pytest.mark.asyncio
+async def test_run_in_sandbox_rlimits_and_env(tmp_path):
+    code = (
+        "import os, resource;"
+        "print(resource.getrlimit(resource.RLIMIT_CPU)[0]);"
+        "print(sorted(os.environ))"
+    )
+    result = await run_in_sandbox(
+        [sys.executable, "-c", code],
+        b"",
+        str(tmp_path),
+        SandboxLimits(cpu_seconds=3),
+    )
+    cpu_limit, environ = result.stdout.decode().splitlines()
+    assert cpu_limit == "3"
+    assert "SECRET_KEY" not in environ
+
+
+def test_make_sandbox_command(monkeypatch):
+    monkeypatch.setattr(
+        config, "GRADER_SANDBOX", ["bwrap", "--bind", "{dir}", "{dir}", "--"]
+    )
+    command = make_sandbox_command(
+        ["python3", "solution.py"], "/tmp/run", SandboxLimits(cpu_seconds=1)
+    )
+    assert command[:5] == ["bwrap", "--bind", "/tmp/run", "/tmp/run", "--"]
+    assert command[5] == "prlimit"
+    assert "--cpu=1" in command
+    assert command[-2:] == ["python3", "solution.py"]
+
+
+@pytest.mark.asyncio
+async def test_grading_disabled_without_sandbox(monkeypatch):
+    monkeypatch.setattr(config, "GRADER_POOL_SIZE", 1)
+    monkeypatch.setattr(config, "GRADER_SANDBOX", ["missing-sandbox"])
+    await grading_service._on_startup_start_grading(None)
+    assert not grading_service.grader_pool.is_running
+
+
+@pytest.mark.skipif(
+    shutil.which("bwrap") is None, reason="bubblewrap не установлен"
+)
+@pytest.mark.asyncio
+async def test_run_in_bubblewrap(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "GRADER_SANDBOX", DEFAULT_SANDBOX)
+    code = (
+        "import os;"
+        f"print(os.getuid(), os.path.exists({str(config.TEMPLATES_PATH)!r}))"
+    )
+    result = await run_in_sandbox(
+        ["python3", "-I", "-c", code], b"", str(tmp_path)
+    )
+    assert result.stdout == b"65534 False\n"
+
+
+@pytest.mark.asyncio
+async def test_add_task_test_case(create_teacher, create_task):
+    task = await create_task()
+    other_teacher = await create_teacher()
+    test_case_data = {"input": "1 2", "expectedOutput": "3"}
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await grading_service.add_task_test_case(
+            task.id, test_case_data, other_teacher
+        )
+
+
+@pytest.mark.asyncio
+async def test_grade_solution(
+    grader_pool,
+    create_teacher,
+    create_student,
+    create_course,
+    create_lesson,
+    create_task,
+    create_solution,
+):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+    lesson = await create_lesson(course=course, teacher=teacher)
+    task = await create_task(course=course, lesson=lesson, teacher=teacher)
+    student = await create_student()
+    await subscribe_user_to_course(student, course)
+
+    with pytest.raises(exceptions.InvalidTestCase):
+        await grading_service.add_task_test_case(
+            task.id, {"input": "1 2"}, teacher
+        )
+
+    for test_input, expected_output in [("1 2\n", "3"), ("5 5\n", "10\n")]:
+        await grading_service.add_task_test_case(
+            task.id,
+            {"input": test_input, "expectedOutput": expected_output},
+            teacher,
+        )
+    test_cases = await grading_service.get_task_test_cases(task.id, teacher)
+    assert len(test_cases) == 2
+
+    solution = await create_solution(
+        content="print(sum(map(int, input().split())))  ",
+        extension="py",
+        task=task,
+        student=student,
+    )
+    await grader_pool.join()
+    solution = await TaskSolution.get(id=solution.id)
+    assert solution.status == TaskSolutionStatus.CORRECT
+
+    progress = await LessonProgress.get(student=student, lesson=lesson)
+    assert progress.correct_count == 1
+    assert progress.waiting_count == 0
+
+    # новая версия решения проверяется заново
+    solution = await create_solution(
+        content="print(input())", extension="py", task=task, student=student
+    )
+    await grader_pool.join()
+    solution = await TaskSolution.get(id=solution.id)
+    assert solution.status == TaskSolutionStatus.INCORRECT
+
+    progress = await LessonProgress.get(student=student, lesson=lesson)
+    assert progress.correct_count == 0
+    assert progress.waiting_count == 0
+
+    solution = await create_solution(
+        content="print(sum(map(int, input().split())))",
+        extension="py",
+        task=task,
+        student=student,
+    )
+    assert solution.status == TaskSolutionStatus.WAITING
+    await grader_pool.join()
+    solution = await TaskSolution.get(id=solution.id)
+    assert solution.status == TaskSolutionStatus.CORRECT
+
+
+@pytest.mark.asyncio
+async def test_grade_solution_without_runner(grader_pool, create_solution):
+    solution = await create_solution(extension="unknown")
+    assert not await grading_service.submit_solution_for_grading(solution)
+    assert solution.status == TaskSolutionStatus.WAITING
@@ -0,0 +1,54 @@
+import pytest
+
+from app import exceptions
+from app.services import inbox_service, solution_service
+
+
+@pytest.mark.asyncio
+async def test_get_teacher_inbox(
+    create_teacher,
+    create_student,
+    create_course,
+    create_lesson,
+    create_task,
+    create_solution,
+):
+    teacher = await create_teacher()
+    courses = [await create_course(teacher=teacher) for _ in range(2)]
+    tasks = []
+    for course in courses:
+        lesson = await create_lesson(course=course, teacher=teacher)
+        tasks.append(
+            await create_task(course=course, lesson=lesson, teacher=teacher)
+        )
+    student = await create_student()
+    solutions = [
+        await create_solution(task=task, student=student) for task in tasks
+    ]
+    # решение из курса другого учителя не попадает в очередь
+    await create_solution()
+
+    inbox = await inbox_service.get_teacher_inbox(teacher)
+    assert inbox["waiting_count"] == 2
+    assert [course["course_id"] for course in inbox["courses"]] == [
+        course.id for course in courses
+    ]
+    assert inbox["courses"][0]["lessons"][0]["waiting_count"] == 1
+    assert [
+        solution["solution_id"] for solution in inbox["oldest_solutions"]
+    ] == [solution.id for solution in solutions]
+
+    mark_data = {"solutionId": solutions[0].id, "isCorrect": True}
+    await solution_service.mark_solution(mark_data, teacher)
+    inbox = await inbox_service.get_teacher_inbox(teacher)
+    assert inbox["waiting_count"] == 1
+    assert [course["course_id"] for course in inbox["courses"]] == [
+        courses[1].id
+    ]
+
+    await create_solution(task=tasks[0], student=student, content="fixed")
+    inbox = await inbox_service.get_teacher_inbox(teacher)
+    assert inbox["waiting_count"] == 2
+
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await inbox_service.get_teacher_inbox(student)
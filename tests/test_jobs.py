@@ -0,0 +1,94 @@
+import datetime as dt
+
+import pytest
+from tortoise import timezone
+
+from app.db.models import Job
+from app.db.models.job import JobStatus
+from app.jobs import JobWorker, enqueue_job, job_handler
+
+
+done_payloads = []
+
+
+@job_handler("test_done")
+async def done_job(value):
+    done_payloads.append(value)
+
+
+@job_handler("test_fail", queue="test")
+async def fail_job():
+    raise RuntimeError("fail")
+
+
+@pytest.mark.asyncio
+async def test_run_job():
+    worker = JobWorker({"default": 1})
+    for value in range(3):
+        await enqueue_job("test_done", {"value": value})
+
+    assert await worker.run_once() == 1
+    await worker.join()
+    assert await worker.run_once() == 1
+    await worker.join()
+    assert await worker.run_once() == 1
+    await worker.join()
+    assert await worker.run_once() == 0
+
+    assert done_payloads[-3:] == [0, 1, 2]
+    assert not await Job.all().exists()
+
+
+@pytest.mark.asyncio
+async def test_delayed_job():
+    worker = JobWorker({})
+    await enqueue_job("test_done", {"value": "delayed"}, delay=60)
+    assert await worker.run_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_and_fail_job():
+    worker = JobWorker({})
+    job = await enqueue_job("test_fail", {})
+    job.max_attempts = 2
+    await job.save()
+
+    assert await worker.run_once() == 1
+    await worker.join()
+    job = await Job.get(id=job.id)
+    assert job.status == JobStatus.PENDING
+    assert job.attempts == 1
+    assert job.run_at > timezone.now()
+    assert "fail" in job.last_error
+
+    assert await worker.run_once() == 0
+    job.run_at = timezone.now() - dt.timedelta(seconds=1)
+    await job.save()
+
+    assert await worker.run_once() == 1
+    await worker.join()
+    job = await Job.get(id=job.id)
+    assert job.status == JobStatus.FAILED
+    assert job.attempts == 2
+    assert await worker.run_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_reclaim_abandoned_job():
+    worker = JobWorker({})
+    job = await enqueue_job("test_done", {"value": "abandoned"})
+    await Job.filter(id=job.id).update(
+        status=JobStatus.RUNNING,
+        locked_until=timezone.now() - dt.timedelta(seconds=1),
+    )
+
+    assert await worker.run_once() == 1
+    await worker.join()
+    assert done_payloads[-1] == "abandoned"
+
+
+def test_wake_before_start():
+    # обработчик создаётся при импорте, до запуска event loop
+    worker = JobWorker({})
+    worker.wake()
+    assert not worker.is_running
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from app import exceptions
@@ -49,3 +51,17 @@ async def test_raise_for_lesson_access(
 
     await subscribe_user_to_course(student, course)
     await lesson_service._raise_for_lesson_access(lesson, student)
+
+
+@pytest.mark.asyncio
+async def test_lesson_order_index(create_teacher, create_course):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+
+    lessons = await asyncio.gather(
+        *(
+            lesson_service.create_lesson(course.id, {"title": "t"}, teacher)
+            for _ in range(5)
+        )
+    )
+    assert sorted(lesson.order_index for lesson in lessons) == list(range(5))
@@ -0,0 +1,208 @@
+import aiohttp_jinja2
+import jinja2
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import config
+from app.db.models import AnonimousUser, Course
+from app.rendering import TEMPLATES_DIGEST_KEY, cached_page, streamed_template
+from app.services import course_service
+from app.services.page_cache_service import (
+    cache_page,
+    forget_course_pages,
+    get_cached_page,
+    make_page_key,
+    page_versions,
+)
+
+
+async def get_course_page_key(course, user):
+    return await make_page_key("course", {"course_id": str(course.id)}, user)
+
+
+@pytest.mark.asyncio
+async def test_anonymous_page_key_is_shared(create_course):
+    course = await create_course()
+    first_key = await get_course_page_key(course, AnonimousUser())
+    second_key = await get_course_page_key(course, AnonimousUser())
+    assert first_key == second_key
+
+
+@pytest.mark.asyncio
+async def test_page_key_per_viewer(create_course, create_student):
+    course = await create_course()
+    first_key = await get_course_page_key(course, await create_student())
+    second_key = await get_course_page_key(course, await create_student())
+    assert first_key != second_key
+
+
+@pytest.mark.asyncio
+async def test_missing_course_page_key():
+    key = await make_page_key("course", {"course_id": "1"}, AnonimousUser())
+    assert key is None
+
+
+@pytest.mark.asyncio
+async def test_new_lesson_invalidates_course_pages(
+    create_teacher, create_course, create_lesson
+):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+    key = await get_course_page_key(course, AnonimousUser())
+    cache_page(key, b"page")
+
+    await create_lesson(course=course, teacher=teacher)
+    new_key = await get_course_page_key(course, AnonimousUser())
+    assert new_key != key
+    assert get_cached_page(new_key) is None
+
+
+@pytest.mark.asyncio
+async def test_subscription_invalidates_student_pages(
+    create_teacher, create_course, create_student
+):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+    student = await create_student()
+    key = await get_course_page_key(course, student)
+    teacher_key = await get_course_page_key(course, teacher)
+    anonymous_key = await get_course_page_key(course, AnonimousUser())
+
+    await course_service.subscribe_user_to_course(student, course)
+    assert await get_course_page_key(course, student) != key
+    # на странице курса учитель видит количество учеников
+    assert await get_course_page_key(course, teacher) != teacher_key
+    assert await get_course_page_key(course, AnonimousUser()) == anonymous_key
+
+
+@pytest.mark.asyncio
+async def test_solution_invalidates_student_pages(create_solution):
+    solution = await create_solution()
+    student = await solution.student
+    task = await solution.task
+    lesson = await task.lesson
+    params = {
+        "course_id": str(lesson.course_id),
+        "lesson_id": str(lesson.id),
+        "task_id": str(task.id),
+    }
+    key = await make_page_key("task", params, student)
+
+    await create_solution(task=task, student=student, content="new")
+    assert await make_page_key("task", params, student) != key
+
+
+@pytest.mark.asyncio
+async def test_large_page_is_not_cached(monkeypatch, create_course):
+    monkeypatch.setattr(config, "PAGE_CACHE_MAX_PAGE_SIZE", 4)
+    course = await create_course()
+    key = await get_course_page_key(course, AnonimousUser())
+    cache_page(key, b"large page")
+    assert get_cached_page(key) is None
+
+
+async def make_page_client(calls, templates_digest=None):
+    app = web.Application()
+    aiohttp_jinja2.setup(
+        app,
+        enable_async=True,
+        loader=jinja2.DictLoader({"page.html": "<p>{{ number }}</p>"}),
+    )
+    if templates_digest is not None:
+        app[TEMPLATES_DIGEST_KEY] = templates_digest
+
+    @cached_page
+    @streamed_template("page.html")
+    async def handler(request):
+        calls.append(request.match_info["course_id"])
+        return {"number": len(calls)}
+
+    app.router.add_get(r"/course/{course_id:\d+}", handler, name="course")
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_cached_page(create_course, create_lesson):
+    course = await create_course()
+    calls = []
+    client = await make_page_client(calls)
+    try:
+        for _ in range(2):
+            response = await client.get(f"/course/{course.id}")
+            assert response.status == 200
+            assert "ETag" not in response.headers
+            assert await response.text() == "<p>1</p>"
+
+        assert len(calls) == 1
+
+        await create_lesson(course=course, teacher=await course.teacher)
+        response = await client.get(f"/course/{course.id}")
+        assert await response.text() == "<p>2</p>"
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_page_revalidation(create_course, create_lesson):
+    course = await create_course()
+    calls = []
+    client = await make_page_client(calls, templates_digest="digest")
+    try:
+        response = await client.get(f"/course/{course.id}")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        assert await response.text() == "<p>1</p>"
+
+        response = await client.get(
+            f"/course/{course.id}", headers={"If-None-Match": etag}
+        )
+        assert response.status == 304
+        assert response.headers["ETag"] == etag
+        assert await response.read() == b""
+
+        response = await client.get(
+            f"/course/{course.id}", headers={"If-None-Match": '"other"'}
+        )
+        assert response.status == 200
+        assert response.headers["ETag"] == etag
+
+        await create_lesson(course=course, teacher=await course.teacher)
+        response = await client.get(
+            f"/course/{course.id}", headers={"If-None-Match": etag}
+        )
+        assert response.status == 200
+        assert response.headers["ETag"] != etag
+        assert await response.text() == "<p>2</p>"
+        assert len(calls) == 2
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_page_versions_are_kept_in_memory(create_course):
+    course = await create_course()
+    key = await get_course_page_key(course, AnonimousUser())
+
+    # версия, изменённая другим воркером, видна после PAGE_VERSIONS_TTL
+    await Course.filter(id=course.id).update(pages_version=10)
+    assert await get_course_page_key(course, AnonimousUser()) == key
+
+    page_versions.clear()
+    new_key = await get_course_page_key(course, AnonimousUser())
+    assert new_key != key
+
+    await forget_course_pages(course.id)
+    assert await get_course_page_key(course, AnonimousUser()) != new_key
+
+
+@pytest.mark.asyncio
+async def test_deleted_course_page_key(create_course):
+    course = await create_course()
+    teacher = await course.teacher
+    assert await get_course_page_key(course, AnonimousUser()) is not None
+
+    await course_service.delete_course(course.id, teacher)
+    assert await get_course_page_key(course, AnonimousUser()) is None
@@ -0,0 +1,51 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app import exceptions
+from app.db.models import User
+from app.passwords import PasswordHasher, needs_rehash, password_hasher
+from app.services import user_service
+
+
+@pytest.mark.asyncio
+async def test_hash_password():
+    password_hash = await password_hasher.hash("12345678")
+    assert password_hash.startswith("scrypt$")
+    assert password_hash != await password_hasher.hash("12345678")
+    assert not needs_rehash(password_hash)
+
+    assert await password_hasher.verify("12345678", password_hash)
+    assert not await password_hasher.verify("123456789", password_hash)
+
+
+@pytest.mark.asyncio
+async def test_rehash_legacy_password(create_user):
+    user = await create_user(email="mail@mail.com", password="12345678")
+    legacy_hash = hashlib.sha256(b"12345678").hexdigest()
+    await User.filter(id=user.id).update(password_hash=legacy_hash)
+    assert needs_rehash(legacy_hash)
+
+    with pytest.raises(exceptions.IncorrectPassword):
+        await user_service.get_user("mail@mail.com", "87654321")
+    user = await User.get(id=user.id)
+    assert user.password_hash == legacy_hash
+
+    await user_service.get_user("mail@mail.com", "12345678")
+    user = await User.get(id=user.id)
+    assert user.password_hash.startswith("scrypt$")
+    assert await user.check_password("12345678")
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_busy():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    results = await asyncio.gather(
+        *(hasher.hash("12345678") for _ in range(3)),
+        return_exceptions=True,
+    )
+    hasher.close()
+
+    assert isinstance(results[2], exceptions.PasswordHasherBusy)
+    assert all(isinstance(result, str) for result in results[:2])
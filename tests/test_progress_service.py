@@ -0,0 +1,86 @@
+import pytest
+
+from app.db.models import Lesson, LessonProgress
+from app.db.models.task_solution import TaskSolutionStatus
+from app.services import course_service, progress_service, solution_service
+
+
+async def get_progress(student, lesson):
+    progress = await LessonProgress.get(student=student, lesson=lesson)
+    return progress.correct_count, progress.waiting_count
+
+
+@pytest.mark.asyncio
+async def test_lesson_progress(
+    create_teacher, create_student, create_course, create_lesson, create_task
+):
+    teacher = await create_teacher()
+    student = await create_student()
+    course = await create_course(teacher=teacher)
+    await course_service.subscribe_user_to_course(student, course)
+    lesson = await create_lesson(course=course, teacher=teacher)
+    task = await create_task(course=course, lesson=lesson, teacher=teacher)
+    await create_task(course=course, lesson=lesson, teacher=teacher)
+
+    solution_data = {"content": "content", "extension": "ext"}
+    solution = await solution_service.create_or_update_solution(
+        task.id, solution_data, student
+    )
+    assert await get_progress(student, lesson) == (0, 1)
+
+    mark_data = {"solutionId": solution.id, "isCorrect": True}
+    await solution_service.mark_solution(mark_data, teacher)
+    assert await get_progress(student, lesson) == (1, 0)
+
+    # то же содержимое не нужно проверять заново
+    await solution_service.create_or_update_solution(
+        task.id, solution_data, student
+    )
+    assert await get_progress(student, lesson) == (1, 0)
+
+    await solution_service.create_or_update_solution(
+        task.id, {"content": "new content", "extension": "ext"}, student
+    )
+    assert await get_progress(student, lesson) == (0, 1)
+
+    (lesson_,) = await course_service.get_course_lessons(course, student)
+    assert lesson_.tasks_count == 2
+    assert lesson_.correct_solutions_count == 0
+    assert lesson_.waiting_solutions_count == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_lessons_progress(create_solution):
+    solution = await create_solution()
+    student = await solution.student
+    task = await solution.task
+    lesson = await task.lesson
+
+    await LessonProgress.all().delete()
+    await Lesson.filter(id=lesson.id).update(tasks_count=0)
+
+    await progress_service.rebuild_lessons_progress()
+    assert await get_progress(student, lesson) == (0, 1)
+    assert (await Lesson.get(id=lesson.id)).tasks_count == 1
+
+
+@pytest.mark.asyncio
+async def test_change_lessons_progress_in_batches(
+    monkeypatch, create_solution, create_student
+):
+    monkeypatch.setattr(progress_service, "PROGRESS_UPSERT_BATCH_SIZE", 2)
+    solution = await create_solution()
+    lesson = await (await solution.task).lesson
+    students = [await create_student() for _ in range(5)]
+
+    await progress_service.change_lessons_progress(
+        progress_service.StatusChange(
+            student.id,
+            lesson.id,
+            None,
+            TaskSolutionStatus.CORRECT,
+        )
+        for student in students
+    )
+    for student in students:
+        assert await get_progress(student, lesson) == (1, 0)
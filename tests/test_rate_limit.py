@@ -0,0 +1,102 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer, make_mocked_request
+
+from app import config
+from app.db.models import AnonimousUser
+from app.middlewares.rate_limit_middleware import (
+    TokenBuckets,
+    rate_limit_middleware,
+    rate_limit_buckets,
+)
+from app.utils import CURRENT_USER_KEY
+
+
+def test_token_buckets():
+    buckets = TokenBuckets(sweep_interval=60)
+    assert buckets.take("a", rate=1, burst=2) == 0
+    assert buckets.take("a", rate=1, burst=2) == 0
+    assert 0 < buckets.take("a", rate=1, burst=2) <= 1
+    assert buckets.take("b", rate=1, burst=2) == 0
+    assert len(buckets) == 2
+
+
+def test_sweep_token_buckets():
+    buckets = TokenBuckets(sweep_interval=60)
+    buckets.take("a", rate=1, burst=1)
+    buckets.take("b", rate=0.001, burst=1)
+    buckets.sweep(now=10 ** 9)
+    assert len(buckets) == 0
+
+    buckets.take("a", rate=0.001, burst=2)
+    buckets.sweep(now=0)
+    assert len(buckets) == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_middleware(monkeypatch):
+    monkeypatch.setitem(config.RATE_LIMITS, "default", [0.001, 2])
+    rate_limit_buckets.clear()
+
+    async def handler(request):
+        return web.Response(text="ok")
+
+    def make_request():
+        request = make_mocked_request("GET", "/")
+        request[CURRENT_USER_KEY] = AnonimousUser()
+        return request
+
+    for _ in range(2):
+        response = await rate_limit_middleware(make_request(), handler)
+        assert response.status == 200
+
+    response = await rate_limit_middleware(make_request(), handler)
+    assert response.status == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_take_all_token_buckets():
+    buckets = TokenBuckets(sweep_interval=60)
+    assert buckets.take("ip", rate=0.001, burst=1) == 0
+    # токен пользователя не тратится, если у IP токенов нет
+    assert buckets.take_all(["ip", "user"], rate=0.001, burst=1) > 0
+    assert buckets.take("user", rate=0.001, burst=1) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_ip_and_user(monkeypatch, create_student):
+    monkeypatch.setitem(config.RATE_LIMITS, "default", [0.001, 2])
+    rate_limit_buckets.clear()
+    students = [await create_student() for _ in range(3)]
+
+    async def handler(request):
+        return web.Response(text="ok")
+
+    def make_request(user):
+        request = make_mocked_request("GET", "/")
+        request[CURRENT_USER_KEY] = user
+        return request
+
+    # разные пользователи с одного IP делят его ограничение
+    for student in students[:2]:
+        response = await rate_limit_middleware(make_request(student), handler)
+        assert response.status == 200
+
+    response = await rate_limit_middleware(make_request(students[2]), handler)
+    assert response.status == 429
+
+
+@pytest.mark.asyncio
+async def test_static_is_not_rate_limited(monkeypatch):
+    monkeypatch.setitem(config.RATE_LIMITS, "default", [0.001, 1])
+    rate_limit_buckets.clear()
+    app = web.Application(middlewares=[rate_limit_middleware])
+    app.router.add_static("/static/", path=config.STATIC_PATH, name="static")
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        for _ in range(3):
+            response = await client.get("/static/missing.css")
+            assert response.status == 404
+    finally:
+        await client.close()
@@ -0,0 +1,106 @@
+import aiohttp
+import aiohttp_jinja2
+import jinja2
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import config
+from app.rendering import (
+    TEMPLATES_DIGEST_KEY,
+    get_templates_digest,
+    setup_templates,
+    streamed_template,
+)
+
+
+def test_development_templates(monkeypatch):
+    monkeypatch.setattr(config, "TEMPLATES_MODE", "development")
+    app = web.Application()
+    env = setup_templates(app)
+    assert env.auto_reload
+    assert env.bytecode_cache is None
+    assert TEMPLATES_DIGEST_KEY not in app
+
+
+def test_production_templates(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "TEMPLATES_MODE", "production")
+    monkeypatch.setattr(config, "TEMPLATES_CACHE_PATH", tmp_path / "cache")
+    env = setup_templates(web.Application())
+    assert not env.auto_reload
+
+    templates_count = len(env.list_templates(extensions=["html"]))
+    assert len(list((tmp_path / "cache").iterdir())) == templates_count
+
+    # второй воркер загружает уже скомпилированные шаблоны
+    app = web.Application()
+    env = setup_templates(app)
+    assert env.get_template("base.html") is not None
+    # и получает тот же хэш шаблонов для ETag страниц
+    assert app[TEMPLATES_DIGEST_KEY] == get_templates_digest(env)
+
+
+STREAM_TEMPLATES = {
+    "base.html": (
+        "<html><head><title>{{ title }}</title></head>"
+        "<body>{% block body %}{% endblock %}</body></html>"
+    ),
+    "items.html": (
+        '{% extends "base.html" %}{% block body %}'
+        "{% for item in items %}<p>{{ item }}</p>{% endfor %}"
+        "{% endblock %}"
+    ),
+    "broken.html": (
+        '{% extends "base.html" %}{% block body %}'
+        "{{ items.missing.attribute }}{% endblock %}"
+    ),
+}
+
+
+async def make_stream_client(template_name, context):
+    app = web.Application()
+    aiohttp_jinja2.setup(
+        app, enable_async=True, loader=jinja2.DictLoader(STREAM_TEMPLATES)
+    )
+
+    @streamed_template(template_name)
+    async def handler(request):
+        return context
+
+    app.router.add_get("/", handler)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_render_template_stream(monkeypatch):
+    monkeypatch.setattr(config, "TEMPLATE_STREAM_CHUNK_SIZE", 64)
+    items = [f"item {number}" for number in range(100)]
+    client = await make_stream_client(
+        "items.html", {"title": "title", "items": items}
+    )
+    try:
+        response = await client.get("/")
+        assert response.status == 200
+        assert response.headers["Transfer-Encoding"] == "chunked"
+        assert response.content_type == "text/html"
+
+        text = await response.text()
+        assert text.startswith("<html><head><title>title</title></head>")
+        assert text.endswith("<p>item 99</p></body></html>")
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_render_broken_template_stream():
+    client = await make_stream_client(
+        "broken.html", {"title": "title", "items": None}
+    )
+    try:
+        response = await client.get("/")
+        with pytest.raises(aiohttp.ClientPayloadError):
+            await response.text()
+    finally:
+        await client.close()
@@ -0,0 +1,83 @@
+import pytest
+
+from app import config
+from app import exceptions
+from app.db.models import SolutionRevision, User
+from app.services import (
+    ancestry_service,
+    revision_service,
+    solution_service,
+)
+
+
+async def submit(solution, student, content):
+    await solution_service.create_or_update_solution(
+        solution.task_id, {"content": content, "extension": "py"}, student
+    )
+
+
+@pytest.mark.asyncio
+async def test_solution_revisions(create_solution):
+    lines = [f"line = {number}\n" for number in range(100)]
+    solution = await create_solution(content="".join(lines))
+    student = await solution.student
+
+    contents = ["".join(lines).strip()]
+    for number in range(config.SOLUTION_SNAPSHOT_INTERVAL + 2):
+        lines[number] = f"changed = {number}\n"
+        contents.append("".join(lines).strip())
+        await submit(solution, student, contents[-1])
+
+    revisions = await revision_service.get_solution_revisions(
+        solution.id, student
+    )
+    assert [revision["number"] for revision in revisions] == list(
+        range(1, len(contents) + 1)
+    )
+
+    stored_revisions = await SolutionRevision.filter(
+        solution_id=solution.id
+    ).order_by("number")
+    snapshots = [
+        revision.number
+        for revision in stored_revisions
+        if revision.is_snapshot
+    ]
+    assert snapshots == [1, config.SOLUTION_SNAPSHOT_INTERVAL + 1]
+    assert all(
+        len(revision.data) < 100
+        for revision in stored_revisions
+        if not revision.is_snapshot
+    )
+
+    for number, content in enumerate(contents, start=1):
+        assert (
+            await revision_service.get_solution_revision_content(
+                solution.id, number, student
+            )
+            == content
+        )
+
+    diff = await revision_service.diff_solution_revisions(
+        solution.id, 1, 2, student
+    )
+    assert "-line = 0\n+changed = 0\n" in diff
+
+    with pytest.raises(exceptions.SolutionRevisionDoesNotExist):
+        await revision_service.get_solution_revision_content(
+            solution.id, len(contents) + 1, student
+        )
+
+
+@pytest.mark.asyncio
+async def test_solution_revisions_access(create_solution, create_student):
+    solution = await create_solution()
+    ancestry = await ancestry_service.get_solution_ancestry(solution.id)
+    teacher = await User.get(id=ancestry.teacher_id)
+    other_student = await create_student()
+
+    assert await revision_service.get_solution_revisions(solution.id, teacher)
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await revision_service.get_solution_revisions(
+            solution.id, other_student
+        )
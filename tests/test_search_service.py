@@ -0,0 +1,99 @@
+import pytest
+
+from app import exceptions
+from app.db.models import Course
+from app.services import course_service, search_service
+
+
+async def search_courses(query: str):
+    search_page = await search_service.search_public_courses(query)
+    return search_page["courses"]
+
+
+@pytest.mark.asyncio
+async def test_search_courses_ranking(create_course):
+    titles = ["Reb-black xamax", "Course by Max", "maximum", "max"]
+    for title in titles:
+        await create_course(title=title)
+    await create_course(title="course", description="all about max")
+
+    search_page = await search_service.search_public_courses("Max")
+    courses_titles = [course["title"] for course in search_page["courses"]]
+
+    assert courses_titles == [*reversed(titles), "course"]
+    assert search_page["nextCursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_courses_pagination(create_course):
+    for number in range(5):
+        await create_course(title=f"python {number}")
+
+    courses = []
+    cursor = None
+    while True:
+        search_page = await search_service.search_public_courses(
+            "python", limit=2, cursor=cursor
+        )
+        assert len(search_page["courses"]) <= 2
+        courses += search_page["courses"]
+        cursor = search_page["nextCursor"]
+        if cursor is None:
+            break
+
+    all_courses = await search_service.search_public_courses("python")
+    assert courses == all_courses["courses"]
+    assert len(courses) == 5
+
+    with pytest.raises(exceptions.InvalidSearchCursor):
+        await search_service.search_public_courses("python", cursor="invalid")
+
+
+@pytest.mark.asyncio
+async def test_search_courses_with_typo(create_course):
+    await create_course(title="Maximum programming")
+    await create_course(title="Minimum")
+
+    courses = await search_courses("maxumum")
+
+    assert [course["title"] for course in courses] == ["Maximum programming"]
+
+
+@pytest.mark.asyncio
+async def test_search_index_updates(create_teacher, create_course):
+    teacher = await create_teacher()
+    course = await create_course(title="python", teacher=teacher)
+    await create_course(title="python", is_private=True)
+    assert await search_courses("python")
+
+    await course_service.delete_course(course.id, teacher)
+    assert not await search_courses("python")
+
+    await Course.create(
+        title="python", description="", is_private=False, teacher=teacher
+    )
+    assert not await search_courses("python")
+
+    search_service.search_index.loaded_at = None
+    assert await search_courses("python")
+
+
+@pytest.mark.asyncio
+async def test_search_results_cache(create_course):
+    await create_course(title="python")
+    first_page = await search_service.search_public_courses("Python")
+    assert len(first_page["courses"]) == 1
+
+    # курс из другого процесса не виден до обновления индекса,
+    # а курс из этого процесса сбрасывает сохранённые результаты
+    await Course.create(
+        title="python 2",
+        description="",
+        is_private=False,
+        teacher=await (await Course.first()).teacher,
+    )
+    assert await search_service.search_public_courses("python") == first_page
+
+    await create_course(title="python 3")
+    search_page = await search_service.search_public_courses("python")
+    assert len(search_page["courses"]) == 2
@@ -0,0 +1,50 @@
+import pytest
+
+from app.db.models.user import UserRole
+from app.security import (
+    UserAuthorizationPolicy,
+    make_identity,
+    users_cache,
+)
+
+
+@pytest.mark.asyncio
+async def test_authorized_userid_uses_cache(create_user):
+    user = await create_user()
+    policy = UserAuthorizationPolicy()
+
+    user_ = await policy.authorized_userid(str(user.id))
+    assert user_ == user
+    assert users_cache.get(user.id) is user_
+
+    assert await policy.authorized_userid("-1") is None
+    assert -1 not in users_cache
+
+
+@pytest.mark.asyncio
+async def test_users_cache_invalidated_on_save(create_user):
+    user = await create_user()
+    policy = UserAuthorizationPolicy()
+    await policy.authorized_userid(str(user.id))
+
+    user.username = "new username"
+    await user.save()
+    assert user.id not in users_cache
+
+    user_ = await policy.authorized_userid(str(user.id))
+    assert user_.username == "new username"
+
+
+@pytest.mark.asyncio
+async def test_authorized_userid_ignores_identity_claims(create_student):
+    student = await create_student(username="student")
+    policy = UserAuthorizationPolicy()
+    assert make_identity(student) == str(student.id)
+
+    # роль и имя из старых identity не используются
+    identity = f"{student.id}:{UserRole.TEACHER.value}:admin"
+    user = await policy.authorized_userid(identity)
+    assert user == student
+    assert user.username == "student"
+    assert not user.is_teacher
+    assert user.email == student.email
@@ -0,0 +1,58 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+
+from app.sessions import SignedCookieStorage
+
+
+SECRET_KEY = b"secret" * 6
+
+
+def make_request(storage, cookie=None):
+    headers = {}
+    if cookie is not None:
+        headers["Cookie"] = f"{storage.cookie_name}={cookie}"
+    return make_mocked_request("GET", "/", headers=headers)
+
+
+async def save_session(storage, data):
+    session = await storage.new_session()
+    session.update(data)
+    response = web.Response()
+    await storage.save_session(make_request(storage), response, session)
+    return response.cookies[storage.cookie_name].value
+
+
+@pytest.mark.asyncio
+async def test_signed_cookie_storage_roundtrip():
+    storage = SignedCookieStorage(SECRET_KEY)
+    cookie = await save_session(storage, {"AIOHTTP_SECURITY": "1:0:name"})
+
+    session = await storage.load_session(make_request(storage, cookie))
+    assert not session.new
+    assert session["AIOHTTP_SECURITY"] == "1:0:name"
+
+
+@pytest.mark.asyncio
+async def test_signed_cookie_storage_without_cookie():
+    storage = SignedCookieStorage(SECRET_KEY)
+    session = await storage.load_session(make_request(storage))
+    assert session.new
+    assert session.empty
+
+
+@pytest.mark.asyncio
+async def test_signed_cookie_storage_invalid_signature():
+    storage = SignedCookieStorage(SECRET_KEY)
+    cookie = await save_session(storage, {"AIOHTTP_SECURITY": "1:0:name"})
+
+    another_storage = SignedCookieStorage(b"another" * 6)
+    session = await another_storage.load_session(make_request(storage, cookie))
+    assert session.new
+
+    payload, signature = cookie.split(".")
+    for invalid_cookie in (payload, f"{payload}x.{signature}", "a.b.c"):
+        session = await storage.load_session(
+            make_request(storage, invalid_cookie)
+        )
+        assert session.new
@@ -0,0 +1,119 @@
+import socket
+from email import message_from_bytes
+from email.mime.text import MIMEText
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app import config
+from app.services import email_service
+from app.smtp import SMTPPool
+
+
+class MessagesHandler:
+    def __init__(self):
+        self.messages = []
+        self.peers = []
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        self.messages.append(envelope)
+        self.peers.append(session.peer)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SMTPServer:
+    def __init__(self):
+        self.handler = MessagesHandler()
+        self.hostname = "127.0.0.1"
+        self.port = free_port()
+        self.controller = None
+
+    def start(self):
+        self.controller = Controller(
+            self.handler, hostname=self.hostname, port=self.port
+        )
+        self.controller.start()
+
+    def stop(self):
+        self.controller.stop()
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+async def smtp_pool(smtp_server):
+    pool = SMTPPool(smtp_server.hostname, smtp_server.port, use_tls=False)
+    yield pool
+    await pool.close()
+
+
+def make_message(number):
+    message = MIMEText(f"text {number}")
+    message["To"] = "student@mail.com"
+    message["From"] = "tasker@mail.com"
+    message["Subject"] = f"subject {number}"
+    return message
+
+
+@pytest.mark.asyncio
+async def test_send_through_one_connection(smtp_server, smtp_pool):
+    for number in range(3):
+        await smtp_pool.send(make_message(number))
+
+    handler = smtp_server.handler
+    assert len(handler.messages) == 3
+    assert len(set(handler.peers)) == 1
+    assert smtp_pool.idle_count == 1
+
+
+@pytest.mark.asyncio
+async def test_reconnect_after_server_restart(
+    smtp_server, smtp_pool, monkeypatch
+):
+    await smtp_pool.send(make_message(0))
+
+    smtp_server.restart()
+    await smtp_pool.send(make_message(1))
+
+    monkeypatch.setattr(config, "SMTP_NOOP_INTERVAL", 0)
+    smtp_server.restart()
+    await smtp_pool.send(make_message(2))
+
+    handler = smtp_server.handler
+    assert len(handler.messages) == 3
+    assert len(set(handler.peers)) == 3
+
+
+@pytest.mark.asyncio
+async def test_send_confirmation_email(smtp_server, smtp_pool, monkeypatch):
+    monkeypatch.setattr(email_service, "smtp_pool", smtp_pool)
+    monkeypatch.setattr(
+        config, "CONFIRMATION_EMAIL_USERNAME", "tasker@mail.com"
+    )
+
+    await email_service.send_confirmation_email(
+        "student@mail.com", "http://localhost/register/token"
+    )
+
+    (envelope,) = smtp_server.handler.messages
+    assert envelope.rcpt_tos == ["student@mail.com"]
+    message = message_from_bytes(envelope.content)
+    assert b"http://localhost/register/token" in message.get_payload(
+        decode=True
+    )
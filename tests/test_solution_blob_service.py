@@ -0,0 +1,100 @@
+import pytest
+from aiohttp import web
+from tortoise import Tortoise
+
+from app import exceptions
+from app.db import execute_query, get_table_columns
+from app.db.models import SolutionBlob, TaskSolution, User
+from app.services import (
+    ancestry_service,
+    solution_blob_service,
+    solution_service,
+    task_service,
+)
+
+
+@pytest.mark.asyncio
+async def test_save_and_load_solution_content():
+    content = "print('hello')\n" * 100
+    address = await solution_blob_service.save_solution_content(content)
+    same_address = await solution_blob_service.save_solution_content(content)
+
+    assert address == same_address
+    assert address.size == len(content.encode())
+    assert await SolutionBlob.all().count() == 1
+    assert len((await SolutionBlob.get(hash=address.hash)).data) < address.size
+
+    solution_blob_service.solution_blobs_cache.clear()
+    assert (
+        await solution_blob_service.load_solution_content(address.hash)
+        == content
+    )
+
+    with pytest.raises(exceptions.SolutionDoesNotExist):
+        await solution_blob_service.load_solution_content("0" * 64)
+
+
+@pytest.mark.asyncio
+async def test_delete_unused_solution_blobs(create_solution):
+    solution = await create_solution(content="used")
+    await solution_blob_service.save_solution_content("unused")
+
+    assert await solution_blob_service.delete_unused_solution_blobs() == 1
+    assert await SolutionBlob.filter(hash=solution.content_hash).exists()
+
+
+@pytest.mark.asyncio
+async def test_solution_pages_load_content(create_solution):
+    solution = await create_solution(content="solution content")
+    student = await solution.student
+    ancestry = await ancestry_service.get_solution_ancestry(solution.id)
+    teacher = await User.get(id=ancestry.teacher_id)
+
+    page_data = await solution_service.get_solution_page_data(
+        solution.id, teacher
+    )
+    assert page_data["solution"]["content"] == "solution content"
+
+    page_data = await task_service.get_task_page_data(
+        solution.task_id, student
+    )
+    assert page_data["solution"]["content"] == "solution content"
+
+
+@pytest.mark.asyncio
+async def test_move_solutions_content_to_blobs(create_solution):
+    solution = await create_solution(content="migrated")
+    content_hash = solution.content_hash
+    # таблица решений в том виде, в котором она была до переноса
+    await execute_query('ALTER TABLE "tasksolution" ADD COLUMN "content" TEXT')
+    await execute_query(
+        'UPDATE "tasksolution" SET "content_hash" = \'\', '
+        '"content" = ? WHERE "id" = ?',
+        "migrated",
+        solution.id,
+    )
+    await SolutionBlob.all().delete()
+
+    moved_count = await solution_blob_service.move_solutions_content_to_blobs(
+        batch_size=1
+    )
+    assert moved_count == 1
+
+    solution = await TaskSolution.get(id=solution.id)
+    assert solution.content_hash == content_hash
+    assert (
+        await solution_blob_service.load_solution_content(content_hash)
+        == "migrated"
+    )
+    connection = Tortoise.get_connection("default")
+    assert "content" not in await get_table_columns(connection, "tasksolution")
+    assert await solution_blob_service.move_solutions_content_to_blobs() == 0
+
+
+def test_setup_solution_blobs():
+    app = web.Application()
+    solution_blob_service.setup_solution_blobs(app)
+    assert (
+        solution_blob_service._on_startup_move_solutions_content
+        in app.on_startup
+    )
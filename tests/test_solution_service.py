@@ -1,7 +1,10 @@
 import pytest
 
 from app import exceptions
+from app.db.models import LessonProgress, TaskSolution
+from app.db.models.task_solution import TaskSolutionStatus
 from app.services import solution_service
+from app.services.solution_blob_service import load_solution_content
 from app.services.course_service import (
     subscribe_user_to_course,
 )
@@ -27,7 +30,10 @@ async def test_create_solution(
         task.id, solution_data, student
     )
 
-    assert solution.content == solution_data["content"]
+    assert (
+        await load_solution_content(solution.content_hash)
+        == solution_data["content"]
+    )
     assert solution.extension == solution_data["extension"]
     assert (await solution.student) == student
     assert (await solution.task) == task
@@ -53,7 +59,10 @@ async def test_update_solution(create_solution):
         solution_task.id, new_solution_data, solution_student
     )
 
-    assert updated_solution.content == new_solution_data["content"]
+    assert (
+        await load_solution_content(updated_solution.content_hash)
+        == new_solution_data["content"]
+    )
     assert updated_solution.extension == new_solution_data["extension"]
 
 
@@ -87,3 +96,130 @@ async def test_get_solution_task_teacher(
 
     teacher_ = await solution_service._get_solution_task_teacher(solution)
     assert teacher == teacher_
+
+
+@pytest.mark.asyncio
+async def test_get_waiting_solutions_page(
+    create_teacher,
+    create_student,
+    create_course,
+    create_lesson,
+    create_task,
+    create_solution,
+):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+    lessons = [
+        await create_lesson(course=course, teacher=teacher) for _ in range(2)
+    ]
+    tasks = [
+        await create_task(course=course, lesson=lesson, teacher=teacher)
+        for lesson in lessons
+    ]
+    students = [await create_student() for _ in range(3)]
+    for student in reversed(students):
+        for task in tasks:
+            await create_solution(task=task, student=student)
+    # решение из другого курса не попадает в очередь
+    await create_solution()
+
+    for sorted_by in solution_service.WAITING_SOLUTIONS_ORDERINGS:
+        solutions = []
+        cursor = None
+        while True:
+            page = await solution_service.get_waiting_solutions_page(
+                course.id, teacher, sorted_by, cursor, limit=4
+            )
+            assert len(page["solutions"]) <= 4
+            solutions += page["solutions"]
+            cursor = page["nextCursor"]
+            if cursor is None:
+                break
+
+        assert len(solutions) == 6
+        assert all("content" not in solution for solution in solutions)
+        assert len({solution["solution_id"] for solution in solutions}) == 6
+
+        if sorted_by == "timestamp":
+            keys = [solution["timestamp"] for solution in solutions]
+        elif sorted_by == "student":
+            keys = [solution["student_id"] for solution in solutions]
+        else:
+            keys = [solution["lesson_id"] for solution in solutions]
+        assert keys == sorted(keys)
+
+    with pytest.raises(exceptions.InvalidWaitingSolutionsQuery):
+        await solution_service.get_waiting_solutions_page(
+            course.id, teacher, "content"
+        )
+    with pytest.raises(exceptions.InvalidWaitingSolutionsQuery):
+        await solution_service.get_waiting_solutions_page(
+            course.id, teacher, cursor="invalid"
+        )
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await solution_service.get_waiting_solutions_page(
+            course.id, students[0]
+        )
+
+
+@pytest.mark.asyncio
+async def test_mark_solutions(
+    create_teacher,
+    create_student,
+    create_course,
+    create_lesson,
+    create_task,
+    create_solution,
+):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+    lesson = await create_lesson(course=course, teacher=teacher)
+    tasks = [
+        await create_task(course=course, lesson=lesson, teacher=teacher)
+        for _ in range(2)
+    ]
+    student = await create_student()
+    solutions = [
+        await create_solution(task=task, student=student) for task in tasks
+    ]
+    other_solution = await create_solution()
+
+    marks_data = [
+        {"solutionId": solutions[0].id, "isCorrect": True},
+        {"solutionId": solutions[1].id, "isCorrect": False},
+    ]
+    await solution_service.mark_solutions(marks_data, teacher)
+
+    statuses = [
+        (await TaskSolution.get(id=solution.id)).status
+        for solution in solutions
+    ]
+    assert statuses == [
+        TaskSolutionStatus.CORRECT,
+        TaskSolutionStatus.INCORRECT,
+    ]
+    progress = await LessonProgress.get(student=student, lesson=lesson)
+    assert (progress.correct_count, progress.waiting_count) == (1, 0)
+
+    with pytest.raises(exceptions.NotEnoughAccessRights):
+        await solution_service.mark_solutions(
+            [
+                {"solutionId": solutions[0].id, "isCorrect": False},
+                {"solutionId": other_solution.id, "isCorrect": True},
+            ],
+            teacher,
+        )
+    assert (
+        await TaskSolution.get(id=solutions[0].id)
+    ).status == TaskSolutionStatus.CORRECT
+
+    with pytest.raises(exceptions.SolutionDoesNotExist):
+        await solution_service.mark_solutions(
+            [{"solutionId": 0, "isCorrect": True}], teacher
+        )
+    with pytest.raises(exceptions.InvalidSolutionMarks):
+        await solution_service.mark_solutions([{"isCorrect": True}], teacher)
+    with pytest.raises(exceptions.InvalidSolutionMarks):
+        await solution_service.mark_solutions(
+            [{"solutionId": solutions[0].id, "isCorrect": "false"}], teacher
+        )
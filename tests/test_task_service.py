@@ -58,3 +58,26 @@ async def test_raise_for_task_access(
     student = await create_student()
     with pytest.raises(exceptions.NotEnoughAccessRights):
         await task_service._raise_for_task_access(task, student)
+
+
+@pytest.mark.asyncio
+async def test_task_order_index(create_teacher, create_course, create_lesson):
+    teacher = await create_teacher()
+    course = await create_course(teacher=teacher)
+    lesson = await create_lesson(course=course, teacher=teacher)
+    task_data = {"title": "t", "condition": "c", "example": "e"}
+
+    first_task = await task_service.create_task(
+        course.id, lesson.id, task_data, teacher
+    )
+    second_task = await task_service.create_task(
+        course.id, lesson.id, task_data, teacher
+    )
+    assert first_task.order_index == 0
+    assert second_task.order_index == 1
+
+    another_lesson = await create_lesson(course=course, teacher=teacher)
+    another_task = await task_service.create_task(
+        course.id, another_lesson.id, task_data, teacher
+    )
+    assert another_task.order_index == 0
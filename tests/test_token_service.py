@@ -1,9 +1,14 @@
+import jwt
 import pytest
 
 from app import exceptions
+from app.passwords import password_hasher
 from app.services import token_service
 
 
+NO_VERIFY = {"verify_signature": False}
+
+
 def test_correct_get_course_id_from_token():
     course_id = 1
     token = token_service.create_course_invite_link(course_id=course_id)
@@ -19,27 +24,56 @@ def test_invalid_get_course_id_from_token():
         token_service.get_course_id_from_token(invalid_token)
 
 
-def test_correct_get_register_token_data():
+@pytest.mark.asyncio
+async def test_correct_get_register_token_data():
     data = {
         "email": "email",
         "username": "username",
         "password": "12345678",
         "role": "student",
     }
-    token = token_service.create_confirmation_token(data)
+    token = await token_service.create_confirmation_token(data)
+    assert "12345678" not in jwt.decode(token, options=NO_VERIFY).values()
+
     data_ = token_service.get_register_token_data(token)
-    assert data == data_
+    password_hash = data_.pop("password_hash")
+    assert await password_hasher.verify("12345678", password_hash)
+    assert data_ == {
+        "email": "email",
+        "username": "username",
+        "role": "student",
+    }
 
 
-def test_invalid_get_register_token_data():
+@pytest.mark.asyncio
+async def test_invalid_get_register_token_data():
     data = {
         "email": "email",
         "username": "username",
         "password": "12345678",
         "role": "student",
     }
-    token = token_service.create_confirmation_token(data)
+    token = await token_service.create_confirmation_token(data)
     invalid_token = token + "invalid_part"
 
     with pytest.raises(exceptions.InvalidRegisterToken):
         token_service.get_register_token_data(invalid_token)
+
+
+def test_course_invite_link_is_stable():
+    token = token_service.create_course_invite_link(course_id=1)
+    token_service.invite_tokens_cache.clear()
+    assert token_service.create_course_invite_link(course_id=1) == token
+    assert token_service.create_course_invite_link(course_id=2) != token
+    assert (
+        token_service.create_course_invite_link(course_id=1, version=1)
+        != token
+    )
+
+
+def test_course_invite_version():
+    token = token_service.create_course_invite_link(course_id=1, version=3)
+    invite = token_service.get_course_invite(token)
+    assert invite.course_id == 1
+    assert invite.version == 3
+    assert token_service.get_course_invite(token) is invite
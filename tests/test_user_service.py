@@ -1,7 +1,7 @@
 import pytest
 
 from app import exceptions
-from app.services import user_service
+from app.services import token_service, user_service
 
 
 @pytest.mark.asyncio
@@ -16,12 +16,27 @@ async def test_create_user():
 
     assert user.email == user_data["email"]
     assert user.username == user_data["username"]
-    assert user.check_password(user_data["password"])
+    assert await user.check_password(user_data["password"])
 
     with pytest.raises(exceptions.NotUniqueEmail):
         await user_service.create_user(user_data)
 
 
+@pytest.mark.asyncio
+async def test_create_user_from_register_token():
+    register_data = {
+        "email": "mail@mail.com",
+        "username": "username",
+        "role": "student",
+        "password": "12345678",
+    }
+    token = await token_service.create_confirmation_token(register_data)
+    user = await user_service.create_user(
+        token_service.get_register_token_data(token)
+    )
+    assert await user.check_password("12345678")
+
+
 @pytest.mark.asyncio
 async def test_login_user(create_user):
     email = "mail@mail.com"
@@ -36,7 +51,7 @@ async def test_login_user(create_user):
     user = await user_service.get_user(email, password)
 
     assert user.email == email
-    assert user.check_password(password)
+    assert await user.check_password(password)
 
     non_existed_email = email + "not_exists@yet"
     with pytest.raises(exceptions.UserDoesNotExist):